@@ -0,0 +1,108 @@
+# Benchmark do carregamento de interações do CRM: KEYS + GET por chave vs. SCAN + MGET em lotes
+#
+# Uso:
+#   python benchmarks/bench_crm_loader.py                      # fakeredis, 10k/100k/1M chaves
+#   python benchmarks/bench_crm_loader.py --url redis://localhost:6379/15 --sizes 10000 100000
+#
+# Requer fakeredis (pip install fakeredis) quando nenhuma --url é informada.
+# ATENÇÃO: com --url o banco informado é limpo (FLUSHDB) antes de cada rodada.
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.loader import (
+    DEFAULT_BATCH_SIZE,
+    interactions_to_frame,
+    iter_crm_chunks,
+)
+
+
+class RoundTripCounter:
+    """Envolve um cliente redis-py contando cada comando enviado ao servidor"""
+
+    def __init__(self, client):
+        self.client = client
+        self.round_trips = 0
+        self._execute = client.execute_command
+        client.execute_command = self._counted
+
+    def _counted(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._execute(*args, **kwargs)
+
+
+def make_client(url):
+    if url:
+        import redis
+        return redis.from_url(url)
+    import fakeredis
+    return fakeredis.FakeRedis()
+
+
+def populate(client, size):
+    """Grava `size` interações no formato usado pelo CRMLogger"""
+    client.flushdb()
+    pipe = client.pipeline(transaction=False)
+    for i in range(size):
+        item = {
+            "interaction_id": f"i{i}",
+            "customer": f"Cliente {i % 5000}",
+            "type": "chat",
+            "timestamp": f"2023-06-{i % 28 + 1:02d} 10:00:00",
+            "status": "Resolvido" if i % 3 else "Pendente",
+        }
+        pipe.set(f"interaction:{item['interaction_id']}", json.dumps(item))
+        if i % 10000 == 9999:
+            pipe.execute()
+    pipe.execute()
+
+
+def legacy_load(client):
+    """Implementação anterior de load_crm_data"""
+    values = [client.get(key) for key in client.keys("interaction:*")]
+    return interactions_to_frame(values)
+
+
+def scan_load(client, batch_size):
+    """Carga completa por SCAN + MGET (a mesma do backfill dos índices)"""
+    return pd.concat(list(iter_crm_chunks(client, batch_size=batch_size)), ignore_index=True)
+
+
+def measure(client, loader):
+    counter = RoundTripCounter(client)
+    start = time.perf_counter()
+    df = loader(client)
+    elapsed = time.perf_counter() - start
+    client.execute_command = counter._execute
+    return len(df), counter.round_trips, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do carregamento de interações do CRM")
+    parser.add_argument("--url", help="URL de um redis-server local (padrão: fakeredis)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    loaders = {
+        "KEYS + GET": legacy_load,
+        f"SCAN + MGET ({args.batch_size})": lambda c: scan_load(c, args.batch_size),
+    }
+
+    print(f"{'chaves':>10} {'estratégia':<22} {'linhas':>10} {'idas':>10} {'tempo (s)':>10}")
+    for size in args.sizes:
+        populate(client, size)
+        for name, loader in loaders.items():
+            rows, round_trips, elapsed = measure(client, loader)
+            print(f"{size:>10} {name:<22} {rows:>10} {round_trips:>10} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
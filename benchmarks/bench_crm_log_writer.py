@@ -0,0 +1,84 @@
+# Custo do registro de interações no caminho da resposta: gravação síncrona de uma interação
+# por vez (crm.store.save_interaction) comparada ao enfileiramento do gravador em segundo plano
+# (crm.log_writer), que grava em lote e em pipeline. Usa fakeredis por padrão (--redis-url para
+# um Redis real); a latência do fakeredis é do próprio processo, sem rede.
+#
+# Uso:
+#   python benchmarks/bench_crm_log_writer.py --interactions 5000
+#   python benchmarks/bench_crm_log_writer.py --redis-url redis://localhost:6379/15
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import fakeredis
+import numpy as np
+import redis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.log_writer import InteractionLogWriter
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.store import save_interaction
+
+
+def interactions(count):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "customer": f"Cliente {i % 500}",
+            "customer_phone": f"55119{i % 500:08d}",
+            "type": "whatsapp",
+            "status": "Resolvido",
+            "query": "Onde está meu pedido #1001?",
+            "classification": {"intent": "order_status", "order_number": "#1001"},
+            "shopify_data": {"orders": '{"latest": {"status": "Enviado"}}'},
+            "response": "Seu pedido #1001 foi enviado e chega em 3 dias úteis.",
+            "timestamp": (now - datetime.timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def percentiles(timings_ms):
+    timings_ms = np.array(timings_ms)
+    return f"p50 {np.percentile(timings_ms, 50):8.4f} ms | p99 {np.percentile(timings_ms, 99):8.4f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de interações: síncrono x gravador em lote")
+    parser.add_argument("--interactions", type=int, default=5000)
+    parser.add_argument("--backend", choices=("keys", "stream"), default="keys")
+    parser.add_argument("--redis-url", help="Redis real (o banco é apagado); padrão: fakeredis")
+    args = parser.parse_args()
+
+    redis_client = redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeRedis()
+    batch = interactions(args.interactions)
+
+    redis_client.flushdb()
+    timings = []
+    start = time.perf_counter()
+    for interaction in batch:
+        started = time.perf_counter()
+        save_interaction(redis_client, dict(interaction))
+        timings.append((time.perf_counter() - started) * 1000)
+    total = time.perf_counter() - start
+    print(f"síncrono:  {percentiles(timings)} por resposta | {args.interactions / total:8.0f} interações/s")
+
+    redis_client.flushdb()
+    writer = InteractionLogWriter(redis_client, backend=args.backend)
+    timings = []
+    start = time.perf_counter()
+    for interaction in batch:
+        started = time.perf_counter()
+        writer.log(dict(interaction))
+        timings.append((time.perf_counter() - started) * 1000)
+    writer.flush()
+    total = time.perf_counter() - start
+    writer.close()
+    print(f"em lote:   {percentiles(timings)} por resposta | {args.interactions / total:8.0f} interações/s "
+          f"({writer.written} gravadas, {writer.dropped} descartadas)")
+
+
+if __name__ == "__main__":
+    main()
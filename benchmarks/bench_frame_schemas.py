@@ -0,0 +1,122 @@
+# Benchmark dos esquemas tipados: memória e latência dos filtros do dashboard com a
+# construção anterior (lista de dicts, strings object, valor float, .dt.date + isin)
+# vs os DataFrames tipados (categóricos, centavos, fatia por busca binária)
+#
+# Uso:
+#   python benchmarks/bench_frame_schemas.py --rows 1000000
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.schemas import (
+    category_filter,
+    date_slice,
+    typed_conversations,
+    typed_interactions,
+    typed_orders,
+)
+
+ORDER_STATUSES = ["Entregue", "Processando", "Enviado", "Cancelado"]
+CONVERSATION_STATUSES = ["Resolvido", "Pendente"]
+INTERACTION_STATUSES = ["novo", "em_andamento", "concluido"]
+
+
+def generate_records(count, days=730, customers=50_000, seed=0):
+    """Registros como chegam da API/Redis: dicts com strings e datas ISO"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, count)), unit="s")
+    names = np.array([f"Cliente {i}" for i in range(customers)], dtype=object)
+    customer = names[rng.integers(0, customers, count)]
+    iso = dates.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    orders = [
+        {"order_id": str(i), "customer": c, "value": v, "date": d, "status": s}
+        for i, (c, v, d, s) in enumerate(zip(
+            customer, (rng.integers(1_000, 100_000, count) / 100).tolist(), iso,
+            np.array(ORDER_STATUSES, dtype=object)[rng.integers(0, len(ORDER_STATUSES), count)],
+        ))
+    ]
+    conversations = [
+        {"conversation_id": f"w{i}", "customer": c, "customer_phone": f"55119{i % customers:08d}",
+         "timestamp": d, "last_timestamp": d, "message_count": m, "status": s}
+        for i, (c, d, m, s) in enumerate(zip(
+            customer, iso, rng.integers(1, 20, count).tolist(),
+            np.array(CONVERSATION_STATUSES, dtype=object)[rng.integers(0, 2, count)],
+        ))
+    ]
+    interactions = [
+        {"interaction_id": str(i), "customer": c, "timestamp": d, "status": s, "channel": "whatsapp"}
+        for i, (c, d, s) in enumerate(zip(
+            customer, iso, np.array(INTERACTION_STATUSES, dtype=object)[rng.integers(0, 3, count)],
+        ))
+    ]
+    return orders, conversations, interactions
+
+
+def best_of(runs, fn):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def legacy_frame(records, date_column):
+    # Construção anterior: DataFrame de dicts e conversão da coluna de data
+    df = pd.DataFrame(records)
+    df[date_column] = pd.to_datetime(df[date_column])
+    return df
+
+
+def legacy_filter(df, date_column, start, end, statuses):
+    df = df[(df[date_column].dt.date >= start) & (df[date_column].dt.date <= end)]
+    return df[df["status"].isin(statuses)]
+
+
+def typed_filter(df, date_column, start, end, statuses):
+    return category_filter(date_slice(df, date_column, start, end), "status", statuses)
+
+
+def report(name, records, date_column, typed, statuses, runs):
+    start, end = datetime.date(2023, 6, 1), datetime.date(2023, 8, 31)
+    legacy = legacy_frame(records, date_column)
+    current = typed(legacy_frame(records, date_column))
+    assert len(legacy_filter(legacy, date_column, start, end, statuses)) == len(
+        typed_filter(current, date_column, start, end, statuses)
+    )
+    legacy_mb = legacy.memory_usage(deep=True).sum() / 2**20
+    typed_mb = current.memory_usage(deep=True).sum() / 2**20
+    print(f"{name}:")
+    print(f"  memória:  anterior {legacy_mb:8.1f} MiB | tipado {typed_mb:8.1f} MiB")
+    print(
+        f"  filtro:   anterior {best_of(runs, lambda: legacy_filter(legacy, date_column, start, end, statuses)):8.1f} ms"
+        f" | tipado {best_of(runs, lambda: typed_filter(current, date_column, start, end, statuses)):8.1f} ms"
+    )
+    print(
+        f"  conversão: {best_of(1, lambda: typed(legacy_frame(records, date_column))):.0f} ms"
+        f" (construção anterior {best_of(1, lambda: legacy_frame(records, date_column)):.0f} ms)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos esquemas tipados dos DataFrames do dashboard")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    orders, conversations, interactions = generate_records(args.rows)
+    print(f"linhas por fonte: {args.rows}")
+    report("pedidos", orders, "date", typed_orders, ["Entregue", "Enviado"], args.runs)
+    report("conversas", conversations, "timestamp", typed_conversations, ["Pendente"], args.runs)
+    report("interações do CRM", interactions, "timestamp", typed_interactions, ["novo", "em_andamento"], args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Avaliação do classificador determinístico de intenção (fast-path antes do LLM) sobre um
+# conjunto rotulado: cobertura, precisão e recall por intenção e latência por mensagem.
+# Mensagens em que o classificador devolve None seguem para o LLM e não contam como erro.
+#
+# Uso:
+#   python benchmarks/bench_intent_classifier.py
+#   python benchmarks/bench_intent_classifier.py --fixture outro.jsonl --errors
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.intent import INTENTS, classify_message
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "intent_messages.jsonl")
+
+
+def load_fixture(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def latencies_us(texts, repeat):
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            classify_message(text)
+        timings.append((time.perf_counter() - start) / repeat * 1_000_000)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação do classificador de intenção")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--repeat", type=int, default=200, help="repetições por mensagem na medição de latência")
+    parser.add_argument("--errors", action="store_true", help="lista erros e mensagens enviadas ao LLM")
+    args = parser.parse_args()
+
+    samples = load_fixture(args.fixture)
+    predictions = [classify_message(sample["text"]) for sample in samples]
+    handled = [(sample, prediction["intent"]) for sample, prediction in zip(samples, predictions) if prediction]
+
+    print(f"mensagens: {len(samples)} | resolvidas sem LLM: {len(handled)} ({len(handled) / len(samples):.0%})")
+    correct = sum(sample["intent"] == intent for sample, intent in handled)
+    print(f"acurácia nas resolvidas: {correct / len(handled):.1%}" if handled else "nenhuma mensagem resolvida")
+    print(f"{'intenção':<10} {'precisão':>9} {'recall':>9} {'rótulos':>8}")
+    for intent in INTENTS:
+        predicted = [sample for sample, guess in handled if guess == intent]
+        labeled = [sample for sample in samples if sample["intent"] == intent]
+        hits = sum(sample["intent"] == intent for sample in predicted)
+        precision = f"{hits / len(predicted):.1%}" if predicted else "-"
+        recall = f"{hits / len(labeled):.1%}" if labeled else "-"
+        print(f"{intent:<10} {precision:>9} {recall:>9} {len(labeled):>8}")
+
+    timings = latencies_us([sample["text"] for sample in samples], args.repeat)
+    print(
+        f"latência por mensagem: média {timings.mean():.1f} µs | p50 {np.percentile(timings, 50):.1f} µs"
+        f" | p99 {np.percentile(timings, 99):.1f} µs"
+    )
+
+    if args.errors:
+        for sample, prediction in zip(samples, predictions):
+            if prediction is None:
+                print(f"LLM   [{sample['intent']}] {sample['text']}")
+            elif prediction["intent"] != sample["intent"]:
+                print(f"ERRO  [{sample['intent']} -> {prediction['intent']}] {sample['text']}")
+
+
+if __name__ == "__main__":
+    main()
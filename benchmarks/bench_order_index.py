@@ -0,0 +1,80 @@
+# Consulta de pedidos pelo índice local (shopify.order_index) comparada à busca na API do
+# Shopify, contra o servidor mock local. O índice usa fakeredis por padrão (--redis-url para um
+# Redis real); a latência do fakeredis é do próprio processo, sem rede.
+#
+# Uso:
+#   python benchmarks/bench_order_index.py --orders 50000
+#   python benchmarks/bench_order_index.py --redis-url redis://localhost:6379/15
+import argparse
+import os
+import sys
+import time
+
+import fakeredis
+import numpy as np
+import redis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_shopify import generate_orders, start_server
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.order_index import (
+    lookup_orders,
+    rebuild_order_index,
+)
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.orders import (
+    ShopifyOrderLookup,
+    order_row,
+    orders_to_frame,
+)
+
+
+def percentiles(timings_ms):
+    timings_ms = np.array(timings_ms)
+    return f"p50 {np.percentile(timings_ms, 50):7.3f} ms | p99 {np.percentile(timings_ms, 99):7.3f} ms"
+
+
+def timed(function, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        function(**query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta de pedidos: índice local x API")
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--redis-url", help="Redis real (o banco é apagado); padrão: fakeredis")
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders)
+    redis_client = redis.from_url(args.redis_url) if args.redis_url else fakeredis.FakeRedis()
+    redis_client.flushdb()
+    start = time.perf_counter()
+    rebuild_order_index(redis_client, orders_to_frame([order_row(order) for order in orders]))
+    print(f"indexação: {args.orders} pedidos em {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(23)
+    sample = [orders[i] for i in rng.integers(0, len(orders), args.queries)]
+    queries = {
+        "número": [{"order_number": order["name"]} for order in sample],
+        "e-mail": [{"email": order["email"]} for order in sample],
+        "telefone": [{"phone": order["customer"]["phone"]} for order in sample],
+        "nome": [{"name": f"{order['customer']['first_name']} {order['customer']['last_name']}"} for order in sample],
+    }
+
+    server, _, url = start_server(orders)
+    api = ShopifyOrderLookup(shop_url=url, access_token="mock")
+    print(f"{'chave':<9} {'índice local':<36} {'busca na API (mock local)'}")
+    for key, key_queries in queries.items():
+        local = timed(lambda **query: lookup_orders(redis_client, **query), key_queries)
+        remote = timed(api.lookup, key_queries[:20])
+        print(f"{key:<9} {percentiles(local):<36} {percentiles(remote)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Benchmark da visão geral: agregação dos pedidos brutos a cada render vs leitura dos contadores pré-agregados
+#
+# Uso:
+#   python benchmarks/bench_overview_rollups.py --orders 1000000
+#   python benchmarks/bench_overview_rollups.py --url redis://localhost:6379/0
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.rollups import (
+    frame_metrics,
+    overview_metrics,
+    rebuild_order_rollups,
+    rollup_series,
+)
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.schemas import typed_orders
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.cache import OrderCache
+
+
+def generate_orders(count, days=730, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "order_id": np.arange(count).astype(str),
+        "customer": "Cliente",
+        "value": rng.integers(1_000, 100_000, count) / 100,
+        "date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, days * 86400, count), unit="s"),
+        "status": "Enviado",
+    })
+
+
+def best_of(runs, fn):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos contadores da visão geral")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", help="Redis real (padrão: fakeredis em memória)")
+    args = parser.parse_args()
+
+    if args.url:
+        import redis
+        redis_client = redis.Redis.from_url(args.url)
+    else:
+        import fakeredis
+        redis_client = fakeredis.FakeRedis()
+
+    orders = generate_orders(args.orders)
+    cache = OrderCache(tempfile.mkdtemp())
+    cache.upsert(orders)
+    rebuild_order_rollups(redis_client, orders)
+
+    def from_orders():
+        # Caminho anterior da visão geral: todos os pedidos do cache local e agregação em pandas
+        frame_metrics(typed_orders(cache.load()), pd.DataFrame())
+
+    def from_rollups():
+        overview_metrics(redis_client)
+        rollup_series(redis_client, "day")
+
+    print(f"pedidos: {args.orders}")
+    print(f"leitura e agregação dos pedidos: {best_of(args.runs, from_orders):.1f} ms")
+    print(f"contadores pré-agregados:        {best_of(args.runs, from_rollups):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Busca de produtos pelo catálogo local (índice invertido em memória) comparada à busca
+# pela API do Shopify a cada mensagem, contra o servidor mock local.
+#
+# Uso:
+#   python benchmarks/bench_product_search.py --products 5000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_shopify import generate_products, start_server
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.catalog import ProductCatalog
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.orders import shop_base_url
+
+QUERIES = [
+    "Qual o preço da camiseta preta?",
+    "tem tenis branco no 40?",
+    "Vocês têm moletom cinza oversized?",
+    "quero uma calça slim azul",
+    "vestidos estampados",
+    "bolsa bege",
+    "jaqueta premium",
+    "bermudas esportivas verdes",
+    "sandalia rosa",
+    "bone casual",
+]
+
+
+def percentiles(timings_ms):
+    timings_ms = np.array(timings_ms)
+    return f"p50 {np.percentile(timings_ms, 50):.3f} ms | p99 {np.percentile(timings_ms, 99):.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de produtos: catálogo local x API")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    server, state, url = start_server([], products=generate_products(args.products))
+    with tempfile.TemporaryDirectory() as root:
+        catalog = ProductCatalog(root=root)
+        start = time.perf_counter()
+        count = catalog.refresh(shop_url=url, access_token="mock")
+        print(f"sincronização: {count} produtos em {time.perf_counter() - start:.2f} s ({state.requests} requisições)")
+
+        start = time.perf_counter()
+        catalog.index()
+        print(f"montagem do índice: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        local = []
+        for _ in range(args.repeat):
+            for query in QUERIES:
+                start = time.perf_counter()
+                catalog.search(query)
+                local.append((time.perf_counter() - start) * 1000)
+        print(f"busca no índice local: {percentiles(local)}")
+        for query in QUERIES[:3]:
+            print(f"  {query!r} -> {[product['title'] for product in catalog.search(query, limit=3)]}")
+
+    # Referência: uma ida à API por mensagem (título exato, sem relevância) no mock local,
+    # sem a latência de rede até o Shopify
+    remote = []
+    with httpx.Client(base_url=shop_base_url(url)) as client:
+        for query in QUERIES * 5:
+            start = time.perf_counter()
+            client.get("/products.json", params={"title": query, "limit": 5})
+            remote.append((time.perf_counter() - start) * 1000)
+    print(f"ida à API (mock local): {percentiles(remote)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Replay de um log de conversas contra o cache de respostas (fakeredis): taxa de acerto e tempo
+# economizado. `generate_ms` no log é o tempo medido das consultas ao Shopify + geração da resposta
+# pelo LLM; um acerto economiza esse tempo. Eventos "products_updated"/"orders_updated" simulam
+# alterações no Shopify (as versões dos dados mudam e as respostas antigas deixam de valer).
+#
+# Uso:
+#   python benchmarks/bench_response_cache.py
+#   python benchmarks/bench_response_cache.py --max-entries 10 --log outro.jsonl
+import argparse
+import json
+import os
+import sys
+import time
+
+import fakeredis
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.store import bump_data_version
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.intent import classify_message
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.response_cache import ResponseCache
+
+LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "conversation_log.jsonl")
+EVENTS = {"products_updated": "products", "orders_updated": "orders"}
+
+
+def load_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay do log de conversas contra o cache de respostas")
+    parser.add_argument("--log", default=LOG)
+    parser.add_argument("--max-entries", type=int, default=5000)
+    parser.add_argument("--ttl", type=int, default=21600)
+    args = parser.parse_args()
+
+    redis_client = fakeredis.FakeRedis()
+    cache = ResponseCache(redis_client, ttl=args.ttl, max_entries=args.max_entries)
+    messages = uncacheable = 0
+    total_ms = 0.0
+    overhead_us = []
+    for entry in load_log(args.log):
+        if "event" in entry:
+            bump_data_version(redis_client, EVENTS[entry["event"]])
+            continue
+        messages += 1
+        total_ms += entry["generate_ms"]
+
+        start = time.perf_counter()
+        # Mensagens ambíguas seriam classificadas pelo LLM; aqui contam como respostas não reaproveitáveis,
+        # assim como as consultas de pedido
+        key = cache.key(classify_message(entry["text"]), entry["text"])
+        cached = cache.get(key, entry["customer_name"]) if key else None
+        overhead_us.append((time.perf_counter() - start) * 1_000_000)
+        if key is None:
+            uncacheable += 1
+        elif cached is None:
+            response = f"Olá {entry['customer_name']}! Resposta para: {entry['text']}"
+            cache.set(key, response, entry["customer_name"], generate_ms=entry["generate_ms"])
+
+    stats = cache.stats()
+    overhead_us = np.array(overhead_us)
+    print(f"mensagens: {messages} | sem chave (ambíguas ou de pedido): {uncacheable}")
+    print(
+        f"acertos: {stats['hits']} | falhas: {stats['misses']} | taxa de acerto: {stats['hit_rate']:.1%}"
+        f" ({stats['hits'] / messages:.1%} de todas as mensagens)"
+    )
+    print(
+        f"tempo economizado: {stats['saved_ms'] / 1000:.1f} s de {total_ms / 1000:.1f} s"
+        f" ({stats['saved_ms'] / total_ms:.1%}) | média por acerto: "
+        f"{stats['saved_ms'] / stats['hits'] if stats['hits'] else 0:.0f} ms"
+    )
+    print(
+        f"custo da consulta ao cache: p50 {np.percentile(overhead_us, 50):.0f} µs"
+        f" | p99 {np.percentile(overhead_us, 99):.0f} µs | remoções LRU: {stats['evictions']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
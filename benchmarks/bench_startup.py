@@ -0,0 +1,76 @@
+# Benchmark da inicialização do dashboard: tempo até o primeiro render em um processo novo
+# (import do app, verificação do ambiente e execução do script), medido com o AppTest do Streamlit.
+# Mede também a verificação de dependências contra o lock e, para comparação, o `pip list`
+# que a inicialização anterior executava a cada partida (junto com instalações via pip).
+#
+# Uso:
+#   python benchmarks/bench_startup.py --runs 5
+#   python benchmarks/bench_startup.py --script app.py
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em um processo novo para medir a partida a frio (sem módulos já importados)
+FIRST_RENDER = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout={timeout})
+app.run()
+elapsed = time.perf_counter() - start
+if app.exception:
+    sys.exit("erro no app: " + str(app.exception[0].message))
+print(elapsed)
+"""
+
+ENVIRONMENT_CHECK = """
+import time
+start = time.perf_counter()
+from init_streamlit import initialize_environment
+initialize_environment()
+print(time.perf_counter() - start)
+"""
+
+
+def run_timed(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+def wall_time(command):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT_DIR, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def summary(timings):
+    return f"mediana {statistics.median(timings):8.1f} ms | mín {min(timings):8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do dashboard")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--script", default="streamlit_app.py", help="script do Streamlit a medir")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    checks = [run_timed(ENVIRONMENT_CHECK) for _ in range(args.runs)]
+    print(f"verificação do ambiente (lock):   {summary(checks)}")
+    pip_list = [wall_time([sys.executable, "-m", "pip", "list", "--format=json"]) for _ in range(args.runs)]
+    print(f"pip list (inicialização anterior): {summary(pip_list)}")
+
+    renders = [
+        run_timed(FIRST_RENDER.format(script=args.script, timeout=args.timeout)) for _ in range(args.runs)
+    ]
+    print(f"primeiro render ({args.script}):  {summary(renders)}")
+
+
+if __name__ == "__main__":
+    main()
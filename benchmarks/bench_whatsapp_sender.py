@@ -0,0 +1,102 @@
+# Envio de respostas pelo WhatsAppSender contra o mock da Graph API, em rajada e com ritmo constante:
+# vazão, percentis de latência (da fila até o aceite), novas tentativas e a ordem por destinatário,
+# comparado ao envio de uma mensagem por vez com uma conexão nova a cada envio.
+#
+# Uso:
+#   python benchmarks/bench_whatsapp_sender.py --messages 2000 --recipients 400 --mps 80 --rate 50
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_graph import start_server
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.sender import (
+    WhatsAppSender,
+    text_payload,
+)
+
+
+async def naive(url, messages):
+    """Referência: um envio por vez, cada um com um cliente (e uma conexão) novo, sem novas tentativas"""
+    timings = []
+    for to, text in messages:
+        start = time.perf_counter()
+        async with httpx.AsyncClient(headers={"Authorization": "Bearer mock"}) as client:
+            await client.post(f"{url}/v19.0/PHONE_NUMBER_ID/messages", json=text_payload(to, text))
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+async def paced(sender, messages, rate):
+    """Envia `messages` chegando a `rate` por segundo (como respostas da crew ao longo do tempo)"""
+    tasks = []
+    for to, text in messages:
+        tasks.append(asyncio.ensure_future(sender.send(to, text)))
+        await asyncio.sleep(1 / rate)
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def scenario(name, url, state, messages, args, rate=None):
+    state.accepted.clear()
+    sender = WhatsAppSender(
+        phone_number_id="PHONE_NUMBER_ID", access_token="mock", base_url=url,
+        mps=args.mps, pair_burst=args.messages, concurrency=args.concurrency,
+    )
+    throttled, errors = state.throttled, state.errors
+    start = time.perf_counter()
+    results = await (paced(sender, messages, rate) if rate else sender.send_many(messages))
+    elapsed = time.perf_counter() - start
+    await sender.close()
+    stats = sender.stats()
+    in_order = all(
+        bodies == [f"mensagem {n}" for n in range(len(bodies))] for bodies in state.accepted.values()
+    )
+    failures = sum(isinstance(result, Exception) for result in results)
+    print(
+        f"{name}: {stats['sent']} enviadas em {elapsed:.2f} s ({stats['sent'] / elapsed:.0f} msg/s)"
+        f" | falhas {failures} | novas tentativas {stats['retries']} (429 do mock: {state.throttled - throttled},"
+        f" 5xx: {state.errors - errors}) | ordem por destinatário: {'ok' if in_order else 'ERRO'}"
+    )
+    print(f"  latência da fila ao aceite: p50 {stats['p50_ms']} ms | p95 {stats['p95_ms']} ms | p99 {stats['p99_ms']} ms")
+
+
+async def run(args):
+    runner, state, url = await start_server(latency=args.latency, mps=args.mps, error_rate=args.error_rate)
+    messages = [(f"55119{i % args.recipients:08d}", f"mensagem {i // args.recipients}") for i in range(args.messages)]
+
+    await scenario("rajada", url, state, messages, args)
+    await scenario(f"ritmo de {args.rate} msg/s", url, state, messages[:args.rate * 10], args, rate=args.rate)
+
+    sample = messages[:args.naive]
+    start = time.perf_counter()
+    timings = await naive(url, sample)
+    elapsed = time.perf_counter() - start
+    print(
+        f"um por vez, conexão nova: {len(sample)} em {elapsed:.2f} s ({len(sample) / elapsed:.0f} msg/s)"
+        f" | p50 {np.percentile(timings, 50):.1f} ms | p99 {np.percentile(timings, 99):.1f} ms"
+    )
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do envio de mensagens do WhatsApp")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--recipients", type=int, default=400)
+    parser.add_argument("--mps", type=int, default=80, help="vazão do número comercial (e limite do mock)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=int, default=50, help="chegada de mensagens no cenário com ritmo constante")
+    parser.add_argument("--latency", type=float, default=0.05, help="latência média do mock (s)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fração de 5xx do mock")
+    parser.add_argument("--naive", type=int, default=100, help="mensagens da referência sequencial")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
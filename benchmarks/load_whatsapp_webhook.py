@@ -0,0 +1,119 @@
+# Teste de carga do webhook do WhatsApp: reenvia callbacks no formato da Meta
+# (com uma fração de reentregas duplicadas) e confere a fila resultante no Redis
+#
+# Uso:
+#   python benchmarks/load_whatsapp_webhook.py --messages 20000 --concurrency 64
+#   python benchmarks/load_whatsapp_webhook.py --url redis://localhost:6379/0
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.queue import INBOUND_QUEUE
+from src.automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.webhook import create_app
+
+
+def callback_payload(index):
+    """Callback de mensagem de texto no formato do WhatsApp Cloud API"""
+    phone = f"55119{index % 5000:08d}"
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "WHATSAPP_BUSINESS_ACCOUNT_ID",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "metadata": {"display_phone_number": "5511999999999", "phone_number_id": "PHONE_NUMBER_ID"},
+                    "contacts": [{"profile": {"name": f"Cliente {index % 5000}"}, "wa_id": phone}],
+                    "messages": [{
+                        "from": phone,
+                        "id": f"wamid.{index:012d}",
+                        "timestamp": str(1_700_000_000 + index),
+                        "type": "text",
+                        "text": {"body": f"Qual o status do pedido #{1000 + index}?"},
+                    }],
+                },
+            }],
+        }],
+    }
+
+
+async def replay(url, bodies, concurrency):
+    latencies = []
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+
+    async def sender(session):
+        while not queue.empty():
+            body = queue.get_nowait()
+            start = time.perf_counter()
+            async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as response:
+                await response.read()
+                assert response.status == 200, response.status
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(sender(session) for _ in range(concurrency)))
+    return sorted(latencies)
+
+
+async def run(args):
+    if args.url:
+        import redis.asyncio as aioredis
+        redis_client = aioredis.from_url(args.url)
+    else:
+        import fakeredis
+        redis_client = fakeredis.FakeAsyncRedis()
+    await redis_client.delete(INBOUND_QUEUE)
+
+    runner = web.AppRunner(create_app(redis_client=redis_client, verify_token="bench", app_secret=""))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    # Reentregas: a Meta reenvia o mesmo callback quando não recebe 200 a tempo
+    bodies = [json.dumps(callback_payload(i)).encode() for i in range(args.messages)]
+    duplicates = random.Random(0).choices(bodies, k=int(args.messages * args.duplicates))
+    bodies = bodies + duplicates
+    random.Random(1).shuffle(bodies)
+
+    start = time.perf_counter()
+    latencies = await replay(f"http://127.0.0.1:{port}/webhooks/whatsapp", bodies, args.concurrency)
+    elapsed = time.perf_counter() - start
+    queued = await redis_client.xlen(INBOUND_QUEUE)
+    await runner.cleanup()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"requisições: {len(bodies)} ({len(duplicates)} duplicadas), concorrência {args.concurrency}")
+    print(f"tempo: {elapsed:.2f} s, {len(bodies) / elapsed:.0f} req/s")
+    print(f"latência p50/p95/p99: {percentile(0.5):.1f} / {percentile(0.95):.1f} / {percentile(0.99):.1f} ms")
+    print(f"mensagens na fila: {queued} (esperado {args.messages})")
+    if queued != args.messages:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do webhook do WhatsApp")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="fração de callbacks reenviados")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--url", help="Redis real (padrão: fakeredis em memória)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Servidor local que imita o endpoint de mensagens da WhatsApp Cloud API (Graph API) para
+# benchmarks: latência configurável, limite de vazão do número comercial (429, código 130429)
+# e uma fração de erros 5xx transitórios
+#
+# Uso:
+#   python benchmarks/mock_graph.py --port 8766 --mps 80 --error-rate 0.02
+#   GRAPH_API_URL=http://127.0.0.1:8766 whatsapp_workers
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+
+class MockGraph:
+    """Estado do mock: mensagens aceitas por destinatário e a janela de vazão do último segundo"""
+
+    def __init__(self, latency=0.05, mps=80, error_rate=0.0, seed=24):
+        self.latency = latency
+        self.mps = mps
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.accepted = {}
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def _over_limit(self):
+        now = time.monotonic()
+        if now - self.window_start >= 1:
+            self.window_start, self.window_count = now, 0
+        self.window_count += 1
+        return self.window_count > self.mps
+
+    async def messages(self, request):
+        self.requests += 1
+        payload = await request.json()
+        await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        if self._over_limit():
+            self.throttled += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit hit", "code": 130429}}, status=429, headers={"Retry-After": "1"}
+            )
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": {"message": "Service temporarily unavailable", "code": 2}}, status=503)
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return web.json_response({"error": {"message": "Invalid OAuth access token", "code": 190}}, status=401)
+        to = payload["to"]
+        self.accepted.setdefault(to, []).append(payload["text"]["body"])
+        message_id = f"wamid.{to}.{len(self.accepted[to])}"
+        return web.json_response({
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": to, "wa_id": to}],
+            "messages": [{"id": message_id}],
+        })
+
+
+async def start_server(port=0, **options):
+    """Inicia o mock no event loop atual e retorna (runner, estado, URL base)"""
+    state = MockGraph(**options)
+    app = web.Application()
+    app.router.add_post("/{version}/{phone_number_id}/messages", state.messages)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner, state, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock da WhatsApp Cloud API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--mps", type=int, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async def serve():
+        _, _, url = await start_server(args.port, latency=args.latency, mps=args.mps, error_rate=args.error_rate)
+        print(f"Mock da Graph API em {url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# Servidor HTTP local que imita a Admin API do Shopify para benchmarks e testes manuais
+#
+# Uso:
+#   python benchmarks/mock_shopify.py --orders 100000 --port 8765
+#   SHOPIFY_SHOP_URL=http://127.0.0.1:8765 streamlit run app.py
+import argparse
+import base64
+import datetime
+import json
+import threading
+import urllib.parse
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIRST_NAMES = ["João", "Maria", "Pedro", "Ana", "Carlos", "Fernanda", "Lucas", "Juliana"]
+LAST_NAMES = ["Silva", "Oliveira", "Santos", "Costa", "Ferreira", "Lima", "Souza", "Almeida"]
+PRODUCT_TYPES = ["Camiseta", "Calça", "Tênis", "Moletom", "Vestido", "Bolsa", "Jaqueta", "Bermuda", "Sandália", "Boné"]
+PRODUCT_STYLES = ["Básica", "Casual", "Esportiva", "Slim", "Oversized", "Clássica", "Estampada", "Premium"]
+COLORS = ["Preta", "Branca", "Azul", "Cinza", "Verde", "Vermelha", "Bege", "Rosa"]
+
+
+def generate_orders(count, start=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc), step_seconds=300):
+    """Gera pedidos no formato da REST Admin API, ordenados por created_at"""
+    orders = []
+    for i in range(count):
+        created_at = start + datetime.timedelta(seconds=i * step_seconds)
+        orders.append({
+            "id": 5_000_000_000 + i,
+            "order_number": 1001 + i,
+            "name": f"#{1001 + i}",
+            "email": f"cliente{i % 5000}@example.com",
+            "customer": {
+                "id": 7_000_000 + i % 5000,
+                "first_name": FIRST_NAMES[i % len(FIRST_NAMES)],
+                "last_name": LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)],
+                "email": f"cliente{i % 5000}@example.com",
+                "phone": f"+55119{i % 5000:08d}",
+            },
+            "total_price": f"{50 + (i * 37) % 950}.{i % 100:02d}",
+            "created_at": created_at.isoformat(),
+            "updated_at": created_at.isoformat(),
+            "fulfillment_status": "fulfilled" if i % 3 == 0 else None,
+            "fulfillments": [{
+                "tracking_company": "Correios",
+                "tracking_number": f"BR{i:09d}BR",
+                "tracking_url": f"https://rastreamento.correios.com.br/?objeto=BR{i:09d}BR",
+                "shipment_status": "in_transit",
+            }] if i % 3 == 0 else [],
+            "cancelled_at": None,
+        })
+    return orders
+
+
+def generate_products(count):
+    """Gera produtos no formato da REST Admin API com tipo, estilo, cor, tamanhos e estoque"""
+    products = []
+    for i in range(count):
+        product_type = PRODUCT_TYPES[i % len(PRODUCT_TYPES)]
+        style = PRODUCT_STYLES[(i // len(PRODUCT_TYPES)) % len(PRODUCT_STYLES)]
+        color = COLORS[(i // (len(PRODUCT_TYPES) * len(PRODUCT_STYLES))) % len(COLORS)]
+        sizes = ["38", "39", "40", "41", "42"] if product_type in ("Tênis", "Sandália") else ["P", "M", "G", "GG"]
+        title = f"{product_type} {style} {color}" + (f" {i}" if i >= len(PRODUCT_TYPES) * len(PRODUCT_STYLES) * len(COLORS) else "")
+        products.append({
+            "id": 8_000_000_000 + i,
+            "title": title,
+            "handle": f"produto-{i}",
+            "body_html": f"<p>{product_type} {style.lower()} na cor {color.lower()}, confortável para o dia a dia.</p>",
+            "vendor": "Loja Demo",
+            "product_type": product_type,
+            "tags": f"{style.lower()}, {color.lower()}",
+            "status": "active",
+            "options": [{"name": "Tamanho", "values": sizes}],
+            "variants": [
+                {"price": f"{79 + (i * 13) % 400}.90", "inventory_management": "shopify",
+                 "inventory_policy": "deny", "inventory_quantity": (i + j) % 4}
+                for j, _ in enumerate(sizes)
+            ],
+            "updated_at": "2024-01-01T00:00:00+00:00",
+        })
+    return products
+
+
+class MockShopify:
+    """Estado do servidor mock: pedidos em memória e um índice por created_at"""
+
+    def __init__(self, orders, products=None):
+        self.orders = orders
+        self.products = products or []
+        self.orders_by_id = {order["id"]: order for order in orders}
+        self.created = [order["created_at"] for order in orders]
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.bulk_operation = None
+
+    def page(self, query):
+        if "page_info" in query:
+            cursor = json.loads(base64.urlsafe_b64decode(query["page_info"]))
+        else:
+            # Os pedidos gerados nunca são alterados: updated_at == created_at
+            field = "updated_at" if "updated_at_min" in query or "updated_at_max" in query else "created_at"
+            lo = bisect_left(self.created, _iso(query[f"{field}_min"])) if f"{field}_min" in query else 0
+            hi = bisect_right(self.created, _iso(query[f"{field}_max"])) if f"{field}_max" in query else len(self.created)
+            cursor = {"offset": lo, "end": hi}
+        limit = min(int(query.get("limit", 50)), 250)
+        offset, end = cursor["offset"], cursor["end"]
+        if query.get("order") == "created_at asc":
+            end = min(end, offset + limit)
+        orders = self.orders[offset:min(end, offset + limit)]
+        next_cursor = None
+        if offset + limit < end:
+            next_cursor = base64.urlsafe_b64encode(json.dumps({"offset": offset + limit, "end": end}).encode()).decode()
+        return orders, next_cursor
+
+    def search_orders(self, query):
+        """Filtros por name, email e customer_id da REST API (busca linear, só para o mock)"""
+        matches = self.orders
+        if "name" in query:
+            matches = [order for order in matches if order["name"] == query["name"]]
+        if "email" in query:
+            matches = [order for order in matches if order["email"] == query["email"]]
+        if "customer_id" in query:
+            matches = [order for order in matches if str(order["customer"]["id"]) == query["customer_id"]]
+        return matches[-int(query.get("limit", 50)):][::-1]
+
+    def search_customers(self, query):
+        text = query.get("query", "").lower()
+        phone = "".join(char for char in text if char.isdigit()) if text.startswith("phone:") else None
+        terms = text.split()
+        customers = {}
+        for order in self.orders:
+            customer = order["customer"]
+            name = f"{customer['first_name']} {customer['last_name']}".lower()
+            if phone is not None:
+                matched = "".join(char for char in customer["phone"] if char.isdigit()) == phone
+            else:
+                matched = all(term in name for term in terms)
+            if matched:
+                customers[customer["id"]] = customer
+            if len(customers) >= int(query.get("limit", 50)):
+                break
+        return list(customers.values())
+
+    def product_page(self, query):
+        offset = json.loads(base64.urlsafe_b64decode(query["page_info"]))["offset"] if "page_info" in query else 0
+        limit = min(int(query.get("limit", 50)), 250)
+        next_cursor = None
+        if offset + limit < len(self.products):
+            next_cursor = base64.urlsafe_b64encode(json.dumps({"offset": offset + limit}).encode()).decode()
+        return self.products[offset:offset + limit], next_cursor
+
+
+def bulk_order_node(order):
+    """Mesmo pedido no formato de uma linha do JSONL de uma Bulk Operation"""
+    customer = order["customer"]
+    return {
+        "id": f"gid://shopify/Order/{order['id']}",
+        "name": order["name"],
+        "createdAt": order["created_at"],
+        "cancelledAt": order["cancelled_at"],
+        "displayFulfillmentStatus": "FULFILLED" if order["fulfillment_status"] == "fulfilled" else "UNFULFILLED",
+        "totalPriceSet": {"shopMoney": {"amount": order["total_price"]}},
+        "customer": {
+            "id": f"gid://shopify/Customer/{customer['id']}",
+            "firstName": customer["first_name"],
+            "lastName": customer["last_name"],
+            "email": customer["email"],
+            "phone": customer["phone"],
+        },
+    }
+
+
+def _iso(value):
+    return datetime.datetime.fromisoformat(value).astimezone(datetime.timezone.utc).isoformat()
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            with state.lock:
+                state.requests += 1
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.endswith("/graphql.json"):
+                self._send(404, {"errors": "Not Found"})
+                return
+            if "bulkOperationRunQuery" in body.get("query", ""):
+                # A operação fica RUNNING na primeira consulta e COMPLETED a partir da segunda
+                state.bulk_operation = {"id": "gid://shopify/BulkOperation/1", "polls": 0}
+                self._send(200, {"data": {"bulkOperationRunQuery": {
+                    "bulkOperation": {"id": state.bulk_operation["id"], "status": "CREATED"},
+                    "userErrors": [],
+                }}})
+                return
+            operation = state.bulk_operation
+            if operation is None:
+                self._send(200, {"data": {"currentBulkOperation": None}})
+                return
+            operation["polls"] += 1
+            completed = operation["polls"] > 1
+            self._send(200, {"data": {"currentBulkOperation": {
+                "id": operation["id"],
+                "status": "COMPLETED" if completed else "RUNNING",
+                "errorCode": None,
+                "objectCount": str(len(state.orders)),
+                "url": f"http://{self.headers['Host']}/bulk/orders.jsonl" if completed else None,
+            }}})
+
+        def _send_jsonl(self):
+            # Resposta sem Content-Length, gerada linha a linha como um arquivo grande
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            buffer = []
+            for order in state.orders:
+                buffer.append(json.dumps(bulk_order_node(order)))
+                if len(buffer) >= 1000:
+                    self.wfile.write(("\n".join(buffer) + "\n").encode())
+                    buffer = []
+            if buffer:
+                self.wfile.write(("\n".join(buffer) + "\n").encode())
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            with state.lock:
+                state.requests += 1
+            if url.path == "/bulk/orders.jsonl":
+                self._send_jsonl()
+                return
+            headers = {"X-Shopify-Shop-Api-Call-Limit": "1/40"}
+            resource = url.path.rsplit("/", 1)[-1]
+            if url.path.endswith("/customers/search.json"):
+                self._send(200, {"customers": state.search_customers(query)}, headers)
+                return
+            if "/orders/" in url.path and resource.endswith(".json"):
+                order = state.orders_by_id.get(int(resource[:-len(".json")]))
+                self._send(200 if order else 404, {"order": order} if order else {"errors": "Not Found"}, headers)
+                return
+            if resource == "orders.json" and {"name", "email", "customer_id"} & set(query):
+                self._send(200, {"orders": state.search_orders(query)}, headers)
+                return
+            if resource == "products.json":
+                items, next_cursor = state.product_page(query)
+                key = "products"
+            elif resource == "orders.json":
+                items, next_cursor = state.page(query)
+                key = "orders"
+            else:
+                self._send(404, {"errors": "Not Found"})
+                return
+            if next_cursor:
+                next_url = f"http://{self.headers['Host']}{url.path}?limit={query.get('limit', 50)}&page_info={next_cursor}"
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            self._send(200, {key: items}, headers)
+
+    return Handler
+
+
+def start_server(orders, port=0, products=None):
+    """Inicia o servidor em uma thread e retorna (servidor, estado, URL base da loja)"""
+    state = MockShopify(orders, products)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock da Admin API do Shopify")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server, _, url = start_server(generate_orders(args.orders), args.port, generate_products(args.products))
+    print(f"Mock do Shopify em {url} com {args.orders} pedidos e {args.products} produtos")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,131 @@
-# Script para inicializar o ambiente Streamlit e garantir que todas as dependências estejam instaladas
-import sys
-import os
+# Script para verificar o ambiente do Streamlit sem instalar nada em tempo de execução.
+#
+# Na inicialização do app apenas confere, sem subprocessos, se os pacotes do lock podem ser
+# importados e estão nas versões esperadas. As dependências são instaladas no build
+# (requirements.txt); o relatório completo do ambiente é um comando explícito:
+#
+#   python init_streamlit.py check      # verificação rápida (a mesma da inicialização)
+#   python init_streamlit.py lock       # gera streamlit.lock.json a partir do requirements.txt
+#   python init_streamlit.py lock --installed   # fixa as versões instaladas no ambiente atual
+#   python init_streamlit.py diagnose   # relatório completo em streamlit_env_report.json
+import argparse
+import importlib.metadata
 import importlib.util
-import subprocess
 import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCK_PATH = os.path.join(ROOT_DIR, "streamlit.lock.json")
+REQUIREMENTS_PATH = os.path.join(ROOT_DIR, "requirements.txt")
+
+# Pacotes necessários para o dashboard e o módulo importado por cada um
+STARTUP_PACKAGES = {
+    "streamlit": "streamlit",
+    "pandas": "pandas",
+    "numpy": "numpy",
+    "plotly": "plotly",
+    "python-dotenv": "dotenv",
+    "redis": "redis",
+    "pyarrow": "pyarrow",
+    "filelock": "filelock",
+    "httpx": "httpx",
+}
+
 
 def is_module_installed(module_name):
-    """Verifica se um módulo está instalado"""
+    """Verifica se um módulo está instalado (sem importá-lo)"""
     return importlib.util.find_spec(module_name) is not None
 
-def ensure_package(package_name, version=None):
-    """Instala um pacote se não estiver disponível"""
-    package_spec = f"{package_name}=={version}" if version else package_name
-    if not is_module_installed(package_name.split('[')[0]):
-        print(f"Instalando {package_spec}...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_spec, "--no-cache-dir"])
+
+def _version_tuple(version):
+    return tuple(int(part) for part in re.findall(r"\d+", version)[:3])
+
+
+def _satisfies(version, spec):
+    """Compara a versão instalada com "==X", ">=X" ou sem especificação"""
+    if not spec:
         return True
-    return False
+    if spec.startswith("=="):
+        return _version_tuple(version) == _version_tuple(spec[2:])
+    if spec.startswith(">="):
+        return _version_tuple(version) >= _version_tuple(spec[2:].split(",")[0])
+    return True
 
-def initialize_environment():
-    """Inicializa o ambiente para o Streamlit"""
-    # Adicionar o diretório raiz ao path do Python
-    root_dir = os.path.dirname(os.path.abspath(__file__))
-    if root_dir not in sys.path:
-        sys.path.insert(0, root_dir)
-    
-    # Atualizar pip primeiro
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip", "--no-cache-dir"])
-    except Exception as e:
-        print(f"Erro ao atualizar pip: {e}")
-    
-    # Lista de pacotes críticos para o funcionamento do app
-    critical_packages = {
-        "streamlit": "1.30.0",
-        "plotly": "5.18.0",
-        "plotly-express": "0.4.1",
-        "pandas": "2.0.0",
-        "numpy": "1.24.0",
-        "python-dotenv": "1.0.0",
-        "redis": "5.0.0",
-        "tenacity": None,
-        "psutil": None,
-        "retrying": None
-    }
-    
-    # Instalar pacotes críticos
-    for package, version in critical_packages.items():
-        try:
-            ensure_package(package, version)
-        except Exception as e:
-            print(f"Erro ao instalar {package}: {e}")
-    
-    # Verificar se plotly e plotly.express estão disponíveis
+
+def read_requirements(path=REQUIREMENTS_PATH):
+    """Especificação de versão de cada pacote do requirements.txt ("==5.18.0", ">=2.0.0" ou "")"""
+    specs = {}
+    with open(path) as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            match = re.match(r"([A-Za-z0-9_.\-]+)(\[[^\]]*\])?\s*(.*)", line)
+            if match:
+                specs[match.group(1).lower()] = match.group(3).replace(" ", "")
+    return specs
+
+
+def write_lock(installed=False, path=LOCK_PATH):
+    """Gera o lock dos pacotes da inicialização (versões do requirements.txt ou as instaladas)"""
+    specs = read_requirements()
+    lock = {}
+    for package, module in STARTUP_PACKAGES.items():
+        spec = specs.get(package, "")
+        if installed:
+            try:
+                spec = f"=={importlib.metadata.version(package)}"
+            except importlib.metadata.PackageNotFoundError:
+                pass
+        lock[package] = {"module": module, "spec": spec}
+    with open(path, "w") as f:
+        json.dump(lock, f, indent=2)
+        f.write("\n")
+    return lock
+
+
+def check_environment(path=LOCK_PATH):
+    """Lista os pacotes ausentes ou fora da versão do lock, sem subprocessos"""
     try:
-        import plotly
-        print(f"Plotly versão: {plotly.__version__}")
-        import plotly.express
-        print(f"Plotly Express versão: {plotly.express.__version__}")
-    except ImportError as e:
-        print(f"Erro ao importar plotly: {e}")
-        # Tentar instalar novamente com opções diferentes
+        with open(path) as f:
+            lock = json.load(f)
+    except FileNotFoundError:
+        lock = {package: {"module": module, "spec": ""} for package, module in STARTUP_PACKAGES.items()}
+
+    problems = []
+    for package, entry in lock.items():
+        if not is_module_installed(entry["module"]):
+            problems.append(f"{package} não está instalado")
+            continue
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "plotly==5.18.0", "--no-cache-dir", "--force-reinstall"])
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "plotly-express==0.4.1", "--no-cache-dir", "--force-reinstall"])
-        except Exception as e:
-            print(f"Erro ao reinstalar plotly: {e}")
-    
-    # Gerar relatório de ambiente
+            version = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+        if not _satisfies(version, entry["spec"]):
+            problems.append(f"{package} {version} instalado, esperado {entry['spec']}")
+    return problems
+
+
+def initialize_environment():
+    """Prepara o ambiente para o Streamlit e retorna os problemas encontrados nas dependências"""
+    # Adicionar o diretório raiz ao path do Python
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    return check_environment()
+
+
+def diagnose(path=None):
+    """Relatório completo do ambiente (inclui `pip list`); executado apenas sob demanda"""
     env_info = {
         "python_version": sys.version,
         "python_path": sys.executable,
         "platform": sys.platform,
         "cwd": os.getcwd(),
         "sys_path": sys.path,
+        "lock_problems": check_environment(),
     }
-    
+
     # Verificar pacotes instalados
     try:
         result = subprocess.run(
@@ -84,19 +134,49 @@ def initialize_environment():
             text=True,
             check=True
         )
-        packages = json.loads(result.stdout)
-        env_info["installed_packages"] = packages
+        env_info["installed_packages"] = json.loads(result.stdout)
     except Exception as e:
         env_info["pip_list_error"] = str(e)
-    
-    # Salvar relatório em um arquivo temporário para diagnóstico
+
+    # Verificar se plotly e plotly.express podem ser importados
     try:
-        with open(os.path.join(os.getcwd(), "streamlit_env_report.json"), "w") as f:
-            json.dump(env_info, f, indent=2)
-    except Exception as e:
-        print(f"Erro ao salvar relatório de ambiente: {e}")
-    
-    return True
+        import plotly
+        import plotly.express
+        env_info["plotly_version"] = plotly.__version__
+        env_info["plotly_path"] = plotly.__file__
+    except ImportError as e:
+        env_info["plotly_error"] = str(e)
+
+    path = path or os.path.join(os.getcwd(), "streamlit_env_report.json")
+    with open(path, "w") as f:
+        json.dump(env_info, f, indent=2)
+    return env_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação do ambiente do dashboard")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("check", help="verifica os pacotes contra o lock (padrão)")
+    lock_parser = subparsers.add_parser("lock", help="gera o lock dos pacotes da inicialização")
+    lock_parser.add_argument("--installed", action="store_true", help="fixa as versões instaladas")
+    diagnose_parser = subparsers.add_parser("diagnose", help="gera o relatório completo do ambiente")
+    diagnose_parser.add_argument("--output", help="arquivo do relatório (padrão: streamlit_env_report.json)")
+    args = parser.parse_args()
+
+    if args.command == "lock":
+        lock = write_lock(installed=args.installed)
+        print(f"{LOCK_PATH}: {len(lock)} pacotes")
+    elif args.command == "diagnose":
+        env_info = diagnose(args.output)
+        print(f"Relatório gerado ({len(env_info.get('installed_packages', []))} pacotes instalados)")
+        for problem in env_info["lock_problems"]:
+            print(f"- {problem}")
+    else:
+        problems = check_environment()
+        for problem in problems:
+            print(f"- {problem}")
+        sys.exit(1 if problems else 0)
+
 
 if __name__ == "__main__":
-    initialize_environment()
\ No newline at end of file
+    main()
@@ -1,23 +1,86 @@
+import functools
+import json
+import time
+import uuid
+from typing import Literal, Optional
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import BaseModel, Field
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.connection import get_redis_client
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.log_writer import get_log_writer
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.tools.crm_tool import CRMLogTool
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.tools.shopify_tool import (
+    ShopifyOrderLookupTool,
+    ShopifyProductSearchTool,
+)
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.tools.whatsapp_tool import WhatsAppSendTool, pop_delivery
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.intent import classify_message
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.response_cache import ResponseCache
+
+# Lookup tasks needed for each classified intent; unknown intents run both
+LOOKUP_TASKS = {
+    "order": "shopify_order_lookup_task",
+    "product": "shopify_product_lookup_task",
+}
+LOOKUPS_BY_INTENT = {
+    "order": ("order",),
+    "product": ("product",),
+    "both": ("order", "product"),
+    "other": (),
+}
+
+
+class QueryClassification(BaseModel):
+    """Structured output of interpret_customer_query_task."""
+    intent: Literal["order", "product", "both", "other"] = Field(
+        ..., description="order, product, both (order and product questions) or other"
+    )
+    order_number: Optional[str] = None
+    email: Optional[str] = None
+    name: Optional[str] = None
+    keywords: list[str] = Field(default_factory=list)
+    summary: str = ""
+
+
+def relevant_lookups(classification):
+    """Lookups required by a classification output (both when it can't be parsed)."""
+    intent = getattr(getattr(classification, "pydantic", None), "intent", None)
+    return LOOKUPS_BY_INTENT.get(intent, tuple(LOOKUP_TASKS))
+
+
+def task_agents(tasks):
+    """Distinct agents of the tasks, in task order."""
+    return list({id(task.agent): task.agent for task in tasks}.values())
 
 
 @CrewBase
 class AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew():
     """AutomacaoAssistenteLojaShopifyWhatsappCRMDashboard crew"""
 
+    @functools.cached_property
+    def reply_id(self):
+        """Id of this crew's reply: the send tool files its delivery under it (see interaction_record)"""
+        return uuid.uuid4().hex
+
     @agent
     def WhatsAppMessaging(self) -> Agent:
         return Agent(
             config=self.agents_config['WhatsAppMessaging'],
-            tools=[],
+            tools=[WhatsAppSendTool(delivery_key=self.reply_id)],
         )
 
     @agent
     def ShopifyIntegration(self) -> Agent:
+        return self.lookup_agent()
+
+    def lookup_agent(self) -> Agent:
+        """New ShopifyIntegration agent: the lookups run concurrently, so each gets its own instance"""
         return Agent(
             config=self.agents_config['ShopifyIntegration'],
-            tools=[],
+            tools=[ShopifyOrderLookupTool(), ShopifyProductSearchTool()],
         )
 
     @agent
@@ -31,7 +94,7 @@ class AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew():
     def CRMLogger(self) -> Agent:
         return Agent(
             config=self.agents_config['CRMLogger'],
-            tools=[],
+            tools=[CRMLogTool()],
         )
 
 
@@ -40,20 +103,23 @@ class AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew():
         return Task(
             config=self.tasks_config['interpret_customer_query_task'],
             tools=[],
+            output_pydantic=QueryClassification,
         )
 
     @task
     def shopify_order_lookup_task(self) -> Task:
         return Task(
             config=self.tasks_config['shopify_order_lookup_task'],
-            tools=[],
+            agent=self.lookup_agent(),
+            tools=[ShopifyOrderLookupTool()],
         )
 
     @task
     def shopify_product_lookup_task(self) -> Task:
         return Task(
             config=self.tasks_config['shopify_product_lookup_task'],
-            tools=[],
+            agent=self.lookup_agent(),
+            tools=[ShopifyProductSearchTool()],
         )
 
     @task
@@ -67,7 +133,7 @@ class AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew():
     def send_whatsapp_response_task(self) -> Task:
         return Task(
             config=self.tasks_config['send_whatsapp_response_task'],
-            tools=[],
+            tools=[WhatsAppSendTool(delivery_key=self.reply_id)],
         )
 
     @task
@@ -82,8 +148,98 @@ class AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew():
     def crew(self) -> Crew:
         """Creates the AutomacaoAssistenteLojaShopifyWhatsappCRMDashboard crew"""
         return Crew(
-            agents=self.agents, # Automatically created by the @agent decorator
+            agents=task_agents(self.tasks), # Each lookup task has its own ShopifyIntegration agent
             tasks=self.tasks, # Automatically created by the @task decorator
             process=Process.sequential,
             verbose=True,
         )
+
+    def reply_crew(self, lookups, cached_response=False) -> Crew:
+        """Crew that answers an already classified query running only the given lookups.
+
+        The lookups are async tasks, so they run concurrently and generate_response_task
+        waits for both; skipped lookups are simply left out of its context. With a
+        cached response, the lookups and generate_response_task are skipped as well.
+        log_interaction_task is never part of it: see interaction_record.
+        """
+        full = self.crew()
+        skipped = {LOOKUP_TASKS[lookup] for lookup in LOOKUP_TASKS if lookup not in lookups}
+        skipped.update(('interpret_customer_query_task', 'log_interaction_task'))
+        if cached_response:
+            skipped.update(LOOKUP_TASKS.values())
+            skipped.add('generate_response_task')
+        tasks = [task for task in full.tasks if task.name not in skipped]
+        return Crew(agents=task_agents(tasks), tasks=tasks, process=Process.sequential, verbose=True)
+
+    def kickoff_reply(self, inputs):
+        """Classifies the message, then runs the relevant lookups in parallel and replies.
+
+        Common messages are classified by the deterministic fast path; only ambiguous
+        ones go through interpret_customer_query_task on the LLM. Repeated questions
+        about unchanged Shopify data are answered from the response cache.
+        """
+        classify = self.interpret_customer_query_task()
+        fast = classify_message(inputs.get('customer_message', ''))
+        if fast is not None:
+            # The fast-path result stands in for the task output used as context by the later tasks
+            classify.output = TaskOutput(
+                description=classify.description,
+                agent=classify.agent.role,
+                raw=json.dumps(fast, ensure_ascii=False),
+                pydantic=QueryClassification(**fast),
+            )
+            classification = classify.output
+        else:
+            classification = Crew(
+                agents=[classify.agent], tasks=[classify], process=Process.sequential, verbose=True
+            ).kickoff(inputs=inputs)
+
+        cache = ResponseCache(get_redis_client())
+        fields = classification.pydantic.model_dump() if classification.pydantic else None
+        key = cache.key(fields, inputs.get('customer_message', ''))
+        generate = self.generate_response_task()
+        cached = cache.get(key, inputs.get('customer_name', '')) if key else None
+        if cached is not None:
+            generate.output = TaskOutput(description=generate.description, agent=generate.agent.role, raw=cached)
+            result = self.reply_crew((), cached_response=True).kickoff(inputs=inputs)
+            get_log_writer().log(self.interaction_record(inputs, (), cached_response=True))
+            return result
+
+        # Time spent on the lookups and the response: what a later cache hit saves
+        started = time.perf_counter()
+        generated_at = []
+        generate.callback = lambda output: generated_at.append(time.perf_counter())
+        lookups = relevant_lookups(classification)
+        result = self.reply_crew(lookups).kickoff(inputs=inputs)
+        if key and generate.output is not None and generated_at:
+            cache.set(
+                key, generate.output.raw, inputs.get('customer_name', ''),
+                generate_ms=(generated_at[0] - started) * 1000,
+            )
+        # The reply has been sent: the CRM record is queued and written in the background
+        get_log_writer().log(self.interaction_record(inputs, lookups))
+        return result
+
+    def interaction_record(self, inputs, lookups, cached_response=False):
+        """CRM interaction built directly from the task outputs of a reply run (no LLM call)."""
+        classification = self.interpret_customer_query_task().output
+        response = self.generate_response_task().output
+        phone = ''.join(char for char in inputs.get('customer_phone', '') if char.isdigit())
+        message_id = pop_delivery(self.reply_id)
+        return {
+            'customer': inputs.get('customer_name') or phone,
+            'customer_phone': phone,
+            'type': 'whatsapp',
+            'status': 'Resolvido' if message_id else 'Pendente',
+            'query': inputs.get('customer_message', ''),
+            'classification': (
+                classification.pydantic.model_dump()
+                if classification is not None and classification.pydantic else getattr(classification, 'raw', None)
+            ),
+            'shopify_data': {
+                lookup: getattr(getattr(self, LOOKUP_TASKS[lookup])().output, 'raw', None) for lookup in lookups
+            },
+            'response': response.raw if response is not None else None,
+            'cached_response': cached_response,
+            'message_id': message_id,
+        }
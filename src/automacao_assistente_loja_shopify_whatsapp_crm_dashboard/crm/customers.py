@@ -0,0 +1,217 @@
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+# Índice de identidade dos clientes: cada identificador normalizado ("shopify:123",
+# "email:ana@ex.com", "phone:5511999990000", "name:ana costa") aponta para um id canônico
+CUSTOMER_ALIASES = "customers:aliases"
+CUSTOMER_NEXT_ID = "customers:next_id"
+
+# Agregados por cliente: um hash por campo, com o id canônico como campo (customers:order_count -> {id: n})
+CUSTOMER_FIELD_KEY = "customers:{}"
+ORDER_FIELDS = ("order_count", "total_spent_cents")
+CONVERSATION_FIELDS = ("conversation_count", "message_count")
+CUSTOMER_READY = "customers:ready:{}"
+
+# Identifica pelo nome quem não tem identificador forte; desligado por padrão porque une homônimos
+MATCH_CUSTOMER_NAME = os.getenv("CRM_MATCH_CUSTOMER_NAME", "0") == "1"
+
+CUSTOMER_COLUMNS = [
+    "customer_id", "customer", "order_count", "total_spent", "avg_order_value", "conversation_count", "message_count",
+]
+
+# Resolve um cliente pelos identificadores fortes (na ordem de prioridade) e, se permitido,
+# pelo nome normalizado; cria um id novo se nenhum for conhecido e registra os que faltam.
+# O nome nunca sobrescreve um vínculo existente, para não unir homônimos.
+RESOLVE_LUA = """
+local function resolve(aliases_key, next_key, match_name, name_alias, strong)
+    local id = false
+    for _, alias in ipairs(strong) do
+        id = redis.call('HGET', aliases_key, alias)
+        if id then break end
+    end
+    if (not id) and match_name == '1' and name_alias ~= '' then
+        id = redis.call('HGET', aliases_key, name_alias)
+    end
+    if not id then
+        id = tostring(redis.call('INCR', next_key))
+    end
+    for _, alias in ipairs(strong) do
+        redis.call('HSETNX', aliases_key, alias, id)
+    end
+    if name_alias ~= '' then
+        redis.call('HSETNX', aliases_key, name_alias, id)
+    end
+    return id
+end
+"""
+
+_RESOLVE_SCRIPT = RESOLVE_LUA + """
+local strong = {}
+for i = 3, #ARGV do
+    strong[#strong + 1] = ARGV[i]
+end
+return resolve(KEYS[1], KEYS[2], ARGV[1], ARGV[2], strong)
+"""
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits or None
+
+
+def normalize_email(value):
+    value = str(value or "").strip().lower()
+    return value if "@" in value else None
+
+
+def normalize_name(value):
+    """Nome sem acentos, em minúsculas e com espaços simples ("João  Silva" -> "joao silva")"""
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return " ".join(value.lower().split()) or None
+
+
+def _present(value):
+    return value is not None and not (isinstance(value, float) and pd.isna(value)) and value != ""
+
+
+def customer_aliases(shopify_id=None, email=None, phone=None, name=None):
+    """Identificadores fortes (em ordem de prioridade) e o alias do nome"""
+    strong = []
+    if _present(shopify_id):
+        strong.append(f"shopify:{shopify_id}")
+    if _present(email) and normalize_email(email):
+        strong.append(f"email:{normalize_email(email)}")
+    if _present(phone) and normalize_phone(phone):
+        strong.append(f"phone:{normalize_phone(phone)}")
+    name_alias = f"name:{normalize_name(name)}" if _present(name) and normalize_name(name) else ""
+    return strong, name_alias
+
+
+def resolve_customer(redis_client, strong, name_alias="", match_name=None):
+    """Id canônico do cliente (cria se necessário).
+
+    O nome só é usado para identificar quem não tem e-mail nem id do Shopify, e apenas com
+    CRM_MATCH_CUSTOMER_NAME=1. Aceita um pipeline como `redis_client` (o id fica no resultado do execute).
+    """
+    if match_name is None:
+        match_name = MATCH_CUSTOMER_NAME and not any(alias.startswith(("shopify:", "email:")) for alias in strong)
+    script = redis_client.register_script(_RESOLVE_SCRIPT)
+    return script(keys=[CUSTOMER_ALIASES, CUSTOMER_NEXT_ID], args=["1" if match_name else "0", name_alias, *strong])
+
+
+def _resolve_many(redis_client, identities):
+    """Resolve vários clientes em uma única ida ao Redis"""
+    pipe = redis_client.pipeline(transaction=False)
+    for strong, name_alias in identities:
+        resolve_customer(pipe, strong, name_alias)
+    return [value.decode() if isinstance(value, bytes) else str(value) for value in pipe.execute()]
+
+
+def apply_customer_order_deltas(redis_client, deltas):
+    """Atualiza pedidos e total gasto por cliente a partir das variações de pedidos.
+
+    `deltas` tem as colunas customer, customer_id, email, phone, value e orders.
+    """
+    if deltas.empty:
+        return
+    identity = ["customer", "customer_id", "email", "phone"]
+    deltas = deltas.reindex(columns=[*identity, "value", "orders"]).assign(
+        total_spent_cents=(deltas["value"] * 100).round().astype("int64")
+    )
+    grouped = deltas.groupby(identity, dropna=False)[["orders", "total_spent_cents"]].sum().reset_index()
+    ids = _resolve_many(redis_client, [
+        customer_aliases(row.customer_id, row.email, row.phone, row.customer) for row in grouped.itertuples()
+    ])
+
+    pipe = redis_client.pipeline(transaction=False)
+    for customer_id, row in zip(ids, grouped.itertuples()):
+        if row.orders:
+            pipe.hincrby(CUSTOMER_FIELD_KEY.format("order_count"), customer_id, int(row.orders))
+        if row.total_spent_cents:
+            pipe.hincrby(CUSTOMER_FIELD_KEY.format("total_spent_cents"), customer_id, int(row.total_spent_cents))
+        if _present(row.customer):
+            # O nome do pedido (cadastro na loja) prevalece sobre o nome do perfil do WhatsApp
+            pipe.hset(CUSTOMER_FIELD_KEY.format("name"), customer_id, row.customer)
+    pipe.execute()
+
+
+def rebuild_customer_orders(redis_client, orders):
+    """Recalcula os agregados de pedidos por cliente a partir de todos os pedidos"""
+    redis_client.delete(*[CUSTOMER_FIELD_KEY.format(field) for field in ORDER_FIELDS])
+    apply_customer_order_deltas(redis_client, orders.assign(orders=1))
+    redis_client.set(CUSTOMER_READY.format("orders"), 1)
+
+
+def rebuild_customer_conversations(redis_client, conversations):
+    """Recalcula conversas e mensagens por cliente (colunas customer_phone, customer, message_count)"""
+    redis_client.delete(*[CUSTOMER_FIELD_KEY.format(field) for field in CONVERSATION_FIELDS])
+    if not conversations.empty:
+        grouped = conversations.groupby(["customer_phone", "customer"], dropna=False, observed=True).agg(
+            conversation_count=("message_count", "size"), message_count=("message_count", "sum")
+        ).reset_index()
+        # Sem nome no perfil, a conversa guarda o telefone como nome do cliente
+        ids = _resolve_many(redis_client, [
+            customer_aliases(phone=row.customer_phone, name=row.customer if row.customer != row.customer_phone else None)
+            for row in grouped.itertuples()
+        ])
+        pipe = redis_client.pipeline(transaction=False)
+        for customer_id, row in zip(ids, grouped.itertuples()):
+            pipe.hincrby(CUSTOMER_FIELD_KEY.format("conversation_count"), customer_id, int(row.conversation_count))
+            pipe.hincrby(CUSTOMER_FIELD_KEY.format("message_count"), customer_id, int(row.message_count))
+            pipe.hsetnx(CUSTOMER_FIELD_KEY.format("name"), customer_id, row.customer)
+        pipe.execute()
+    redis_client.set(CUSTOMER_READY.format("conversations"), 1)
+
+
+def customers_ready(redis_client, source):
+    return bool(redis_client.exists(CUSTOMER_READY.format(source)))
+
+
+def _finish(customers):
+    customers = customers.fillna({field: 0 for field in ("order_count", "total_spent", "conversation_count", "message_count")})
+    customers = customers.astype({"order_count": "int64", "conversation_count": "int64", "message_count": "int64"})
+    customers["avg_order_value"] = (customers["total_spent"] / customers["order_count"]).where(customers["order_count"] > 0, 0.0)
+    return customers[CUSTOMER_COLUMNS].reset_index(drop=True)
+
+
+def load_customers(redis_client):
+    """Agregados de todos os clientes com uma leitura por campo"""
+    fields = ["name", *ORDER_FIELDS, *CONVERSATION_FIELDS]
+    pipe = redis_client.pipeline(transaction=False)
+    for field in fields:
+        pipe.hgetall(CUSTOMER_FIELD_KEY.format(field))
+    columns = {
+        field: pd.Series({
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in values.items()
+        }, dtype="object")
+        for field, values in zip(fields, pipe.execute())
+    }
+    customers = pd.DataFrame(columns).reindex(columns=fields)
+    customers.index.name = "customer_id"
+    customers = customers.reset_index()
+    for field in (*ORDER_FIELDS, *CONVERSATION_FIELDS):
+        customers[field] = pd.to_numeric(customers[field]).fillna(0).astype("int64")
+    customers["customer"] = customers["name"].fillna(customers["customer_id"])
+    customers["total_spent"] = customers.pop("total_spent_cents") / 100
+    return _finish(customers)
+
+
+def frame_customers(orders, conversations):
+    """Mesmos agregados calculados de DataFrames tipados, unindo pelo nome (dados de demonstração)"""
+    customer_orders = orders.groupby('customer', observed=True).agg(
+        order_count=('order_id', 'count'), total_spent=('value_cents', 'sum')
+    ) if not orders.empty else pd.DataFrame(columns=['order_count', 'total_spent'])
+    customer_orders['total_spent'] = customer_orders['total_spent'] / 100
+    customer_conversations = conversations.groupby('customer', observed=True).agg(
+        conversation_count=('conversation_id', 'count'), message_count=('message_count', 'sum')
+    ) if not conversations.empty else pd.DataFrame(columns=['conversation_count', 'message_count'])
+    customer_orders.index = customer_orders.index.astype(object)
+    customer_conversations.index = customer_conversations.index.astype(object)
+    customers = customer_orders.join(customer_conversations, how='outer').reset_index(names='customer')
+    customers['customer_id'] = customers['customer']
+    return _finish(customers)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# Redução das séries enviadas aos gráficos: barras são somadas em buckets de tempo escolhidos
+# pelo intervalo visível
+MAX_POINTS = 366
+
+# Buckets em ordem crescente de tamanho, com a duração aproximada de cada um em dias
+FREQUENCIES = (
+    ("D", "dia", 1),
+    ("W-MON", "semana", 7),
+    ("MS", "mês", 31),
+    ("QS", "trimestre", 92),
+    ("YS", "ano", 366),
+)
+
+
+def choose_frequency(start, end, max_points=MAX_POINTS):
+    """Menor bucket com no máximo `max_points` barras entre `start` e `end`; retorna (freq, rótulo)"""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for freq, label, size in FREQUENCIES:
+        if days / size <= max_points:
+            return freq, label
+    return FREQUENCIES[-1][:2]
+
+
+def bucket_series(df, date_column, columns, start=None, end=None, max_points=MAX_POINTS):
+    """Soma `columns` por bucket de tempo no intervalo visível (inclusivo); retorna (série, rótulo do bucket).
+
+    Buckets sem nenhum valor são descartados, como dias sem pedidos na série diária.
+    """
+    if start is not None or end is not None:
+        dates = df[date_column]
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (dates < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+        df = df[mask]
+    if df.empty:
+        return df[[date_column, *columns]], FREQUENCIES[0][1]
+    freq, label = choose_frequency(df[date_column].min(), df[date_column].max(), max_points)
+    series = df.groupby(pd.Grouper(key=date_column, freq=freq))[list(columns)].sum()
+    series = series[(series != 0).any(axis=1)].reset_index()
+    return series, label
+
@@ -0,0 +1,187 @@
+import collections
+import datetime
+import json
+import threading
+import time
+
+import pandas as pd
+
+from .schemas import _to_naive_utc, typed_interactions
+from .store import (
+    DATA_VERSION_KEY,
+    INTERACTION_KEY,
+    changed_since,
+    interactions_ready,
+    query_interaction_ids,
+    reindex_interactions,
+)
+
+# Padrão das chaves de interações gravadas pelo CRMLogger
+INTERACTION_PATTERN = "interaction:*"
+
+# Quantidade padrão de chaves por lote (SCAN COUNT e tamanho do MGET)
+DEFAULT_BATCH_SIZE = 1000
+
+
+def interactions_to_frame(values):
+    """Converte uma lista de valores JSON do Redis em um DataFrame de interações"""
+    data = []
+    for value in values:
+        if not value:
+            # A chave pode ter expirado entre o SCAN e o MGET
+            continue
+        try:
+            data.append(json.loads(value))
+        except json.JSONDecodeError:
+            pass
+
+    df = pd.DataFrame(data)
+    # Converter timestamp para datetime sem fuso (UTC), como na carga completa: os lotes
+    # são filtrados antes de typed_interactions e datas com fuso ("...Z") não seriam comparáveis
+    if 'timestamp' in df.columns:
+        df['timestamp'] = _to_naive_utc(df['timestamp'])
+    return df
+
+
+def iter_crm_chunks(redis_client, pattern=INTERACTION_PATTERN, batch_size=DEFAULT_BATCH_SIZE):
+    """Percorre o keyspace com SCAN e gera DataFrames de interações em lotes.
+
+    Cada lote custa uma ida ao servidor para o SCAN e outra para o MGET,
+    em vez de um KEYS bloqueante seguido de um GET por chave.
+    """
+    keys = []
+    for key in redis_client.scan_iter(match=pattern, count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            chunk = interactions_to_frame(redis_client.mget(keys))
+            keys = []
+            if not chunk.empty:
+                yield chunk
+
+    if keys:
+        chunk = interactions_to_frame(redis_client.mget(keys))
+        if not chunk.empty:
+            yield chunk
+
+
+def iter_indexed_chunks(redis_client, ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Busca as interações de uma lista de ids em lotes de MGET"""
+    for i in range(0, len(ids), batch_size):
+        keys = [INTERACTION_KEY.format(interaction_id) for interaction_id in ids[i:i + batch_size]]
+        chunk = interactions_to_frame(redis_client.mget(keys))
+        if not chunk.empty:
+            yield chunk
+
+
+def _filter_frame(df, start=None, end=None, statuses=None, customer=None):
+    """Aplica em pandas os mesmos filtros dos índices (dados ainda não indexados)"""
+    if df.empty:
+        return df
+    if start is not None and 'timestamp' in df.columns:
+        df = df[df['timestamp'] >= pd.Timestamp(start)]
+    if end is not None and 'timestamp' in df.columns:
+        if not isinstance(end, datetime.datetime):
+            # Data sem horário: incluir o dia inteiro
+            end = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        df = df[df['timestamp'] <= pd.Timestamp(end)]
+    if statuses and 'status' in df.columns:
+        df = df[df['status'].isin(statuses)]
+    if customer and 'customer' in df.columns:
+        df = df[df['customer'] == customer]
+    return df.reset_index(drop=True)
+
+
+def load_interactions(redis_client, start=None, end=None, statuses=None, customer=None,
+                      batch_size=DEFAULT_BATCH_SIZE):
+    """Carrega as interações do CRM, opcionalmente filtradas por data, status e cliente.
+
+    Apenas os ids da janela são lidos, pelos índices. Se os índices ainda não foram
+    completados (dados gravados antes deles), o backfill é feito uma vez antes da leitura.
+    Clientes sem pipeline nem sorted sets (armazenamento temporário do modo de
+    demonstração) são lidos por inteiro com SCAN e filtrados em pandas.
+    """
+    if not hasattr(redis_client, "pipeline"):
+        chunks = [
+            _filter_frame(chunk, start=start, end=end, statuses=statuses, customer=customer)
+            for chunk in iter_crm_chunks(redis_client, batch_size=batch_size)
+        ]
+        chunks = [chunk for chunk in chunks if not chunk.empty]
+    else:
+        if not interactions_ready(redis_client):
+            reindex_interactions(redis_client, batch_size=batch_size)
+        ids = query_interaction_ids(redis_client, start=start, end=end, statuses=statuses, customer=customer)
+        chunks = list(iter_indexed_chunks(redis_client, ids, batch_size=batch_size))
+
+    if not chunks:
+        return pd.DataFrame()
+    return typed_interactions(pd.concat(chunks, ignore_index=True))
+
+
+class IncrementalCRMLoader:
+    """Mantém o último DataFrame carregado por filtro e busca apenas o que mudou desde então.
+
+    O high-water mark é o número de sequência da última escrita vista (ver
+    crm.store.CHANGES_INDEX); cada atualização custa O(interações novas). Como a
+    sequência é reservada junto com o registro no log de alterações, não há
+    sequência menor ainda pendente quando o high-water mark avança.
+    """
+
+    def __init__(self, max_filters=16, batch_size=DEFAULT_BATCH_SIZE, full_refresh_interval=None):
+        self.max_filters = max_filters
+        self.batch_size = batch_size
+        # Recarga completa periódica (segundos) para refletir chaves removidas ou expiradas
+        self.full_refresh_interval = full_refresh_interval
+        # filtro -> (DataFrame, high-water mark, momento da última carga completa)
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, redis_client, start=None, end=None, statuses=None, customer=None, version=None):
+        """Retorna as interações do filtro, atualizando o DataFrame guardado com o delta"""
+        key = (start, end, tuple(sorted(statuses)) if statuses else None, customer)
+        with self._lock:
+            now = time.monotonic()
+            cached = self._frames.get(key)
+            if cached and self.full_refresh_interval and now - cached[2] > self.full_refresh_interval:
+                cached = None
+
+            if cached:
+                self._frames.move_to_end(key)
+                frame, high_water_mark, loaded_at = cached
+                if version is None or version != high_water_mark:
+                    frame, high_water_mark = self._apply_delta(
+                        redis_client, frame, high_water_mark, start, end, statuses, customer
+                    )
+            else:
+                # Ler a versão antes da carga completa: escritas concorrentes entram no próximo delta
+                high_water_mark = int(redis_client.get(DATA_VERSION_KEY.format("crm")) or 0)
+                frame = load_interactions(
+                    redis_client, start=start, end=end, statuses=statuses, customer=customer,
+                    batch_size=self.batch_size,
+                )
+                loaded_at = now
+
+            self._frames[key] = (frame, high_water_mark, loaded_at)
+            if len(self._frames) > self.max_filters:
+                self._frames.popitem(last=False)
+            return frame
+
+    def _apply_delta(self, redis_client, frame, high_water_mark, start, end, statuses, customer):
+        changes = changed_since(redis_client, high_water_mark)
+        if not changes:
+            return frame, high_water_mark
+
+        ids = [interaction_id for interaction_id, _ in changes]
+        chunks = [
+            _filter_frame(chunk, start=start, end=end, statuses=statuses, customer=customer)
+            for chunk in iter_indexed_chunks(redis_client, ids, batch_size=self.batch_size)
+        ]
+        chunks = [chunk for chunk in chunks if not chunk.empty]
+
+        # Interações alteradas substituem a versão anterior (ou saem do filtro)
+        if not frame.empty and 'interaction_id' in frame.columns:
+            frame = frame[~frame['interaction_id'].isin(ids)]
+        if chunks:
+            delta = pd.concat(chunks, ignore_index=True)
+            # A tipagem reordena apenas quando o delta não é só a cauda do histórico
+            frame = typed_interactions(pd.concat([frame, delta], ignore_index=True))
+        return frame, max(sequence for _, sequence in changes)
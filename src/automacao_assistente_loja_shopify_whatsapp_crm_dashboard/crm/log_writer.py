@@ -0,0 +1,127 @@
+import atexit
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+
+import redis
+
+from .connection import get_redis_client
+from .store import save_interactions
+from .stream import CRM_BACKEND, append_interactions
+
+# Registro das interações fora do caminho da resposta: log() só enfileira; uma thread grava
+# em lote (por tamanho ou tempo) com escritas em pipeline no backend do CRM
+LOG_BATCH_SIZE = int(os.getenv("CRM_LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("CRM_LOG_FLUSH_INTERVAL", "0.5"))
+# Interações pendentes em memória; acima disso as novas são descartadas (e contadas)
+LOG_MAX_PENDING = int(os.getenv("CRM_LOG_MAX_PENDING", "100000"))
+# Espera entre novas tentativas quando o Redis está indisponível
+LOG_RETRY_DELAY = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionLogWriter:
+    """Fila em memória de interações gravadas no CRM por uma thread em segundo plano"""
+
+    def __init__(self, redis_client=None, backend=CRM_BACKEND, batch_size=LOG_BATCH_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, max_pending=LOG_MAX_PENDING):
+        self.redis_client = redis_client or get_redis_client()
+        self.write = append_interactions if backend == "stream" else save_interactions
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crm-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, interaction):
+        """Enfileira a interação; retorna False se a fila está cheia e ela foi descartada"""
+        # Horário da interação, não o da gravação em lote
+        interaction.setdefault("timestamp", datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            self.pending.put_nowait(interaction)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _next_batch(self):
+        """Espera a primeira interação e junta as seguintes até o tamanho do lote ou o intervalo"""
+        try:
+            batch = [self.pending.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        while True:
+            try:
+                self.write(self.redis_client, batch)
+                self.written += len(batch)
+                return
+            except redis.RedisError:
+                # Redis indisponível: o lote é mantido e gravado quando ele voltar (a fila segura o resto)
+                if self._stop.wait(LOG_RETRY_DELAY):
+                    return
+
+    def _write_batch(self, batch):
+        try:
+            self._write(batch)
+        except Exception:
+            # Alguma interação do lote não pode ser gravada: grava uma a uma e descarta as inválidas
+            for interaction in batch:
+                try:
+                    self._write([interaction])
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Interação descartada: falha ao gravar no CRM")
+
+    def _run(self):
+        while not self._stop.is_set() or not self.pending.empty():
+            batch = self._next_batch()
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception:
+                # A thread continua rodando: senão flush() nunca retornaria
+                logger.exception("Falha ao gravar %d interações no CRM", len(batch))
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def flush(self):
+        """Bloqueia até todas as interações enfileiradas serem gravadas"""
+        self.pending.join()
+
+    def close(self, timeout=5.0):
+        """Grava o que estiver pendente e encerra a thread"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Gravador compartilhado pelo processo; o pendente é gravado na saída do processo"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = InteractionLogWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,143 @@
+import pandas as pd
+
+# Contadores agregados por hora e por dia (UTC), mantidos na escrita dos pedidos e conversas.
+# Um hash por granularidade e campo, com os buckets (horas/dias desde a época) como campos:
+# rollup:day:orders -> {19700: 42, 19701: 37, ...}; a série inteira sai em um HGETALL
+ROLLUP_PREFIX = "rollup:"
+ROLLUP_KEY = ROLLUP_PREFIX + "{}:{}"
+ROLLUP_TOTAL = ROLLUP_PREFIX + "total"
+# Marca que os contadores de uma fonte já foram recalculados a partir dos dados brutos
+ROLLUP_READY = ROLLUP_PREFIX + "ready:{}"
+
+GRANULARITIES = {"hour": 3600, "day": 86400}
+
+# Campos de cada fonte (a receita é guardada em centavos para somas exatas)
+ORDER_FIELDS = ("orders", "revenue_cents")
+CONVERSATION_FIELDS = ("conversations", "resolved")
+
+
+def _buckets(dates, granularity):
+    """Número do bucket de cada data (Series de datetime sem fuso, tratadas como UTC)"""
+    seconds = dates.astype("datetime64[ns]").astype("int64") // 1_000_000_000
+    return seconds // GRANULARITIES[granularity]
+
+
+def _aggregate(frame, date_column, fields):
+    """Soma dos campos por bucket de cada granularidade e no total"""
+    grouped = {
+        granularity: frame.groupby(_buckets(frame[date_column], granularity))[list(fields)].sum()
+        for granularity in GRANULARITIES
+    }
+    totals = {field: int(frame[field].sum()) for field in fields}
+    return grouped, totals
+
+
+def apply_order_deltas(redis_client, deltas):
+    """Aplica variações de pedidos (colunas date, value, orders) aos contadores.
+
+    Pedidos novos entram com orders=1; pedidos alterados entram com a diferença de valor.
+    """
+    if deltas.empty:
+        return
+    deltas = pd.DataFrame({
+        "date": deltas["date"],
+        "orders": deltas["orders"].astype("int64"),
+        "revenue_cents": (deltas["value"] * 100).round().astype("int64"),
+    })
+    grouped, totals = _aggregate(deltas, "date", ORDER_FIELDS)
+    pipe = redis_client.pipeline(transaction=False)
+    for granularity, sums in grouped.items():
+        for field in ORDER_FIELDS:
+            for bucket, amount in sums[field].items():
+                if amount:
+                    pipe.hincrby(ROLLUP_KEY.format(granularity, field), int(bucket), int(amount))
+    for field, amount in totals.items():
+        pipe.hincrby(ROLLUP_TOTAL, field, amount)
+    pipe.execute()
+
+
+def _rebuild(redis_client, source, fields, frame, date_column):
+    """Substitui os contadores de uma fonte pelos valores calculados de `frame`"""
+    grouped, totals = _aggregate(frame, date_column, fields)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(*[ROLLUP_KEY.format(granularity, field) for granularity in GRANULARITIES for field in fields])
+    for granularity, sums in grouped.items():
+        for field in fields:
+            mapping = {int(bucket): int(amount) for bucket, amount in sums[field].items() if amount}
+            if mapping:
+                pipe.hset(ROLLUP_KEY.format(granularity, field), mapping=mapping)
+    pipe.hset(ROLLUP_TOTAL, mapping=totals)
+    pipe.set(ROLLUP_READY.format(source), 1)
+    pipe.execute()
+
+
+def rebuild_order_rollups(redis_client, orders):
+    """Recalcula os contadores de pedidos a partir de todos os pedidos (colunas date, value)"""
+    frame = pd.DataFrame({
+        "date": orders["date"],
+        "orders": 1,
+        "revenue_cents": (orders["value"] * 100).round().astype("int64"),
+    })
+    _rebuild(redis_client, "orders", ORDER_FIELDS, frame, "date")
+
+
+def rebuild_conversation_rollups(redis_client, conversations):
+    """Recalcula os contadores de conversas a partir de todas as conversas (colunas timestamp, status)"""
+    frame = pd.DataFrame({
+        "timestamp": conversations["timestamp"],
+        "conversations": 1,
+        "resolved": (conversations["status"] == "Resolvido").astype("int64"),
+    })
+    _rebuild(redis_client, "conversations", CONVERSATION_FIELDS, frame, "timestamp")
+
+
+def rollups_ready(redis_client, source):
+    return bool(redis_client.exists(ROLLUP_READY.format(source)))
+
+
+def overview_metrics(redis_client):
+    """Totais da visão geral em uma única leitura: pedidos, receita, conversas e resolvidas"""
+    values = redis_client.hmget(ROLLUP_TOTAL, *ORDER_FIELDS, *CONVERSATION_FIELDS)
+    orders, revenue_cents, conversations, resolved = (int(value or 0) for value in values)
+    return {"orders": orders, "revenue": revenue_cents / 100, "conversations": conversations, "resolved": resolved}
+
+
+def rollup_series(redis_client, granularity="day", start=None, end=None):
+    """Série dos contadores por hora ou dia entre `start` e `end` (datas/datetimes, inclusivos)"""
+    fields = [*ORDER_FIELDS, *CONVERSATION_FIELDS]
+    pipe = redis_client.pipeline(transaction=False)
+    for field in fields:
+        pipe.hgetall(ROLLUP_KEY.format(granularity, field))
+    columns = {
+        field: pd.Series({int(bucket): int(amount) for bucket, amount in values.items()}, dtype="int64")
+        for field, values in zip(fields, pipe.execute())
+    }
+    df = pd.DataFrame(columns).reindex(columns=fields).fillna(0).astype("int64").sort_index()
+
+    size = GRANULARITIES[granularity]
+    if start is not None:
+        df = df[df.index >= int(pd.Timestamp(start).timestamp()) // size]
+    if end is not None:
+        df = df[df.index <= int(pd.Timestamp(end).timestamp()) // size]
+    df.insert(0, "date", pd.to_datetime(df.index.astype("int64") * size, unit="s"))
+    df["value"] = df.pop("revenue_cents") / 100
+    return df.reset_index(drop=True)
+
+
+def frame_metrics(orders, conversations):
+    """Mesmos totais e série diária calculados a partir de DataFrames tipados (dados de demonstração)"""
+    metrics = {
+        "orders": len(orders),
+        "revenue": int(orders["value_cents"].sum()) / 100 if not orders.empty else 0.0,
+        "conversations": len(conversations),
+        "resolved": int((conversations["status"] == "Resolvido").sum()) if not conversations.empty else 0,
+    }
+    daily = pd.DataFrame(columns=["date", "orders", "value"])
+    if not orders.empty:
+        daily = (
+            orders.groupby(orders["date"].dt.normalize())
+            .agg(orders=("order_id", "count"), value_cents=("value_cents", "sum"))
+            .reset_index()
+        )
+        daily["value"] = daily.pop("value_cents") / 100
+    return metrics, daily
@@ -0,0 +1,119 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Esquemas tipados dos DataFrames do dashboard. Textos repetidos (status, cliente) são
+# categóricos, valores monetários são centavos inteiros e cada fonte fica ordenada pela
+# sua coluna de data, de modo que filtros de intervalo são fatias por busca binária.
+ORDER_DTYPES = {
+    "order_id": "string",
+    "customer": "category",
+    "value_cents": "int64",
+    "date": "datetime64[ns]",
+    "status": "category",
+}
+CONVERSATION_DTYPES = {
+    "conversation_id": "string",
+    "customer": "category",
+    "customer_phone": "category",
+    "timestamp": "datetime64[ns]",
+    "last_timestamp": "datetime64[ns]",
+    "message_count": "int32",
+    "status": "category",
+}
+# As interações têm campos livres; apenas os conhecidos são tipados
+INTERACTION_CATEGORIES = ("status", "customer", "channel", "intent")
+
+
+def _to_naive_utc(values):
+    """Datas com ou sem fuso em datetime64 sem fuso (UTC), como nas demais fontes"""
+    return pd.to_datetime(values, utc=True, format="mixed").dt.tz_localize(None).astype("datetime64[ns]")
+
+
+def _sorted_by(df, column):
+    if not df[column].is_monotonic_increasing:
+        df = df.sort_values(column, kind="stable")
+    return df.reset_index(drop=True)
+
+
+def typed_orders(df):
+    """Pedidos no esquema tipado (aceita o formato da API/cache, com `value` em reais)"""
+    if "value_cents" not in df.columns:
+        df = df.reindex(columns=["order_id", "customer", "value", "date", "status"])
+        df = df.assign(value_cents=(pd.to_numeric(df.pop("value")).fillna(0) * 100).round())
+    df = df.assign(date=_to_naive_utc(df["date"]))
+    return _sorted_by(df[list(ORDER_DTYPES)].astype(ORDER_DTYPES), "date")
+
+
+def typed_conversations(df):
+    """Conversas do WhatsApp no esquema tipado"""
+    df = df.reindex(columns=list(CONVERSATION_DTYPES))
+    df = df.assign(
+        timestamp=_to_naive_utc(df["timestamp"]),
+        last_timestamp=_to_naive_utc(df["last_timestamp"].fillna(df["timestamp"])),
+        message_count=pd.to_numeric(df["message_count"]).fillna(0),
+    )
+    return _sorted_by(df.astype(CONVERSATION_DTYPES), "timestamp")
+
+
+def typed_interactions(df):
+    """Interações do CRM com timestamp ordenado e campos textuais conhecidos categóricos"""
+    if df.empty or "timestamp" not in df.columns:
+        return df
+    df = df.assign(timestamp=_to_naive_utc(df["timestamp"]))
+    for column in INTERACTION_CATEGORIES:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    if "interaction_id" in df.columns:
+        df["interaction_id"] = df["interaction_id"].astype("string")
+    return _sorted_by(df, "timestamp")
+
+
+def date_slice(df, column, start=None, end=None):
+    """Linhas com `column` no intervalo, por busca binária na coluna ordenada.
+
+    `end` sem horário (date) inclui o dia inteiro; com horário, é inclusivo.
+    """
+    values = df[column].to_numpy()
+    lo = 0 if start is None else values.searchsorted(np.datetime64(pd.Timestamp(start)), side="left")
+    if end is None:
+        hi = len(values)
+    elif isinstance(end, datetime.datetime):
+        hi = values.searchsorted(np.datetime64(pd.Timestamp(end)), side="right")
+    else:
+        hi = values.searchsorted(np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)), side="left")
+    return df.iloc[lo:hi]
+
+
+def category_filter(df, column, values):
+    """Linhas cuja coluna categórica está em `values`, comparando apenas os códigos"""
+    if not values:
+        return df
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.categories.get_indexer(list(values))
+        mask = np.isin(series.cat.codes.to_numpy(), codes[codes >= 0])
+    else:
+        mask = series.isin(list(values)).to_numpy()
+    return df[mask]
+
+
+def page_slice(df, page, page_size, sort_by=None, descending=False):
+    """Uma página das linhas ordenadas por `sort_by`, sem ordenar nem copiar o DataFrame inteiro.
+
+    Colunas já ordenadas (as datas de cada fonte) são fatiadas diretamente; as demais são
+    ordenadas por argsort (códigos, no caso das categóricas) e só as posições da página são lidas.
+    Retorna a página e o total de páginas; `page` começa em 1.
+    """
+    pages = max(1, -(-len(df) // page_size))
+    page = min(max(1, page), pages)
+    lo, hi = (page - 1) * page_size, min(page * page_size, len(df))
+    if sort_by is None or df[sort_by].is_monotonic_increasing:
+        if not descending:
+            return df.iloc[lo:hi], pages
+        positions = np.arange(len(df) - 1 - lo, len(df) - 1 - hi, -1)
+    else:
+        order = df[sort_by].argsort(kind="stable").to_numpy()
+        positions = order[::-1][lo:hi] if descending else order[lo:hi]
+    return df.iloc[positions], pages
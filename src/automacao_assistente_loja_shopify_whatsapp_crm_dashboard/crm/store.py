@@ -0,0 +1,226 @@
+import datetime
+import json
+import uuid
+
+from redis.commands.core import Script
+
+# Chaves das interações e dos índices (sorted sets com score = timestamp em segundos)
+INTERACTION_KEY = "interaction:{}"
+TIME_INDEX = "interactions:by_time"
+CUSTOMER_INDEX = "interactions:by_customer:{}"
+STATUS_INDEX = "interactions:by_status:{}"
+# Marcado ao fim do backfill dos índices: antes dele, interações antigas ainda não estão indexadas
+INDEX_READY = "interactions:index_ready"
+
+# Log de alterações: score = número de sequência da escrita (a versão "crm" no momento da gravação)
+CHANGES_INDEX = "interactions:changes"
+
+# Versão de cada fonte de dados do dashboard; incrementada a cada escrita para invalidar caches
+DATA_VERSION_KEY = "dashboard:version:{}"
+
+# Reserva os números de sequência e registra as interações no log de alterações em um único
+# passo atômico: quando a sequência N está visível, todas as anteriores também estão, e o
+# high-water mark do carregador incremental nunca passa por uma escrita ainda pendente
+_RECORD_CHANGES_SCRIPT = Script(None, b"""
+local first = redis.call('INCRBY', KEYS[1], #ARGV) - #ARGV
+for i, interaction_id in ipairs(ARGV) do
+    redis.call('ZADD', KEYS[2], first + i, interaction_id)
+end
+return first + #ARGV
+""")
+
+
+def to_score(value):
+    """Converte um timestamp (str, date ou datetime) em segundos desde a época (UTC)"""
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    elif not isinstance(value, datetime.datetime):
+        # datetime.date sem horário: considerar o início do dia
+        value = datetime.datetime.combine(value, datetime.time.min)
+    if value.tzinfo is None:
+        # Timestamps sem fuso são gravados e filtrados sempre como UTC
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def end_of_day_score(value):
+    """Score do último instante do dia para filtros de data inclusivos"""
+    if isinstance(value, str):
+        try:
+            # "AAAA-MM-DD" sem horário: o dia inteiro, como um datetime.date
+            value = datetime.date.fromisoformat(value)
+        except ValueError:
+            return to_score(value)
+    if isinstance(value, datetime.datetime):
+        return to_score(value)
+    return to_score(datetime.datetime.combine(value, datetime.time.max))
+
+
+def bump_data_version(redis_client, source):
+    """Marca a fonte como alterada para que os caches do dashboard sejam invalidados"""
+    return redis_client.incr(DATA_VERSION_KEY.format(source))
+
+
+def _record_changes(pipe, interaction_ids):
+    """Acrescenta ao pipeline o registro das interações no log de alterações"""
+    _RECORD_CHANGES_SCRIPT(keys=[DATA_VERSION_KEY.format("crm"), CHANGES_INDEX], args=interaction_ids, client=pipe)
+
+
+def _index_keys(interaction):
+    keys = [TIME_INDEX]
+    if interaction.get("customer"):
+        keys.append(CUSTOMER_INDEX.format(interaction["customer"]))
+    if interaction.get("status"):
+        keys.append(STATUS_INDEX.format(interaction["status"]))
+    return keys
+
+
+def save_interaction(redis_client, interaction):
+    """Grava uma interação e mantém os índices por data, cliente e status.
+
+    Retorna o interaction_id usado na chave.
+    """
+    interaction = dict(interaction)
+    interaction_id = interaction.setdefault("interaction_id", uuid.uuid4().hex)
+    interaction.setdefault("timestamp", datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+    key = INTERACTION_KEY.format(interaction_id)
+    score = to_score(interaction["timestamp"])
+
+    # Se a interação já existia com outro cliente/status, remover dos índices antigos
+    previous = redis_client.get(key)
+    stale_keys = []
+    if previous:
+        try:
+            stale_keys = set(_index_keys(json.loads(previous))) - set(_index_keys(interaction))
+        except json.JSONDecodeError:
+            pass
+
+    pipe = redis_client.pipeline()
+    pipe.set(key, json.dumps(interaction))
+    for index_key in stale_keys:
+        pipe.zrem(index_key, interaction_id)
+    for index_key in _index_keys(interaction):
+        pipe.zadd(index_key, {interaction_id: score})
+    # Número de sequência da escrita (high-water mark da sincronização incremental), reservado
+    # na mesma transação e depois da gravação: a alteração nunca aparece antes do valor
+    _record_changes(pipe, [interaction_id])
+    pipe.execute()
+    return interaction_id
+
+
+def save_interactions(redis_client, interactions):
+    """Grava várias interações com o mesmo resultado de save_interaction, em duas idas ao Redis.
+
+    Retorna os interaction_ids na ordem recebida.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    interactions = [dict(interaction) for interaction in interactions]
+    for interaction in interactions:
+        interaction.setdefault("interaction_id", uuid.uuid4().hex)
+        interaction.setdefault("timestamp", now)
+    if not interactions:
+        return []
+    keys = [INTERACTION_KEY.format(interaction["interaction_id"]) for interaction in interactions]
+
+    # Versões anteriores, se houver
+    previous = redis_client.mget(keys)
+
+    pipe = redis_client.pipeline()
+    for interaction, key, old in zip(interactions, keys, previous):
+        interaction_id = interaction["interaction_id"]
+        stale_keys = []
+        if old:
+            try:
+                stale_keys = set(_index_keys(json.loads(old))) - set(_index_keys(interaction))
+            except json.JSONDecodeError:
+                pass
+        pipe.set(key, json.dumps(interaction))
+        for index_key in stale_keys:
+            pipe.zrem(index_key, interaction_id)
+        score = to_score(interaction["timestamp"])
+        for index_key in _index_keys(interaction):
+            pipe.zadd(index_key, {interaction_id: score})
+    # Um bloco de números de sequência para o lote, como em save_interaction
+    _record_changes(pipe, [interaction["interaction_id"] for interaction in interactions])
+    pipe.execute()
+    return [interaction["interaction_id"] for interaction in interactions]
+
+
+def query_interaction_ids(redis_client, start=None, end=None, statuses=None, customer=None):
+    """Retorna os ids das interações na janela [start, end] usando apenas os índices.
+
+    O custo é proporcional ao número de interações na janela, não ao histórico.
+    """
+    min_score = to_score(start) if start is not None else "-inf"
+    max_score = end_of_day_score(end) if end is not None else "+inf"
+
+    if statuses:
+        pipe = redis_client.pipeline(transaction=False)
+        for status in statuses:
+            pipe.zrangebyscore(STATUS_INDEX.format(status), min_score, max_score, withscores=True)
+        # Unir os status preservando a ordenação por data
+        scored = {member: score for result in pipe.execute() for member, score in result}
+        ids = [member for member, _ in sorted(scored.items(), key=lambda item: item[1])]
+    elif customer:
+        ids = redis_client.zrangebyscore(CUSTOMER_INDEX.format(customer), min_score, max_score)
+    else:
+        ids = redis_client.zrangebyscore(TIME_INDEX, min_score, max_score)
+
+    if statuses and customer:
+        customer_ids = set(redis_client.zrangebyscore(CUSTOMER_INDEX.format(customer), min_score, max_score))
+        ids = [member for member in ids if member in customer_ids]
+
+    return [member.decode() if isinstance(member, bytes) else member for member in ids]
+
+
+def changed_since(redis_client, high_water_mark):
+    """Retorna [(interaction_id, sequência)] das interações gravadas depois do high-water mark"""
+    changes = redis_client.zrangebyscore(CHANGES_INDEX, f"({high_water_mark}", "+inf", withscores=True)
+    return [
+        (member.decode() if isinstance(member, bytes) else member, int(sequence))
+        for member, sequence in changes
+    ]
+
+
+def interactions_ready(redis_client):
+    return bool(redis_client.exists(INDEX_READY))
+
+
+def reindex_interactions(redis_client, batch_size=1000):
+    """Reconstrói os índices a partir das chaves interaction:* já gravadas (backfill).
+
+    Interações gravadas durante o backfill são indexadas por save_interaction; ao
+    terminar, todos os índices estão completos e INDEX_READY é marcado.
+    """
+    indexed = 0
+    keys = []
+
+    def flush(batch):
+        pipe = redis_client.pipeline(transaction=False)
+        count = 0
+        for key, value in zip(batch, redis_client.mget(batch)):
+            if not value:
+                continue
+            try:
+                interaction = json.loads(value)
+                score = to_score(interaction["timestamp"])
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+            key = key.decode() if isinstance(key, bytes) else key
+            interaction_id = key.split(":", 1)[1]
+            for index_key in _index_keys(interaction):
+                pipe.zadd(index_key, {interaction_id: score})
+            count += 1
+        pipe.execute()
+        return count
+
+    for key in redis_client.scan_iter(match=INTERACTION_KEY.format("*"), count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            indexed += flush(keys)
+            keys = []
+    if keys:
+        indexed += flush(keys)
+    redis_client.set(INDEX_READY, 1)
+    bump_data_version(redis_client, "crm")
+    return indexed
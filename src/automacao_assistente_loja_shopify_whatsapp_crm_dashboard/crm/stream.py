@@ -0,0 +1,213 @@
+import collections
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import redis
+
+from .loader import DEFAULT_BATCH_SIZE, _filter_frame, interactions_to_frame
+from .schemas import typed_interactions
+from .store import DATA_VERSION_KEY, end_of_day_score, to_score
+
+# Backend de armazenamento do CRM: "keys" (uma chave interaction:<id> por interação) ou "stream"
+CRM_BACKEND = os.getenv("CRM_BACKEND", "keys")
+
+# Stream com o log ordenado de interações e o limite aproximado de entradas mantidas
+STREAM_KEY = "crm:interactions"
+STREAM_MAXLEN = int(os.getenv("CRM_STREAM_MAXLEN", "1000000"))
+
+# Stream de entradas descartadas por um consumidor depois de falhar em todas as entregas
+DEAD_LETTER_KEY = "{}:dead"
+# Entregas de uma entrada (a primeira e as reivindicações) antes de ir para o dead-letter
+MAX_DELIVERIES = 3
+# Espera antes de tentar de novo quando o Redis está indisponível
+CONSUME_RETRY_DELAY = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def _stream_id(score, last=False):
+    """Converte um score (segundos) no id de stream correspondente (milissegundos-sequência)"""
+    return f"{int(score * 1000)}-{'18446744073709551615' if last else '0'}"
+
+
+def append_interaction(redis_client, interaction, maxlen=STREAM_MAXLEN):
+    """Acrescenta uma interação ao stream (XADD com corte aproximado por MAXLEN).
+
+    Retorna o id da entrada no stream.
+    """
+    interaction = dict(interaction)
+    interaction.setdefault("interaction_id", uuid.uuid4().hex)
+    interaction.setdefault("timestamp", datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+
+    pipe = redis_client.pipeline()
+    pipe.xadd(STREAM_KEY, {"data": json.dumps(interaction)}, maxlen=maxlen, approximate=True)
+    pipe.incr(DATA_VERSION_KEY.format("crm"))
+    entry_id, _ = pipe.execute()
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+def append_interactions(redis_client, interactions, maxlen=STREAM_MAXLEN):
+    """Acrescenta várias interações ao stream em uma única ida ao Redis; retorna os ids das entradas"""
+    if not interactions:
+        return []
+    now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    pipe = redis_client.pipeline()
+    for interaction in interactions:
+        interaction = dict(interaction)
+        interaction.setdefault("interaction_id", uuid.uuid4().hex)
+        interaction.setdefault("timestamp", now)
+        pipe.xadd(STREAM_KEY, {"data": json.dumps(interaction)}, maxlen=maxlen, approximate=True)
+    pipe.incrby(DATA_VERSION_KEY.format("crm"), len(interactions))
+    entry_ids = pipe.execute()[:-1]
+    return [entry_id.decode() if isinstance(entry_id, bytes) else entry_id for entry_id in entry_ids]
+
+
+def _entries_to_frame(entries):
+    return interactions_to_frame([fields.get(b"data") or fields.get("data") for _, fields in entries])
+
+
+def iter_stream_chunks(redis_client, min_id="-", max_id="+", batch_size=DEFAULT_BATCH_SIZE):
+    """Percorre o stream com XRANGE em lotes, gerando (DataFrame, último id lido)"""
+    while True:
+        entries = redis_client.xrange(STREAM_KEY, min=min_id, max=max_id, count=batch_size)
+        if not entries:
+            return
+        last_id = entries[-1][0]
+        last_id = last_id.decode() if isinstance(last_id, bytes) else last_id
+        yield _entries_to_frame(entries), last_id
+        if len(entries) < batch_size:
+            return
+        # Próximo lote começa logo depois do último id lido
+        min_id = f"({last_id}"
+
+
+class StreamCRMLoader:
+    """Equivalente ao IncrementalCRMLoader para o backend de stream.
+
+    O high-water mark é o último id lido do stream; como o stream só recebe
+    acréscimos, cada atualização é um XRANGE a partir desse id.
+    """
+
+    def __init__(self, max_filters=16, batch_size=DEFAULT_BATCH_SIZE):
+        self.max_filters = max_filters
+        self.batch_size = batch_size
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, redis_client, start=None, end=None, statuses=None, customer=None, version=None):
+        """Retorna as interações do filtro, lendo do stream apenas as entradas novas"""
+        key = (start, end, tuple(sorted(statuses)) if statuses else None, customer)
+        max_id = _stream_id(end_of_day_score(end), last=True) if end is not None else "+"
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                frame, last_id = self._frames[key]
+            else:
+                frame, last_id = pd.DataFrame(), None
+            if last_id:
+                min_id = f"({last_id}"
+            else:
+                # Nada lido ainda para o filtro: começar pelo início da janela, não pelo início do stream.
+                # Os ids do stream seguem o horário de gravação, que acompanha o timestamp da interação
+                min_id = _stream_id(to_score(start)) if start is not None else "-"
+
+            chunks = []
+            for chunk, last_id in iter_stream_chunks(redis_client, min_id, max_id, batch_size=self.batch_size):
+                chunk = _filter_frame(chunk, start=start, end=end, statuses=statuses, customer=customer)
+                if not chunk.empty:
+                    chunks.append(chunk)
+            if chunks:
+                frame = typed_interactions(pd.concat([frame] + chunks, ignore_index=True))
+
+            self._frames[key] = (frame, last_id)
+            if len(self._frames) > self.max_filters:
+                self._frames.popitem(last=False)
+            return frame
+
+
+def ensure_consumer_group(redis_client, group, stream_key=STREAM_KEY, start_id="0"):
+    """Cria o grupo de consumidores (e o stream, se necessário) de forma idempotente"""
+    try:
+        redis_client.xgroup_create(stream_key, group, id=start_id, mkstream=True)
+    except redis.exceptions.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _dead_letter(redis_client, stream_key, group, entries, error, max_deliveries=MAX_DELIVERIES):
+    """Move para o dead-letter as entradas que já falharam em `max_deliveries` entregas; retorna seus ids"""
+    dead = []
+    for entry_id, fields in entries:
+        pending = redis_client.xpending_range(stream_key, group, min=entry_id, max=entry_id, count=1)
+        if pending and pending[0]["times_delivered"] < max_deliveries:
+            continue
+        data = (fields or {}).get(b"data") or (fields or {}).get("data") or ""
+        entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        redis_client.xadd(DEAD_LETTER_KEY.format(stream_key), {
+            "data": data, "entry_id": entry_id, "group": group, "error": error,
+        })
+        dead.append(entry_id)
+    return dead
+
+
+def consume_stream(redis_client, stream_key, group, consumer, handler, batch_size=100, block_ms=5000,
+                   min_idle_ms=60000, stop_event=None, max_deliveries=MAX_DELIVERIES):
+    """Consome um stream em um grupo, entregando lotes de entradas (JSON no campo "data") a `handler`.
+
+    Vários workers podem usar o mesmo grupo para dividir a carga.
+    As entradas só recebem XACK depois que `handler` termina sem erro; entradas
+    pendentes de consumidores parados há mais de `min_idle_ms` são reivindicadas.
+    Um erro de `handler` é registrado no log e o lote fica pendente para uma nova
+    entrega; depois de `max_deliveries` entregas, cada entrada do lote vai para o
+    stream "<stream_key>:dead" e é confirmada, para não derrubar os outros workers.
+    """
+    ensure_consumer_group(redis_client, group, stream_key=stream_key)
+    claim_cursor = "0-0"
+    while stop_event is None or not stop_event.is_set():
+        try:
+            # Primeiro reaproveitar entradas abandonadas por outros consumidores do grupo
+            claim_cursor, entries, *_ = redis_client.xautoclaim(
+                stream_key, group, consumer, min_idle_time=min_idle_ms, start_id=claim_cursor, count=batch_size
+            )
+            if not entries:
+                response = redis_client.xreadgroup(group, consumer, {stream_key: ">"}, count=batch_size, block=block_ms)
+                entries = response[0][1] if response else []
+        except redis.exceptions.ConnectionError:
+            logger.warning("Redis indisponível ao consumir %s; nova tentativa em %ss", stream_key, CONSUME_RETRY_DELAY)
+            time.sleep(CONSUME_RETRY_DELAY)
+            continue
+        if not entries:
+            continue
+
+        items = []
+        for _, fields in entries:
+            if not fields:
+                # Entrada já removida do stream pelo corte de MAXLEN
+                continue
+            value = fields.get(b"data") or fields.get("data")
+            try:
+                items.append(json.loads(value))
+            except (TypeError, json.JSONDecodeError):
+                pass
+        try:
+            handler(items)
+        except Exception as e:
+            logger.exception("Falha ao processar %d entradas de %s", len(entries), stream_key)
+            # Sem XACK: a entrada volta por XAUTOCLAIM depois de min_idle_ms, até max_deliveries vezes
+            dead = _dead_letter(redis_client, stream_key, group, entries, f"{type(e).__name__}: {e}", max_deliveries)
+            if dead:
+                logger.error("%d entradas de %s movidas para o dead-letter", len(dead), stream_key)
+                redis_client.xack(stream_key, group, *dead)
+            continue
+        redis_client.xack(stream_key, group, *[entry_id for entry_id, _ in entries])
+
+
+def consume_interactions(redis_client, group, consumer, handler, **options):
+    """Consome o log de interações do CRM em um grupo (agregadores, análises)"""
+    consume_stream(redis_client, STREAM_KEY, group, consumer, handler, **options)
@@ -1,60 +1,64 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import redis
-import json
 import os
-import datetime
 from dotenv import load_dotenv
 
+from ..crm.customers import customers_ready, frame_customers, load_customers, rebuild_customer_conversations
+from ..crm.downsample import bucket_series
+from ..crm.rollups import frame_metrics, overview_metrics, rebuild_conversation_rollups, rollup_series, rollups_ready
+from ..crm.schemas import category_filter, date_slice, typed_conversations, typed_orders
+from ..shopify.cache import filter_orders
+from ..whatsapp.sessions import load_conversations
+from ..lazy import lazy_import
+from .charts import cached_plotly_chart
+from .tables import paginated_table
+from .data import (
+    CACHE_TTL,
+    clear_cache,
+    crm_loader,
+    data_versions,
+    get_redis_client,
+    order_cache,
+    shopify_configured,
+    sync_orders,
+)
+
+# O plotly só é importado nas páginas que exibem gráficos (Configurações não usa)
+px = lazy_import("plotly.express")
+
 # Função para conectar ao Redis
 def connect_to_redis():
     try:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-        redis_password = os.getenv("REDIS_PASSWORD", "")
-        
-        r = redis.from_url(redis_url, password=redis_password)
-        return r
+        # Reutilizar o pool de conexões compartilhado; o ping é refeito apenas a cada poucos segundos
+        return get_redis_client()
     except Exception as e:
         st.error(f"Erro ao conectar ao Redis: {e}")
         return None
 
 # Função para carregar dados do CRM do Redis
-def load_crm_data(redis_client):
+# O último resultado de cada filtro é mantido e apenas as interações novas são buscadas
+def load_crm_data(redis_client, start=None, end=None, statuses=None, version=None):
     if not redis_client:
         return pd.DataFrame()
     
     try:
-        # Buscar todas as chaves de interações no Redis
-        keys = redis_client.keys("interaction:*")
-        
-        data = []
-        for key in keys:
-            interaction = redis_client.get(key)
-            if interaction:
-                try:
-                    interaction_data = json.loads(interaction)
-                    data.append(interaction_data)
-                except json.JSONDecodeError:
-                    pass
-        
-        if data:
-            df = pd.DataFrame(data)
-            # Converter timestamp para datetime
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
-        return pd.DataFrame()
+        # Atualizar o último DataFrame da janela apenas com o delta desde o high-water mark
+        return crm_loader().load(redis_client, start=start, end=end, statuses=statuses, version=version)
     except Exception as e:
         st.error(f"Erro ao carregar dados do CRM: {e}")
         return pd.DataFrame()
 
-# Função para simular dados de pedidos do Shopify (para demonstração)
-def load_shopify_orders():
+# Função para carregar pedidos do Shopify (ou dados simulados para demonstração)
+@st.cache_data(ttl=CACHE_TTL["orders"], show_spinner=False)
+def load_shopify_orders(version=None, start=None, end=None, statuses=None):
     try:
-        # Em um ambiente real, você usaria a API do Shopify para buscar pedidos
-        # Aqui estamos simulando dados para demonstração
+        # Com a loja configurada, sincronizar o cache local de pedidos (incremental)
+        # e ler apenas os meses/row groups do intervalo pedido
+        if shopify_configured():
+            sync_orders()
+            return typed_orders(order_cache().load(start=start, end=end, statuses=statuses))
+        
+        # Sem credenciais, usar dados simulados para demonstração
         data = [
             {"order_id": "1001", "customer": "João Silva", "value": 150.0, "date": "2023-06-01", "status": "Entregue"},
             {"order_id": "1002", "customer": "Maria Oliveira", "value": 89.90, "date": "2023-06-02", "status": "Processando"},
@@ -64,15 +68,35 @@ def load_shopify_orders():
         ]
         df = pd.DataFrame(data)
         df['date'] = pd.to_datetime(df['date'])
-        return df
+        return filter_orders(df, start=start, end=end, statuses=statuses)
     except Exception as e:
         st.error(f"Erro ao carregar dados do Shopify: {e}")
-        return pd.DataFrame()
+        return typed_orders(pd.DataFrame())
 
-# Função para simular dados de conversas do WhatsApp (para demonstração)
-def load_whatsapp_conversations():
+# Função para obter o intervalo de datas e os status dos pedidos (filtros da página de pedidos)
+def load_order_summary(version=None):
     try:
-        # Em um ambiente real, você buscaria esses dados do seu banco de dados
+        if shopify_configured():
+            # Lido das estatísticas do Parquet, sem carregar os pedidos
+            sync_orders()
+            return order_cache().summary()
+        
+        orders = load_shopify_orders(version=version)
+        if orders.empty:
+            return None, None, []
+        return orders['date'].min(), orders['date'].max(), list(orders['status'].unique())
+    except Exception as e:
+        st.error(f"Erro ao carregar dados do Shopify: {e}")
+        return None, None, []
+
+# Função para carregar as conversas do WhatsApp (sessões mantidas no Redis a cada mensagem)
+@st.cache_data(ttl=CACHE_TTL["conversations"], show_spinner=False)
+def load_whatsapp_conversations(_redis_client=None, version=None):
+    try:
+        if _redis_client is not None:
+            return load_conversations(_redis_client)
+
+        # Sem Redis, usar dados de demonstração
         data = [
             {"conversation_id": "w1001", "customer": "João Silva", "timestamp": "2023-06-01 10:15:00", "message_count": 5, "status": "Resolvido"},
             {"conversation_id": "w1002", "customer": "Maria Oliveira", "timestamp": "2023-06-02 14:30:00", "message_count": 3, "status": "Pendente"},
@@ -82,11 +106,56 @@ def load_whatsapp_conversations():
         ]
         df = pd.DataFrame(data)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        df['last_timestamp'] = df['timestamp']
+        return typed_conversations(df)
     except Exception as e:
         st.error(f"Erro ao carregar dados do WhatsApp: {e}")
         return pd.DataFrame()
 
+# Função para carregar os agregados por cliente (índice de clientes no Redis, mantido na escrita;
+# sem Redis ou sem loja, calculados dos dados de demonstração unindo pelo nome)
+@st.cache_data(ttl=CACHE_TTL["conversations"], show_spinner=False)
+def load_customer_metrics(_redis_client=None, versions=None):
+    try:
+        if _redis_client is not None and shopify_configured():
+            # A sincronização mantém pedidos e total gasto por cliente atualizados
+            sync_orders()
+            if not customers_ready(_redis_client, "conversations"):
+                rebuild_customer_conversations(_redis_client, load_conversations(_redis_client))
+            return load_customers(_redis_client)
+        return frame_customers(load_shopify_orders(), load_whatsapp_conversations(_redis_client))
+    except Exception as e:
+        st.error(f"Erro ao carregar dados dos clientes: {e}")
+        return pd.DataFrame()
+
+# Função para carregar os indicadores e a série diária da visão geral
+# (contadores pré-agregados no Redis; sem Redis ou sem loja, calculados dos dados de demonstração)
+@st.cache_data(ttl=CACHE_TTL["conversations"], show_spinner=False)
+def load_overview(_redis_client=None, versions=None):
+    try:
+        use_order_rollups = _redis_client is not None and shopify_configured()
+        orders = pd.DataFrame() if use_order_rollups else load_shopify_orders()
+        conversations = pd.DataFrame() if _redis_client is not None else load_whatsapp_conversations()
+        metrics, daily_sales = frame_metrics(orders, conversations)
+        if _redis_client is None:
+            return metrics, daily_sales
+
+        if use_order_rollups:
+            # A sincronização mantém os contadores de pedidos atualizados
+            sync_orders()
+        if not rollups_ready(_redis_client, "conversations"):
+            rebuild_conversation_rollups(_redis_client, load_conversations(_redis_client))
+        rollups = overview_metrics(_redis_client)
+        metrics.update(conversations=rollups["conversations"], resolved=rollups["resolved"])
+        if use_order_rollups:
+            metrics.update(orders=rollups["orders"], revenue=rollups["revenue"])
+            daily_sales = rollup_series(_redis_client, "day")
+            daily_sales = daily_sales[daily_sales['orders'] != 0][['date', 'orders', 'value']]
+        return metrics, daily_sales
+    except Exception as e:
+        st.error(f"Erro ao carregar os indicadores da visão geral: {e}")
+        return frame_metrics(pd.DataFrame(), pd.DataFrame())
+
 # Função principal
 def main():
     # Carregar variáveis de ambiente
@@ -110,58 +179,87 @@ def main():
         ["Visão Geral", "Vendas", "Clientes", "Conversas", "Configurações"]
     )
     
+    # Invalidação explícita dos dados em cache
+    if st.sidebar.button("Atualizar dados"):
+        clear_cache()
+    
     # Conectar ao Redis
     redis_client = connect_to_redis()
+    versions = data_versions(redis_client)
     
-    # Carregar dados
-    crm_data = load_crm_data(redis_client)
-    shopify_orders = load_shopify_orders()
-    whatsapp_conversations = load_whatsapp_conversations()
+    # Carregar dados (servidos do cache enquanto a versão da fonte não mudar e o TTL não expirar)
+    # (as interações do CRM são carregadas sob demanda na página Conversas, apenas para a janela filtrada)
+    # (a página Vendas lê do cache local apenas o intervalo selecionado; a visão geral e a
+    # página de clientes usam apenas os agregados mantidos na escrita)
+    whatsapp_conversations = (
+        load_whatsapp_conversations(redis_client, version=versions["conversations"])
+        if page == "Conversas" else None
+    )
     
     # Página: Visão Geral
     if page == "Visão Geral":
         st.header("Visão Geral do Sistema")
+        metrics, daily_sales = load_overview(
+            redis_client, versions=(versions["orders"], versions["conversations"])
+        )
         
         # Métricas principais
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total de Pedidos", len(shopify_orders))
+            st.metric("Total de Pedidos", metrics["orders"])
         
         with col2:
-            total_revenue = shopify_orders['value'].sum() if not shopify_orders.empty else 0
-            st.metric("Receita Total", f"R$ {total_revenue:.2f}")
+            st.metric("Receita Total", f"R$ {metrics['revenue']:.2f}")
         
         with col3:
-            st.metric("Conversas WhatsApp", len(whatsapp_conversations))
+            st.metric("Conversas WhatsApp", metrics["conversations"])
         
         with col4:
-            resolved = len(whatsapp_conversations[whatsapp_conversations['status'] == 'Resolvido']) if not whatsapp_conversations.empty else 0
-            total = len(whatsapp_conversations) if not whatsapp_conversations.empty else 0
-            resolution_rate = (resolved / total * 100) if total > 0 else 0
+            total = metrics["conversations"]
+            resolution_rate = (metrics["resolved"] / total * 100) if total > 0 else 0
             st.metric("Taxa de Resolução", f"{resolution_rate:.1f}%")
         
         # Gráficos da visão geral
         st.subheader("Resumo de Vendas")
-        if not shopify_orders.empty:
-            # Gráfico de vendas por dia
-            fig = px.bar(
-                shopify_orders.groupby(shopify_orders['date'].dt.date).sum().reset_index(),
-                x='date',
-                y='value',
-                title="Vendas Diárias",
-                labels={"date": "Data", "value": "Valor (R$)"},
-                color_discrete_sequence=["#0083B8"]
+        if not daily_sales.empty:
+            # Período visível do gráfico; o bucket (dia, semana, mês...) é escolhido a partir dele,
+            # limitando o número de barras enviadas ao navegador
+            first_day, last_day = daily_sales['date'].min().date(), daily_sales['date'].max().date()
+            chart_range = st.date_input(
+                "Período do Gráfico",
+                [first_day, last_day],
+                min_value=first_day,
+                max_value=last_day
+            )
+            chart_start, chart_end = chart_range if len(chart_range) == 2 else (first_day, last_day)
+            
+            def sales_figure():
+                # Vendas a partir dos contadores diários, somadas por bucket
+                sales, bucket = bucket_series(daily_sales, 'date', ['orders', 'value'], chart_start, chart_end)
+                fig = px.bar(
+                    sales,
+                    x='date',
+                    y='value',
+                    title="Vendas Diárias" if bucket == "dia" else f"Vendas por {bucket.capitalize()}",
+                    labels={"date": "Data", "value": "Valor (R$)"},
+                    color_discrete_sequence=["#0083B8"]
+                )
+                return fig
+            
+            cached_plotly_chart(
+                "sales", (versions["orders"], versions["conversations"], chart_start, chart_end), sales_figure
             )
-            st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Não há dados de vendas disponíveis.")
         
         # Status das conversas
         st.subheader("Status das Conversas")
-        if not whatsapp_conversations.empty:
-            status_counts = whatsapp_conversations['status'].value_counts().reset_index()
-            status_counts.columns = ['Status', 'Contagem']
+        if metrics["conversations"]:
+            status_counts = pd.DataFrame({
+                'Status': ['Resolvido', 'Pendente'],
+                'Contagem': [metrics["resolved"], metrics["conversations"] - metrics["resolved"]],
+            })
             
             fig = px.pie(
                 status_counts,
@@ -178,13 +276,14 @@ def main():
     elif page == "Vendas":
         st.header("Análise de Vendas")
         
-        if not shopify_orders.empty:
+        min_date, max_date, status_options = load_order_summary(version=versions["orders"])
+        if min_date is not None:
             # Filtros
             st.subheader("Filtros")
             col1, col2 = st.columns(2)
             with col1:
-                min_date = shopify_orders['date'].min().date()
-                max_date = shopify_orders['date'].max().date()
+                min_date = pd.Timestamp(min_date).date()
+                max_date = pd.Timestamp(max_date).date()
                 date_range = st.date_input(
                     "Intervalo de Datas",
                     [min_date, max_date],
@@ -195,21 +294,15 @@ def main():
             with col2:
                 status_filter = st.multiselect(
                     "Status do Pedido",
-                    options=shopify_orders['status'].unique(),
-                    default=shopify_orders['status'].unique()
+                    options=status_options,
+                    default=status_options
                 )
             
-            # Aplicar filtros
-            filtered_orders = shopify_orders.copy()
-            if len(date_range) == 2:
-                start_date, end_date = date_range
-                filtered_orders = filtered_orders[
-                    (filtered_orders['date'].dt.date >= start_date) &
-                    (filtered_orders['date'].dt.date <= end_date)
-                ]
-            
-            if status_filter:
-                filtered_orders = filtered_orders[filtered_orders['status'].isin(status_filter)]
+            # Aplicar filtros (a leitura já considera apenas o intervalo e os status selecionados)
+            start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+            filtered_orders = load_shopify_orders(
+                version=versions["orders"], start=start_date, end=end_date, statuses=tuple(status_filter)
+            )
             
             # Métricas de vendas
             st.subheader("Métricas de Vendas")
@@ -219,7 +312,7 @@ def main():
                 st.metric("Total de Pedidos", len(filtered_orders))
             
             with col2:
-                total_revenue = filtered_orders['value'].sum()
+                total_revenue = filtered_orders['value_cents'].sum() / 100
                 st.metric("Receita Total", f"R$ {total_revenue:.2f}")
             
             with col3:
@@ -230,34 +323,50 @@ def main():
             st.subheader("Gráficos de Vendas")
             
             # Vendas por status
-            status_data = filtered_orders.groupby('status').agg(
-                {'order_id': 'count', 'value': 'sum'}
-            ).reset_index()
-            status_data.columns = ['Status', 'Quantidade', 'Valor Total']
+            def status_figure():
+                status_data = filtered_orders.groupby('status', observed=True).agg(
+                    {'order_id': 'count', 'value_cents': 'sum'}
+                ).reset_index()
+                status_data['value_cents'] = status_data['value_cents'] / 100
+                status_data.columns = ['Status', 'Quantidade', 'Valor Total']
+            
+                fig = px.bar(
+                    status_data,
+                    x='Status',
+                    y='Valor Total',
+                    title="Vendas por Status",
+                    text='Quantidade',
+                    color='Status',
+                    labels={"Status": "Status do Pedido", "Valor Total": "Valor Total (R$)"},
+                    color_discrete_sequence=px.colors.qualitative.Pastel
+                )
+                return fig
             
-            fig = px.bar(
-                status_data,
-                x='Status',
-                y='Valor Total',
-                title="Vendas por Status",
-                text='Quantidade',
-                color='Status',
-                labels={"Status": "Status do Pedido", "Valor Total": "Valor Total (R$)"},
-                color_discrete_sequence=px.colors.qualitative.Pastel
+            cached_plotly_chart(
+                "sales_by_status", (versions["orders"], start_date, end_date, tuple(status_filter)), status_figure
             )
-            st.plotly_chart(fig, use_container_width=True)
             
             # Tabela de pedidos
             st.subheader("Lista de Pedidos")
-            st.dataframe(
-                filtered_orders[['order_id', 'customer', 'value', 'date', 'status']].rename(columns={
+            # Apenas a página selecionada é ordenada, convertida e enviada ao navegador
+            paginated_table(
+                filtered_orders,
+                key="orders",
+                columns={
                     'order_id': 'ID do Pedido',
                     'customer': 'Cliente',
                     'value': 'Valor (R$)',
                     'date': 'Data',
                     'status': 'Status'
-                }),
-                use_container_width=True
+                },
+                sort_options={
+                    "Data": 'date',
+                    "Valor": 'value_cents',
+                    "Cliente": 'customer',
+                    "Status": 'status',
+                    "ID do Pedido": 'order_id'
+                },
+                prepare=lambda rows: rows.assign(value=rows['value_cents'] / 100)
             )
         else:
             st.info("Não há dados de vendas disponíveis.")
@@ -266,42 +375,14 @@ def main():
     elif page == "Clientes":
         st.header("Gestão de Clientes")
         
-        # Combinar dados de pedidos e conversas para análise de clientes
-        if not shopify_orders.empty and not whatsapp_conversations.empty:
-            # Criar um DataFrame combinado por cliente
-            customers = pd.DataFrame({
-                'customer': pd.concat([shopify_orders['customer'], whatsapp_conversations['customer']]).unique()
-            })
-            
-            # Adicionar métricas de pedidos
-            customer_orders = shopify_orders.groupby('customer').agg({
-                'order_id': 'count',
-                'value': 'sum'
-            }).reset_index()
-            customer_orders.columns = ['customer', 'order_count', 'total_spent']
-            
-            # Adicionar métricas de conversas
-            customer_conversations = whatsapp_conversations.groupby('customer').agg({
-                'conversation_id': 'count',
-                'message_count': 'sum'
-            }).reset_index()
-            customer_conversations.columns = ['customer', 'conversation_count', 'message_count']
-            
-            # Mesclar os DataFrames
-            customers = customers.merge(customer_orders, on='customer', how='left')
-            customers = customers.merge(customer_conversations, on='customer', how='left')
-            
-            # Preencher valores NaN com 0
-            customers = customers.fillna(0)
-            
-            # Calcular valor médio de pedido
-            customers['avg_order_value'] = customers['total_spent'] / customers['order_count']
-            customers['avg_order_value'] = customers['avg_order_value'].fillna(0)
-            
+        # Agregados por cliente canônico (pedidos e conversas do mesmo cliente já unidos pelo índice)
+        customers = load_customer_metrics(redis_client, versions=(versions["orders"], versions["conversations"]))
+        if not customers.empty:
             # Exibir tabela de clientes
             st.subheader("Lista de Clientes")
             st.dataframe(
                 customers.rename(columns={
+                    'customer_id': 'ID do Cliente',
                     'customer': 'Cliente',
                     'order_count': 'Pedidos',
                     'total_spent': 'Total Gasto (R$)',
@@ -314,29 +395,37 @@ def main():
             
             # Gráfico de clientes por valor gasto
             st.subheader("Clientes por Valor Gasto")
-            fig = px.bar(
-                customers.sort_values('total_spent', ascending=False).head(10),
-                x='customer',
-                y='total_spent',
-                title="Top 10 Clientes por Valor Gasto",
-                labels={"customer": "Cliente", "total_spent": "Total Gasto (R$)"},
-                color='total_spent',
-                color_continuous_scale=px.colors.sequential.Viridis
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            def top_spent_figure():
+                # Apenas os 10 maiores, sem ordenar todos os clientes
+                fig = px.bar(
+                    customers.nlargest(10, 'total_spent'),
+                    x='customer',
+                    y='total_spent',
+                    title="Top 10 Clientes por Valor Gasto",
+                    labels={"customer": "Cliente", "total_spent": "Total Gasto (R$)"},
+                    color='total_spent',
+                    color_continuous_scale=px.colors.sequential.Viridis
+                )
+                return fig
+            
+            cached_plotly_chart("top_spent", (versions["orders"], versions["conversations"]), top_spent_figure)
             
             # Gráfico de clientes por número de pedidos
             st.subheader("Clientes por Número de Pedidos")
-            fig = px.bar(
-                customers.sort_values('order_count', ascending=False).head(10),
-                x='customer',
-                y='order_count',
-                title="Top 10 Clientes por Número de Pedidos",
-                labels={"customer": "Cliente", "order_count": "Número de Pedidos"},
-                color='order_count',
-                color_continuous_scale=px.colors.sequential.Plasma
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            def top_orders_figure():
+                # Apenas os 10 maiores, sem ordenar todos os clientes
+                fig = px.bar(
+                    customers.nlargest(10, 'order_count'),
+                    x='customer',
+                    y='order_count',
+                    title="Top 10 Clientes por Número de Pedidos",
+                    labels={"customer": "Cliente", "order_count": "Número de Pedidos"},
+                    color='order_count',
+                    color_continuous_scale=px.colors.sequential.Plasma
+                )
+                return fig
+            
+            cached_plotly_chart("top_orders", (versions["orders"], versions["conversations"]), top_orders_figure)
         else:
             st.info("Não há dados suficientes para análise de clientes.")
     
@@ -366,17 +455,13 @@ def main():
                     default=whatsapp_conversations['status'].unique()
                 )
             
-            # Aplicar filtros
-            filtered_conversations = whatsapp_conversations.copy()
+            # Aplicar filtros (fatia por busca binária no timestamp ordenado e comparação dos códigos de status)
+            filtered_conversations = whatsapp_conversations
             if len(date_range) == 2:
                 start_date, end_date = date_range
-                filtered_conversations = filtered_conversations[
-                    (filtered_conversations['timestamp'].dt.date >= start_date) &
-                    (filtered_conversations['timestamp'].dt.date <= end_date)
-                ]
+                filtered_conversations = date_slice(filtered_conversations, 'timestamp', start_date, end_date)
             
-            if status_filter:
-                filtered_conversations = filtered_conversations[filtered_conversations['status'].isin(status_filter)]
+            filtered_conversations = category_filter(filtered_conversations, 'status', status_filter)
             
             # Métricas de conversas
             st.subheader("Métricas de Conversas")
@@ -412,16 +497,40 @@ def main():
             
             # Tabela de conversas
             st.subheader("Lista de Conversas")
-            st.dataframe(
-                filtered_conversations[['conversation_id', 'customer', 'timestamp', 'message_count', 'status']].rename(columns={
+            paginated_table(
+                filtered_conversations,
+                key="conversations",
+                columns={
                     'conversation_id': 'ID da Conversa',
                     'customer': 'Cliente',
                     'timestamp': 'Data e Hora',
+                    'last_timestamp': 'Última Mensagem',
                     'message_count': 'Mensagens',
                     'status': 'Status'
-                }),
-                use_container_width=True
+                },
+                sort_options={
+                    "Data e Hora": 'timestamp',
+                    "Última Mensagem": 'last_timestamp',
+                    "Mensagens": 'message_count',
+                    "Cliente": 'customer',
+                    "Status": 'status'
+                }
             )
+            
+            # Interações do CRM no mesmo intervalo e status
+            st.subheader("Interações do CRM")
+            start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+            crm_data = load_crm_data(
+                redis_client, start=start_date, end=end_date, statuses=status_filter, version=versions["crm"]
+            )
+            if not crm_data.empty:
+                paginated_table(
+                    crm_data,
+                    key="crm",
+                    sort_options={"Data e Hora": 'timestamp'} if 'timestamp' in crm_data.columns else None
+                )
+            else:
+                st.info("Não há interações do CRM no período selecionado.")
         else:
             st.info("Não há dados de conversas disponíveis.")
     
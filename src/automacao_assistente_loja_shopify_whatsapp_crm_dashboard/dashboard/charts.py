@@ -0,0 +1,29 @@
+# Gráficos do dashboard com a figura serializada em cache: repetir a mesma visão não refaz a figura
+import streamlit as st
+
+from ..crm.connection import redis_url_from_env
+from ..lazy import lazy_import
+from .data import CACHE_TTL, shopify_configured
+
+# O plotly só é importado quando uma página exibe um gráfico
+pio = lazy_import("plotly.io")
+
+
+@st.cache_data(ttl=CACHE_TTL["orders"], max_entries=128, show_spinner=False)
+def figure_json(name, source, state, _build):
+    """JSON da figura `name` para a origem dos dados `source` e o estado dos filtros `state`
+    (versões dos dados, intervalo, etc.).
+
+    `_build` não entra na chave do cache: origem e estado devem identificar completamente os dados do gráfico.
+    """
+    return _build().to_json()
+
+
+def cached_plotly_chart(name, state, build):
+    """Exibe a figura de `build()`, reutilizando o JSON já gerado para o mesmo `state`.
+
+    A origem (Redis em uso e loja real ou dados de demonstração) entra na chave, pois
+    as versões dos dados só valem dentro de uma mesma origem.
+    """
+    source = (redis_url_from_env(), shopify_configured())
+    st.plotly_chart(pio.from_json(figure_json(name, source, state, build)), use_container_width=True)
@@ -0,0 +1,103 @@
+# Camada de acesso a dados do dashboard: conexão Redis compartilhada e TTLs dos caches
+import os
+
+import redis
+import streamlit as st
+
+from ..crm.connection import redis_url_from_env
+from ..crm.loader import IncrementalCRMLoader
+from ..crm.stream import CRM_BACKEND, StreamCRMLoader
+from ..shopify.cache import OrderCache
+from ..crm.store import DATA_VERSION_KEY
+
+# Fontes de dados do dashboard e o TTL (segundos) do cache de cada uma
+SOURCES = ("crm", "orders", "conversations")
+CACHE_TTL = {
+    # Para o CRM, intervalo entre recargas completas; entre elas só o delta é buscado
+    "crm": int(os.getenv("DASHBOARD_CRM_TTL", "3600")),
+    "orders": int(os.getenv("DASHBOARD_ORDERS_TTL", "300")),
+    "conversations": int(os.getenv("DASHBOARD_CONVERSATIONS_TTL", "60")),
+    # Intervalo entre sincronizações do cache de pedidos com a API do Shopify; com o
+    # receptor de webhooks ativo, pode ser alto (os webhooks mantêm o cache atualizado)
+    "orders_sync": int(os.getenv("DASHBOARD_ORDERS_SYNC_TTL", "300")),
+}
+
+# Intervalo entre verificações de saúde da conexão (em vez de um ping a cada interação)
+REDIS_HEALTH_TTL = int(os.getenv("DASHBOARD_REDIS_HEALTH_TTL", "30"))
+
+
+@st.cache_resource(show_spinner=False)
+def _connection_pool(redis_url):
+    """Pool de conexões compartilhado por todas as sessões e reruns do Streamlit"""
+    return redis.ConnectionPool.from_url(redis_url, health_check_interval=REDIS_HEALTH_TTL)
+
+
+@st.cache_data(ttl=REDIS_HEALTH_TTL, show_spinner=False)
+def _check_connection(redis_url):
+    # Exceções não são cacheadas: enquanto o Redis estiver fora, a verificação é refeita
+    redis.Redis(connection_pool=_connection_pool(redis_url)).ping()
+    return True
+
+
+def get_redis_client(redis_url=None):
+    """Retorna um cliente sobre o pool compartilhado.
+
+    Levanta redis.exceptions.ConnectionError se o Redis não estiver acessível.
+    """
+    redis_url = redis_url or redis_url_from_env()
+    _check_connection(redis_url)
+    return redis.Redis(connection_pool=_connection_pool(redis_url))
+
+
+@st.cache_resource(show_spinner=False)
+def crm_loader():
+    """Carregador incremental do CRM compartilhado entre sessões (último DataFrame + high-water mark)"""
+    if CRM_BACKEND == "stream":
+        return StreamCRMLoader()
+    return IncrementalCRMLoader(full_refresh_interval=CACHE_TTL["crm"])
+
+
+def shopify_configured():
+    """Indica se há credenciais da loja para buscar pedidos reais"""
+    return bool(os.getenv("SHOPIFY_SHOP_URL") and os.getenv("SHOPIFY_ACCESS_TOKEN"))
+
+
+@st.cache_resource(show_spinner=False)
+def order_cache():
+    """Cache local de pedidos em Parquet, particionado por mês.
+
+    Mantém também os contadores da visão geral no Redis; o cliente conecta sob
+    demanda, e falhas de escrita neles são corrigidas na sincronização seguinte.
+    """
+    return OrderCache(redis_client=redis.Redis(connection_pool=_connection_pool(redis_url_from_env())))
+
+
+@st.cache_data(ttl=CACHE_TTL["orders_sync"], show_spinner=False)
+def sync_orders():
+    """Sincroniza o cache de pedidos com o Shopify no máximo uma vez por TTL.
+
+    Não depende da versão "orders": quando um webhook grava pedidos no cache e
+    incrementa a versão, o dashboard relê o cache sem chamar a API.
+    """
+    return order_cache().refresh()
+
+
+def data_versions(redis_client):
+    """Lê em uma única ida ao Redis a versão atual de cada fonte de dados.
+
+    As versões entram na chave dos caches: quando uma fonte é alterada
+    (ex.: nova interação gravada), o próximo rerun ignora o cache antigo.
+    """
+    if redis_client is None:
+        return dict.fromkeys(SOURCES)
+    try:
+        values = redis_client.mget([DATA_VERSION_KEY.format(source) for source in SOURCES])
+    except redis.exceptions.RedisError:
+        return dict.fromkeys(SOURCES)
+    return {source: int(value or 0) for source, value in zip(SOURCES, values)}
+
+
+def clear_cache():
+    """Descarta todos os DataFrames em cache (invalidação explícita)"""
+    st.cache_data.clear()
+    crm_loader.clear()
@@ -0,0 +1,48 @@
+# Tabelas paginadas do dashboard: apenas a página pedida é ordenada, renomeada e enviada ao navegador
+import streamlit as st
+
+from ..crm.schemas import page_slice
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+def paginated_table(df, key, columns=None, sort_options=None, prepare=None, page_size=50):
+    """Exibe `df` em páginas, com ordenação feita no servidor.
+
+    `columns` mapeia as colunas exibidas para os rótulos da tabela; `sort_options` mapeia
+    o rótulo de cada ordenação para a coluna do DataFrame (a primeira é o padrão);
+    `prepare` recebe a fatia da página antes da renomeação (ex.: centavos para reais).
+    """
+    sort_by = None
+    descending = False
+    col1, col2, col3 = st.columns(3)
+    if sort_options:
+        with col1:
+            sort_by = sort_options[st.selectbox("Ordenar por", list(sort_options), key=f"{key}_sort")]
+        with col2:
+            descending = st.radio(
+                "Ordem", ["Decrescente", "Crescente"], horizontal=True, key=f"{key}_order"
+            ) == "Decrescente"
+    with col3:
+        page_size = st.selectbox(
+            "Linhas por página", PAGE_SIZES, index=PAGE_SIZES.index(page_size), key=f"{key}_page_size"
+        )
+
+    # Com filtros mais restritos o total de páginas diminui; a página atual é ajustada antes do widget
+    pages = max(1, -(-len(df) // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    rows, pages = page_slice(df, st.session_state.get(page_key, 1), page_size, sort_by, descending)
+    if prepare is not None:
+        rows = prepare(rows)
+    if columns is not None:
+        rows = rows[list(columns)].rename(columns=columns)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Página", min_value=1, max_value=pages, step=1, key=page_key)
+    with col2:
+        st.caption(f"Página {page} de {pages} ({len(df)} registros)")
@@ -0,0 +1,28 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """Módulo importado apenas no primeiro acesso a um de seus atributos"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__dict__["_name"])
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "carregado" if self.__dict__["_module"] is not None else "não carregado"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+def lazy_import(name):
+    """Substitui `import name` no topo do arquivo para módulos pesados usados só em algumas páginas/comandos.
+
+    Se o módulo já foi importado, retorna o próprio módulo.
+    """
+    return sys.modules.get(name) or LazyModule(name)
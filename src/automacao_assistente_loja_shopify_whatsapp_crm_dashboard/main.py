@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 import sys
-from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crew import AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew
 
 # This main file is intended to be a way for your to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+def _crew():
+    # crewAI is only imported by the commands that actually build the crew
+    from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crew import AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew
+    return AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew()
+
+
 def run():
     """
     Run the crew.
@@ -15,9 +20,12 @@ def run():
         'SHOPIFY_SHOP_URL': 'sample_value',
         'SHOPIFY_ACCESS_TOKEN': 'sample_value',
         'SHOPIFY_API_KEY': 'sample_value',
-        'SHOPIFY_API_SECRET': 'sample_value'
+        'SHOPIFY_API_SECRET': 'sample_value',
+        'customer_message': 'sample_value',
+        'customer_phone': 'sample_value',
+        'customer_name': 'sample_value'
     }
-    AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew().crew().kickoff(inputs=inputs)
+    _crew().kickoff_reply(inputs=inputs)
 
 
 def train():
@@ -28,10 +36,13 @@ def train():
         'SHOPIFY_SHOP_URL': 'sample_value',
         'SHOPIFY_ACCESS_TOKEN': 'sample_value',
         'SHOPIFY_API_KEY': 'sample_value',
-        'SHOPIFY_API_SECRET': 'sample_value'
+        'SHOPIFY_API_SECRET': 'sample_value',
+        'customer_message': 'sample_value',
+        'customer_phone': 'sample_value',
+        'customer_name': 'sample_value'
     }
     try:
-        AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        _crew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -41,7 +52,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew().crew().replay(task_id=sys.argv[1])
+        _crew().crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -54,10 +65,13 @@ def test():
         'SHOPIFY_SHOP_URL': 'sample_value',
         'SHOPIFY_ACCESS_TOKEN': 'sample_value',
         'SHOPIFY_API_KEY': 'sample_value',
-        'SHOPIFY_API_SECRET': 'sample_value'
+        'SHOPIFY_API_SECRET': 'sample_value',
+        'customer_message': 'sample_value',
+        'customer_phone': 'sample_value',
+        'customer_name': 'sample_value'
     }
     try:
-        AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
+        _crew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
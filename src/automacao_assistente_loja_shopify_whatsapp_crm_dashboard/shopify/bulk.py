@@ -0,0 +1,166 @@
+import json
+import os
+import time
+
+import httpx
+import pandas as pd
+
+from .orders import SHOPIFY_API_VERSION, order_row, orders_to_frame, shop_base_url
+
+# Quantidade de pedidos por bloco colunar gerado a partir do JSONL
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Apenas os campos necessários para o esquema do dashboard; sem conexões aninhadas,
+# cada linha do JSONL corresponde a um pedido
+ORDERS_BULK_QUERY = """
+{
+  orders%s {
+    edges {
+      node {
+        id
+        name
+        createdAt
+        cancelledAt
+        displayFulfillmentStatus
+        totalPriceSet { shopMoney { amount } }
+        customer { id firstName lastName email phone }
+      }
+    }
+  }
+}
+"""
+
+RUN_MUTATION = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+CURRENT_OPERATION_QUERY = """
+{
+  currentBulkOperation { id status errorCode objectCount url }
+}
+"""
+
+
+class BulkOperationError(Exception):
+    """Falha ao criar ou executar uma operação em massa no Shopify"""
+
+
+def orders_search(since=None, until=None, date_field="created_at"):
+    """Filtro da consulta de pedidos para o intervalo inclusivo [since, until] em `date_field`
+    ("created_at" ou "updated_at"), como nas janelas da REST API; vazio sem limites"""
+    terms = []
+    if since is not None:
+        terms.append(f"{date_field}:>={pd.Timestamp(since).isoformat()}")
+    if until is not None:
+        terms.append(f"{date_field}:<={pd.Timestamp(until).isoformat()}")
+    return f'(query: "{" AND ".join(terms)}")' if terms else ""
+
+
+def bulk_order_row(node):
+    """Converte um nó de pedido do GraphQL no esquema do dashboard (via o formato da REST API)"""
+    customer = node.get("customer") or {}
+    return order_row({
+        "order_number": (node.get("name") or "").lstrip("#") or node.get("id"),
+        "customer": {
+            # gid://shopify/Customer/123 -> 123, o mesmo id da REST API
+            "id": (customer.get("id") or "").rsplit("/", 1)[-1] or None,
+            "first_name": customer.get("firstName"),
+            "last_name": customer.get("lastName"),
+            "email": customer.get("email"),
+            "phone": customer.get("phone"),
+        },
+        "total_price": ((node.get("totalPriceSet") or {}).get("shopMoney") or {}).get("amount"),
+        "created_at": node.get("createdAt"),
+        "cancelled_at": node.get("cancelledAt"),
+        "fulfillment_status": "fulfilled" if node.get("displayFulfillmentStatus") == "FULFILLED" else None,
+    })
+
+
+class ShopifyBulkExporter:
+    """Exporta pedidos com uma Bulk Operation do GraphQL Admin API (backfill histórico)"""
+
+    def __init__(self, shop_url=None, access_token=None, api_version=SHOPIFY_API_VERSION,
+                 poll_interval=2.0, timeout=60.0):
+        self.graphql_url = f"{shop_base_url(shop_url, api_version)}/graphql.json"
+        self.access_token = access_token or os.getenv("SHOPIFY_ACCESS_TOKEN", "")
+        self.poll_interval = poll_interval
+        self.client = httpx.Client(
+            headers={"X-Shopify-Access-Token": self.access_token},
+            timeout=timeout,
+        )
+
+    def _graphql(self, query, variables=None):
+        response = self.client.post(self.graphql_url, json={"query": query, "variables": variables or {}})
+        response.raise_for_status()
+        body = response.json()
+        if body.get("errors"):
+            raise BulkOperationError(body["errors"])
+        return body["data"]
+
+    def submit(self, since=None, until=None, date_field="created_at"):
+        """Cria a operação em massa para os pedidos (opcionalmente limitados por data, ver orders_search)"""
+        data = self._graphql(RUN_MUTATION, {"query": ORDERS_BULK_QUERY % orders_search(since, until, date_field)})
+        result = data["bulkOperationRunQuery"]
+        if result["userErrors"]:
+            raise BulkOperationError(result["userErrors"])
+        return result["bulkOperation"]["id"]
+
+    def wait(self, operation_id, timeout=3600):
+        """Consulta a operação até terminar e retorna a URL do JSONL (None se não houver pedidos)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            operation = self._graphql(CURRENT_OPERATION_QUERY)["currentBulkOperation"]
+            if operation and operation["id"] == operation_id:
+                if operation["status"] == "COMPLETED":
+                    return operation["url"]
+                if operation["status"] in ("FAILED", "CANCELED", "EXPIRED"):
+                    raise BulkOperationError(f"Operação {operation_id}: {operation['status']} ({operation['errorCode']})")
+            time.sleep(self.poll_interval)
+        raise BulkOperationError(f"Operação {operation_id} não terminou em {timeout} segundos")
+
+    def iter_chunks(self, url, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Lê o JSONL linha a linha pela rede, gerando DataFrames de até `chunk_size` pedidos.
+
+        O arquivo nunca é carregado inteiro em memória.
+        """
+        if not url:
+            return
+        rows = []
+        # A URL do resultado é pré-assinada: não enviar o token da loja
+        with httpx.stream("GET", url, timeout=None) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                rows.append(bulk_order_row(json.loads(line)))
+                if len(rows) >= chunk_size:
+                    yield orders_to_frame(rows)
+                    rows = []
+        if rows:
+            yield orders_to_frame(rows)
+
+    def export_orders(self, since=None, until=None, date_field="created_at", chunk_size=DEFAULT_CHUNK_SIZE):
+        """Submete, aguarda e transmite a exportação, gerando blocos de pedidos"""
+        url = self.wait(self.submit(since=since, until=until, date_field=date_field))
+        yield from self.iter_chunks(url, chunk_size=chunk_size)
+
+    def close(self):
+        self.client.close()
+
+
+def iter_bulk_orders(since=None, until=None, date_field="created_at", chunk_size=DEFAULT_CHUNK_SIZE,
+                     **exporter_options):
+    """Backfill dos pedidos via Bulk Operation, em blocos de até `chunk_size` pedidos no esquema do dashboard.
+
+    Cada bloco deve ser gravado antes do próximo ser pedido: o backfill nunca fica inteiro em memória.
+    """
+    exporter = ShopifyBulkExporter(**exporter_options)
+    try:
+        yield from exporter.export_orders(since=since, until=until, date_field=date_field, chunk_size=chunk_size)
+    finally:
+        exporter.close()
@@ -0,0 +1,253 @@
+import datetime
+import functools
+import json
+import os
+
+import pandas as pd
+import redis
+from filelock import FileLock
+
+from ..crm.customers import apply_customer_order_deltas, customers_ready, rebuild_customer_orders
+from ..crm.rollups import apply_order_deltas, rebuild_order_rollups, rollups_ready
+from ..crm.schemas import category_filter, date_slice, typed_orders
+from ..crm.store import bump_data_version
+from ..lazy import lazy_import
+from .order_index import index_orders, order_index_ready, rebuild_order_index
+from .orders import CUSTOMER_KEY_COLUMNS, ORDER_COLUMNS, fetch_orders_frame, iter_orders_frames
+
+# O pyarrow (esquema, leitura e escrita do Parquet) só é carregado no primeiro acesso ao cache
+pa = lazy_import("pyarrow")
+ds = lazy_import("pyarrow.dataset")
+pq = lazy_import("pyarrow.parquet")
+
+# Diretório do cache local de pedidos (um arquivo Parquet por mês: month=AAAA-MM/orders.parquet)
+ORDER_CACHE_DIR = os.getenv("SHOPIFY_ORDER_CACHE_DIR", os.path.join(".cache", "orders"))
+
+# Linhas por row group: permite pular blocos fora do intervalo de datas pelas estatísticas
+ROW_GROUP_SIZE = 16_384
+
+# Sobreposição da sincronização incremental para tolerar relógios e escritas concorrentes
+SYNC_OVERLAP = datetime.timedelta(minutes=5)
+
+
+@functools.cache
+def order_schema():
+    """Esquema Arrow dos arquivos do cache"""
+    return pa.schema([
+        ("order_id", pa.string()),
+        ("customer", pa.string()),
+        ("value", pa.float64()),
+        ("date", pa.timestamp("us")),
+        ("status", pa.string()),
+        ("customer_id", pa.string()),
+        ("email", pa.string()),
+        ("phone", pa.string()),
+    ])
+
+
+# Colunas usadas para manter os agregados por cliente
+CUSTOMER_DELTA_COLUMNS = ['customer', *CUSTOMER_KEY_COLUMNS]
+
+
+def _comparable(df):
+    """Colunas do pedido em tipos comparáveis entre o Parquet e os dados vindos da API"""
+    df = df[ORDER_COLUMNS + CUSTOMER_KEY_COLUMNS].astype(object)
+    df['date'] = pd.to_datetime(df['date']).astype('datetime64[us]')
+    df['value'] = df['value'].astype('float64')
+    return df
+
+
+def filter_orders(df, start=None, end=None, statuses=None):
+    """Converte para o esquema tipado e aplica o filtro de datas (inclusivo) e status da página Pedidos"""
+    df = date_slice(typed_orders(df), 'date', start, end)
+    return category_filter(df, 'status', statuses).reset_index(drop=True)
+
+
+class OrderCache:
+    """Cache colunar de pedidos em disco, particionado por mês.
+
+    A primeira sincronização baixa todos os pedidos; as seguintes pedem à API
+    apenas os pedidos com updated_at desde a última sincronização e fazem upsert
+    nas partições afetadas. Com `redis_client`, cada upsert que altera pedidos também
+    atualiza os contadores pré-agregados da visão geral (crm.rollups), os agregados
+    por cliente (crm.customers), o índice de consulta de pedidos (shopify.order_index)
+    e a versão "orders" dos caches do dashboard e das respostas.
+
+    O dashboard e o receptor de webhooks gravam no mesmo diretório: toda escrita é
+    feita sob um lock de arquivo, de modo que cada partição é lida e regravada por
+    um processo de cada vez.
+    """
+
+    def __init__(self, root=ORDER_CACHE_DIR, redis_client=None):
+        self.root = root
+        self.redis_client = redis_client
+        self.state_path = os.path.join(root, "_sync.json")
+        # Presente quando uma atualização dos contadores falhou: recalculá-los na próxima sincronização
+        self.stale_rollups_path = os.path.join(root, "_rollups_stale")
+        # Reentrante: refresh() segura o lock durante os upserts que faz
+        self._lock = FileLock(os.path.join(root, ".lock"))
+
+    def locked(self):
+        """Lock de escrita do cache, compartilhado entre processos"""
+        os.makedirs(self.root, exist_ok=True)
+        return self._lock
+
+    def _partition_path(self, month):
+        return os.path.join(self.root, f"month={month}", "orders.parquet")
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_state(self, state):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def upsert(self, orders):
+        """Grava pedidos novos ou alterados, reescrevendo apenas os meses afetados.
+
+        Pedidos recebidos de novo sem alteração (sobreposição da sincronização, webhooks
+        repetidos) são ignorados. Retorna quantos pedidos foram gravados.
+        """
+        if orders.empty:
+            return 0
+        # Caches e dados gravados antes dos identificadores do cliente não têm essas colunas
+        orders = orders.reindex(columns=ORDER_COLUMNS + CUSTOMER_KEY_COLUMNS).drop_duplicates('order_id', keep='last')
+        deltas = []
+        written = []
+        with self.locked():
+            for month, changed in orders.groupby(orders['date'].dt.strftime("%Y-%m")):
+                path = self._partition_path(month)
+                merged = changed
+                previous = changed.iloc[:0]
+                if os.path.exists(path):
+                    existing = pq.read_table(path).to_pandas().reindex(columns=ORDER_COLUMNS + CUSTOMER_KEY_COLUMNS)
+                    previous = existing[existing['order_id'].isin(changed['order_id'])]
+                    same = _comparable(changed).merge(_comparable(previous), how='left', indicator=True)['_merge']
+                    changed = changed[~same.eq('both').to_numpy()]
+                    if changed.empty:
+                        continue
+                    previous = previous[previous['order_id'].isin(changed['order_id'])]
+                    merged = pd.concat([existing, changed], ignore_index=True)
+                # Variação dos contadores: +1 pedido por linha nova, diferença de valor nas alteradas
+                deltas.append(changed[['date', 'value', *CUSTOMER_DELTA_COLUMNS]].assign(orders=1))
+                deltas.append(previous[['date', *CUSTOMER_DELTA_COLUMNS]].assign(value=-previous['value'], orders=-1))
+                written.append(changed)
+                merged = (
+                    merged.drop_duplicates('order_id', keep='last')
+                    .sort_values('date', kind='stable', ignore_index=True)
+                )
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Arquivo temporário por processo, oculto para a leitura do dataset (prefixo ".")
+                tmp_path = os.path.join(os.path.dirname(path), f".orders.parquet.{os.getpid()}.tmp")
+                table = pa.Table.from_pandas(merged, schema=order_schema(), preserve_index=False)
+                pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+                os.replace(tmp_path, path)
+            if not written:
+                return 0
+            written = pd.concat(written, ignore_index=True)
+            self._update_rollups(pd.concat(deltas, ignore_index=True), written)
+        return len(written)
+
+    def _update_rollups(self, deltas, orders):
+        if self.redis_client is None:
+            return
+        try:
+            apply_order_deltas(self.redis_client, deltas)
+            apply_customer_order_deltas(self.redis_client, deltas)
+            index_orders(self.redis_client, orders)
+        except redis.exceptions.RedisError:
+            open(self.stale_rollups_path, "w").close()
+        try:
+            # Invalida os caches que dependem dos pedidos (dashboard, respostas do WhatsApp)
+            bump_data_version(self.redis_client, "orders")
+        except redis.exceptions.RedisError:
+            pass
+
+    def _ensure_rollups(self):
+        """Recalcula os contadores a partir do cache se nunca foram montados ou ficaram defasados"""
+        if self.redis_client is None:
+            return
+        try:
+            stale = os.path.exists(self.stale_rollups_path)
+            if stale or not rollups_ready(self.redis_client, "orders"):
+                rebuild_order_rollups(self.redis_client, self.load(columns=['date', 'value']))
+            if stale or not customers_ready(self.redis_client, "orders"):
+                rebuild_customer_orders(self.redis_client, self.load(columns=['value', *CUSTOMER_DELTA_COLUMNS]))
+            if stale or not order_index_ready(self.redis_client):
+                rebuild_order_index(self.redis_client, self.load(columns=ORDER_COLUMNS + CUSTOMER_KEY_COLUMNS))
+            if stale:
+                os.remove(self.stale_rollups_path)
+        except redis.exceptions.RedisError:
+            # Redis indisponível: os pedidos continuam no cache e os contadores ficam para a próxima vez
+            pass
+
+    def refresh(self, **fetch_options):
+        """Sincroniza o cache com o Shopify (completo na primeira vez, incremental depois)"""
+        with self.locked():
+            state = self._read_state()
+            started_at = datetime.datetime.now(datetime.timezone.utc)
+            last_sync = state.get("last_updated_at")
+            if last_sync:
+                # Apenas pedidos criados ou alterados desde a última sincronização
+                chunks = [fetch_orders_frame(
+                    since=datetime.datetime.fromisoformat(last_sync) - SYNC_OVERLAP,
+                    mode="rest", date_field="updated_at", **fetch_options
+                )]
+            else:
+                # Carga completa gravada bloco a bloco (o backfill por Bulk Operation é transmitido em blocos)
+                chunks = iter_orders_frames(**fetch_options)
+            count = 0
+            for orders in chunks:
+                self.upsert(orders)
+                count += len(orders)
+            self._write_state({"last_updated_at": started_at.isoformat()})
+            self._ensure_rollups()
+            return count
+
+    def _dataset(self):
+        return ds.dataset(self.root, format="parquet", partitioning="hive", schema=order_schema().append(
+            pa.field("month", pa.string())
+        ), exclude_invalid_files=True)
+
+    def load(self, start=None, end=None, statuses=None, columns=None):
+        """Lê apenas as colunas e os meses/row groups que podem conter o intervalo pedido"""
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=list(columns or ORDER_COLUMNS))
+
+        condition = None
+        if start is not None:
+            start = pd.Timestamp(start)
+            condition = (ds.field("month") >= start.strftime("%Y-%m")) & (ds.field("date") >= start)
+        if end is not None:
+            end = pd.Timestamp(end) + pd.Timedelta(days=1)
+            upper = (ds.field("month") <= (end - pd.Timedelta(microseconds=1)).strftime("%Y-%m")) & (ds.field("date") < end)
+            condition = upper if condition is None else condition & upper
+        if statuses:
+            by_status = ds.field("status").isin(list(statuses))
+            condition = by_status if condition is None else condition & by_status
+
+        table = self._dataset().to_table(columns=list(columns or ORDER_COLUMNS), filter=condition)
+        return table.to_pandas()
+
+    def summary(self):
+        """Datas mínima/máxima e status existentes, lidos só da coluna de status e das estatísticas"""
+        if not os.path.isdir(self.root):
+            return None, None, []
+        min_date = max_date = None
+        for fragment in self._dataset().get_fragments():
+            metadata = fragment.metadata
+            date_index = metadata.schema.to_arrow_schema().get_field_index("date")
+            for i in range(metadata.num_row_groups):
+                stats = metadata.row_group(i).column(date_index).statistics
+                if stats is None or not stats.has_min_max:
+                    continue
+                min_date = stats.min if min_date is None else min(min_date, stats.min)
+                max_date = stats.max if max_date is None else max(max_date, stats.max)
+        statuses = self._dataset().to_table(columns=["status"]).column("status").unique().to_pylist()
+        return min_date, max_date, sorted(status for status in statuses if status)
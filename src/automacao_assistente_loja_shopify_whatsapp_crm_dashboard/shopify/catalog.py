@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import bisect
+import datetime
+import json
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import redis
+
+from ..crm.connection import get_redis_client
+from ..crm.customers import normalize_name
+from ..crm.store import bump_data_version
+from .products import ShopifyProductsClient
+
+# Catálogo de produtos sincronizado localmente e índice invertido em memória: a busca de
+# produtos da crew não faz uma chamada à API do Shopify por mensagem
+CATALOG_DIR = os.getenv("SHOPIFY_CATALOG_DIR", os.path.join(".cache", "products"))
+
+# Sobreposição da sincronização incremental, como no cache de pedidos
+SYNC_OVERLAP = datetime.timedelta(minutes=5)
+
+# Peso de cada campo do produto na pontuação da busca
+FIELD_WEIGHTS = {"title": 3.0, "product_type": 2.0, "tags": 2.0, "options": 2.0, "vendor": 1.0, "description": 1.0}
+
+# Palavras sem valor de busca (já sem acentos), inclusive as da pergunta ("quanto custa", "tem")
+STOPWORDS = frozenset("""
+a ao aos as com da das de do dos e em na nas no nos o os ou para pra pro por que qual quais
+um uma uns umas tem teria voce voces vc vcs me meu minha eu quero queria gostaria saber
+quanto custa custam preco precos valor sai fica esse essa esses essas este esta isso
+ainda tambem mais muito oi ola bom boa dia tarde noite favor obrigado obrigada
+""".split())
+
+# Redução leve de flexões do português: plural, diminutivo e a vogal temática final
+PLURAL_SUFFIXES = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("ns", "m"), ("s", ""))
+DIMINUTIVE_SUFFIXES = ("zinho", "zinha", "inho", "inha")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def stem(token):
+    """Radical do token ("camisetas", "camisetinha" -> "camiset"; "pretos", "preta" -> "pret")"""
+    if len(token) <= 3 or token.isdigit():
+        # Tamanhos (p, m, gg), numerações e siglas ficam como estão
+        return token
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + replacement
+            break
+    for suffix in DIMINUTIVE_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + "o"
+            break
+    if len(token) > 3 and token[-1] in "aeo":
+        token = token[:-1]
+    return token
+
+
+def analyze(text):
+    """Radicais das palavras do texto, sem acentos e sem palavras vazias"""
+    return [stem(token) for token in _TOKEN.findall(normalize_name(text) or "") if token not in STOPWORDS]
+
+
+def _field_text(product, field):
+    value = product.get(field)
+    if field == "options":
+        return " ".join(" ".join(values) for values in (value or {}).values())
+    if isinstance(value, list):
+        return " ".join(value)
+    return value or ""
+
+
+class ProductIndex:
+    """Índice invertido radical -> (posições dos produtos, pesos) sobre os produtos ativos"""
+
+    def __init__(self, products):
+        self.products = [product for product in products if product.get("status", "active") == "active"]
+        self.available = np.array([bool(product.get("available")) for product in self.products], dtype=bool)
+        postings = {}
+        for position, product in enumerate(self.products):
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in set(analyze(_field_text(product, field))):
+                    entry = postings.setdefault(token, {})
+                    entry[position] = entry.get(position, 0.0) + weight
+        total = len(self.products)
+        # Termos raros pesam mais (idf); o peso já multiplicado fica em um array por termo
+        self.postings = {
+            token: (
+                np.fromiter(entry.keys(), dtype=np.int32, count=len(entry)),
+                np.fromiter(entry.values(), dtype=np.float32, count=len(entry)) * math.log(1 + total / len(entry)),
+            )
+            for token, entry in postings.items()
+        }
+        # Vocabulário ordenado para a busca por prefixo
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, token):
+        """O próprio termo, ou os termos que começam com ele (busca incompleta: "camis")"""
+        if token in self.postings:
+            return [token]
+        if len(token) < 4:
+            return []
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\x7f")
+        return self.vocabulary[start:end]
+
+    def search(self, query, limit=5):
+        """Produtos mais relevantes para a busca, os disponíveis primeiro em caso de empate"""
+        terms = [term for token in dict.fromkeys(analyze(query)) for term in self._expand(token)]
+        if not terms or not self.products:
+            return []
+        scores = np.zeros(len(self.products), dtype=np.float32)
+        for term in terms:
+            positions, weights = self.postings[term]
+            scores[positions] += weights
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            # Só os `limit` melhores (com empates no corte) são ordenados
+            threshold = np.partition(scores[candidates], len(candidates) - limit)[len(candidates) - limit]
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((candidates, ~self.available[candidates], -scores[candidates]))[:limit]
+        return [
+            dict(self.products[position], score=round(float(scores[position]), 2))
+            for position in candidates[order]
+        ]
+
+
+class ProductCatalog:
+    """Catálogo de produtos em um arquivo JSON local, com o índice de busca em memória.
+
+    O índice é recarregado quando outro processo (a sincronização) grava o arquivo;
+    com `redis_client`, cada sincronização que altera produtos incrementa a versão
+    "products", invalidando as respostas em cache (whatsapp.response_cache).
+    """
+
+    def __init__(self, root=CATALOG_DIR, redis_client=None):
+        self.root = root
+        self.redis_client = redis_client
+        self.path = os.path.join(root, "catalog.json")
+        # Estado da sincronização separado: sem alterações, o catálogo não é regravado
+        self.state_path = os.path.join(root, "_sync.json")
+        self._lock = threading.Lock()
+        self._index = None
+        self._mtime = None
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"products": {}}
+
+    def _write(self, path, data):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def index(self):
+        """Índice atual, reconstruído só quando o arquivo do catálogo mudou"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._mtime:
+            with self._lock:
+                if self._index is None or mtime != self._mtime:
+                    self._index = ProductIndex(self._read()["products"].values())
+                    self._mtime = mtime
+        return self._index
+
+    def search(self, query, limit=5):
+        return self.index().search(query, limit)
+
+    def upsert(self, products, full=False, last_updated_at=None):
+        """Grava produtos novos ou alterados e retorna quantos mudaram; `full` substitui o catálogo
+        (remove os excluídos).
+
+        Produtos recebidos de novo sem alteração (sobreposição da sincronização) são ignorados:
+        sem mudanças, o catálogo não é regravado nem a versão "products" incrementada.
+        """
+        # Mesma forma do que é lido do arquivo (listas, chaves em texto) para a comparação
+        incoming = {product["product_id"]: product for product in json.loads(json.dumps(products))}
+        current = self._read()["products"] if incoming or full else {}
+        changed = sum(current.get(product_id) != product for product_id, product in incoming.items())
+        if full:
+            changed += sum(product_id not in incoming for product_id in current)
+        if changed:
+            self._write(self.path, {"products": incoming if full else {**current, **incoming}})
+            if self.redis_client is not None:
+                try:
+                    bump_data_version(self.redis_client, "products")
+                except redis.exceptions.RedisError:
+                    pass
+        if last_updated_at:
+            self._write(self.state_path, {"last_updated_at": last_updated_at})
+        return changed
+
+    def refresh(self, full=False, **client_options):
+        """Sincroniza com o Shopify: completo na primeira vez (ou com `full`), incremental depois"""
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        last_sync = self._read_state().get("last_updated_at")
+        full = full or not last_sync
+        since = None if full else datetime.datetime.fromisoformat(last_sync) - SYNC_OVERLAP
+        products = asyncio.run(ShopifyProductsClient(**client_options).fetch_products(updated_since=since))
+        self.upsert(products, full=full, last_updated_at=started_at.isoformat())
+        return len(products)
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Catálogo compartilhado pelas ferramentas da crew no processo"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ProductCatalog()
+    return _catalog
+
+
+def run():
+    """Sincroniza o catálogo local de produtos (uma vez ou a cada --every segundos)"""
+    parser = argparse.ArgumentParser(description="Sincronização do catálogo local de produtos do Shopify")
+    parser.add_argument("--full", action="store_true", help="baixa o catálogo inteiro (remove produtos excluídos)")
+    parser.add_argument("--every", type=float, help="repete a sincronização a cada N segundos")
+    args = parser.parse_args()
+
+    catalog = ProductCatalog(redis_client=get_redis_client())
+    full = args.full
+    while True:
+        count = catalog.refresh(full=full)
+        print(f"{count} produtos sincronizados em {catalog.path}")
+        if not args.every:
+            break
+        full = False
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,143 @@
+import json
+
+import pandas as pd
+
+from ..crm.customers import normalize_email, normalize_name, normalize_phone
+from ..crm.store import to_score
+
+# Índice local de pedidos para a ferramenta de consulta da crew: número, e-mail, telefone e
+# palavras do nome do cliente apontam para os números dos pedidos, sem busca na API do Shopify.
+# Resumo de cada pedido (um único hash: número -> JSON) e um sorted set por chave (score = data)
+ORDER_SUMMARIES = "shopify:orders:summary"
+ORDERS_BY_EMAIL = "shopify:orders:by_email:{}"
+ORDERS_BY_PHONE = "shopify:orders:by_phone:{}"
+ORDERS_BY_NAME = "shopify:orders:by_name:{}"
+ORDER_INDEX_READY = "shopify:orders:index_ready"
+
+# Pedidos gravados por pipeline na indexação
+INDEX_BATCH_SIZE = 10_000
+
+# Partículas ignoradas no nome ("Maria da Silva" -> maria, silva)
+NAME_PARTICLES = frozenset(("da", "de", "do", "das", "dos", "e"))
+
+# Resolve os pedidos pelo número ou por uma ou mais chaves (interseção das palavras do nome) e
+# devolve os resumos dos mais recentes, tudo em uma única ida ao Redis; false sem o índice montado
+_LOOKUP_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return false
+end
+local limit = tonumber(ARGV[1])
+local numbers = {}
+if ARGV[2] ~= '' then
+    numbers = {ARGV[2]}
+elseif #KEYS == 3 then
+    numbers = redis.call('ZREVRANGE', KEYS[3], 0, limit - 1)
+elseif #KEYS > 3 then
+    local matches = redis.call('ZINTER', #KEYS - 2, unpack(KEYS, 3))
+    for i = #matches, math.max(1, #matches - limit + 1), -1 do
+        numbers[#numbers + 1] = matches[i]
+    end
+end
+if #numbers == 0 then
+    return {}
+end
+return redis.call('HMGET', KEYS[1], unpack(numbers))
+"""
+
+
+def name_tokens(name):
+    """Palavras do nome usadas no índice (sem acentos e sem partículas)"""
+    name = normalize_name(name) or ""
+    if "@" in name or name == "cliente nao identificado":
+        # order_row usa o e-mail ou este texto quando o pedido não tem nome do cliente
+        return []
+    return [token for token in name.split() if len(token) > 1 and token not in NAME_PARTICLES]
+
+
+def _order_number(value):
+    return str(value or "").strip().lstrip("#")
+
+
+def _index_keys(email, phone, customer):
+    keys = set()
+    if normalize_email(email):
+        keys.add(ORDERS_BY_EMAIL.format(normalize_email(email)))
+    if normalize_phone(phone):
+        keys.add(ORDERS_BY_PHONE.format(normalize_phone(phone)))
+    keys.update(ORDERS_BY_NAME.format(token) for token in name_tokens(customer))
+    return keys
+
+
+def _summary(row):
+    date = pd.Timestamp(row["date"]) if pd.notna(row["date"]) else None
+    return {
+        "order_number": f"#{_order_number(row['order_id'])}",
+        "customer": row.get("customer"),
+        "email": row.get("email") if pd.notna(row.get("email")) else None,
+        "phone": row.get("phone") if pd.notna(row.get("phone")) else None,
+        "status": row.get("status"),
+        "value": float(row["value"]) if pd.notna(row.get("value")) else None,
+        "date": date.isoformat() if date is not None else None,
+    }
+
+
+def index_orders(redis_client, orders):
+    """Inclui ou atualiza pedidos (esquema do dashboard) no índice.
+
+    Quando o e-mail, telefone ou nome de um pedido muda, as chaves antigas são removidas.
+    """
+    rows = orders.to_dict("records")
+    for start in range(0, len(rows), INDEX_BATCH_SIZE):
+        batch = [row for row in rows[start:start + INDEX_BATCH_SIZE] if _order_number(row.get("order_id"))]
+        if not batch:
+            continue
+        numbers = [_order_number(row["order_id"]) for row in batch]
+        previous = redis_client.hmget(ORDER_SUMMARIES, numbers)
+        # Um comando por chave do lote (e um HSET para todos os resumos), não um por pedido
+        additions, removals, summaries = {}, {}, {}
+        for number, row, old in zip(numbers, batch, previous):
+            summary = _summary(row)
+            keys = _index_keys(summary["email"], summary["phone"], summary["customer"])
+            if old:
+                old = json.loads(old)
+                for key in _index_keys(old.get("email"), old.get("phone"), old.get("customer")) - keys:
+                    removals.setdefault(key, []).append(number)
+            score = to_score(summary["date"]) if summary["date"] else 0
+            for key in keys:
+                additions.setdefault(key, {})[number] = score
+            summaries[number] = json.dumps(summary, ensure_ascii=False)
+        pipe = redis_client.pipeline(transaction=False)
+        for key, members in removals.items():
+            pipe.zrem(key, *members)
+        for key, members in additions.items():
+            pipe.zadd(key, members)
+        pipe.hset(ORDER_SUMMARIES, mapping=summaries)
+        pipe.execute()
+
+
+def rebuild_order_index(redis_client, orders):
+    """Monta o índice a partir de todos os pedidos do cache local"""
+    index_orders(redis_client, orders)
+    redis_client.set(ORDER_INDEX_READY, 1)
+
+
+def order_index_ready(redis_client):
+    return bool(redis_client.exists(ORDER_INDEX_READY))
+
+
+def lookup_orders(redis_client, order_number=None, email=None, phone=None, name=None, limit=5):
+    """Resumos dos pedidos do identificador mais forte informado (número > e-mail > telefone > nome),
+    do mais recente para o mais antigo; None se o índice ainda não foi montado"""
+    if order_number:
+        keys = []
+    elif normalize_email(email):
+        keys = [ORDERS_BY_EMAIL.format(normalize_email(email))]
+    elif normalize_phone(phone):
+        keys = [ORDERS_BY_PHONE.format(normalize_phone(phone))]
+    else:
+        keys = [ORDERS_BY_NAME.format(token) for token in name_tokens(name)]
+    script = redis_client.register_script(_LOOKUP_SCRIPT)
+    summaries = script(keys=[ORDER_SUMMARIES, ORDER_INDEX_READY, *keys], args=[limit, _order_number(order_number)])
+    if summaries is None:
+        return None
+    return [json.loads(summary) for summary in summaries if summary]
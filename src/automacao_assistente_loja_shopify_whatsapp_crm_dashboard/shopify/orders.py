@@ -0,0 +1,320 @@
+import asyncio
+import datetime
+import os
+import re
+import time
+
+import pandas as pd
+
+from ..lazy import lazy_import
+
+# O cliente HTTP só é carregado quando a API é chamada (o dashboard importa este módulo em todas as páginas)
+httpx = lazy_import("httpx")
+
+SHOPIFY_API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-01")
+
+# Colunas usadas pelo dashboard e os campos do pedido pedidos à API para montá-las
+ORDER_COLUMNS = ["order_id", "customer", "value", "date", "status"]
+ORDER_FIELDS = "id,order_number,email,phone,customer,total_price,created_at,updated_at,fulfillment_status,cancelled_at"
+
+# Identificadores do cliente guardados com o pedido para o índice de clientes (crm.customers)
+CUSTOMER_KEY_COLUMNS = ["customer_id", "email", "phone"]
+
+# Maior página permitida pela Admin API
+PAGE_SIZE = 250
+
+# Opções de ShopifyOrdersClient que a Bulk Operation não tem (as demais valem para os dois modos)
+REST_ONLY_OPTIONS = frozenset(("concurrency",))
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def shop_base_url(shop_url=None, api_version=SHOPIFY_API_VERSION):
+    """URL base da Admin API (aceita "minhaloja.myshopify.com" ou uma URL completa, ex.: servidor mock)"""
+    shop_url = (shop_url or os.getenv("SHOPIFY_SHOP_URL", "")).rstrip("/")
+    if not shop_url.startswith(("http://", "https://")):
+        shop_url = f"https://{shop_url}"
+    return f"{shop_url}/admin/api/{api_version}"
+
+
+def order_status(order):
+    """Traduz o estado do pedido no Shopify para os status exibidos no dashboard"""
+    if order.get("cancelled_at"):
+        return "Cancelado"
+    if order.get("fulfillment_status") == "fulfilled":
+        # A confirmação de entrega fica nos fulfillments, que não são baixados aqui
+        return "Enviado"
+    return "Processando"
+
+
+def order_row(order):
+    """Converte um pedido da API em uma linha no esquema do dashboard"""
+    customer = order.get("customer") or {}
+    name = " ".join(part for part in (customer.get("first_name"), customer.get("last_name")) if part)
+    return {
+        "order_id": str(order.get("order_number") or order.get("id")),
+        "customer": name or customer.get("email") or "Cliente não identificado",
+        "value": float(order.get("total_price") or 0),
+        "date": order.get("created_at"),
+        "status": order_status(order),
+        "customer_id": str(customer["id"]) if customer.get("id") else None,
+        "email": customer.get("email") or order.get("email"),
+        "phone": customer.get("phone") or order.get("phone"),
+    }
+
+
+def order_details(order):
+    """Dados do pedido usados na resposta ao cliente: status, rastreio e itens"""
+    tracking = [
+        {
+            "company": fulfillment.get("tracking_company"),
+            "number": number,
+            "url": url,
+            "status": fulfillment.get("shipment_status"),
+        }
+        for fulfillment in order.get("fulfillments") or []
+        for number, url in zip(
+            fulfillment.get("tracking_numbers") or [fulfillment.get("tracking_number")],
+            fulfillment.get("tracking_urls") or [fulfillment.get("tracking_url")],
+        )
+        if number
+    ]
+    return {
+        "order_number": order.get("name") or f"#{order.get('order_number')}",
+        "status": order_status(order),
+        "financial_status": order.get("financial_status"),
+        "fulfillment_status": order.get("fulfillment_status"),
+        "created_at": order.get("created_at"),
+        "total_price": order.get("total_price"),
+        "currency": order.get("currency"),
+        "items": [
+            {"title": item.get("title"), "quantity": item.get("quantity")}
+            for item in order.get("line_items") or []
+        ],
+        "tracking": tracking,
+        "order_status_url": order.get("order_status_url"),
+    }
+
+
+def orders_to_frame(rows):
+    """Monta o DataFrame de pedidos com o mesmo esquema dos dados de demonstração"""
+    df = pd.DataFrame(rows, columns=ORDER_COLUMNS + CUSTOMER_KEY_COLUMNS)
+    # Datas em UTC sem fuso, como as demais fontes do dashboard
+    df['date'] = pd.to_datetime(df['date'], utc=True).dt.tz_localize(None)
+    return df
+
+
+class RateLimiter:
+    """Balde furado da REST Admin API: limita as requisições em voo ao orçamento informado pela loja.
+
+    O cabeçalho X-Shopify-Shop-Api-Call-Limit ("usado/total") ajusta o estado do balde.
+    """
+
+    def __init__(self, bucket_size=40, leak_rate=2.0):
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.used = 0.0
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _leak(self):
+        now = time.monotonic()
+        self.used = max(0.0, self.used - (now - self.updated_at) * self.leak_rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._leak()
+            # Manter uma folga para outros clientes da mesma loja
+            while self.used >= self.bucket_size - 2:
+                await asyncio.sleep((self.used - self.bucket_size + 3) / self.leak_rate)
+                self._leak()
+            self.used += 1
+
+    def update(self, header):
+        if not header:
+            return
+        used, _, size = header.partition("/")
+        try:
+            self.used, self.bucket_size = float(used), int(size)
+        except ValueError:
+            return
+        self.updated_at = time.monotonic()
+
+
+class ShopifyOrdersClient:
+    """Cliente assíncrono da REST Admin API para baixar pedidos.
+
+    A paginação por cursor é sequencial; para paralelizar, o intervalo de datas
+    é dividido em janelas, cada uma paginada de forma independente, com o
+    total de requisições limitado pelo RateLimiter.
+    """
+
+    def __init__(self, shop_url=None, access_token=None, api_version=SHOPIFY_API_VERSION,
+                 concurrency=4, timeout=30.0):
+        self.base_url = shop_base_url(shop_url, api_version)
+        self.access_token = access_token or os.getenv("SHOPIFY_ACCESS_TOKEN", "")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter()
+
+    async def _get(self, client, url, params=None):
+        while True:
+            await self.rate_limiter.acquire()
+            response = await client.get(url, params=params)
+            self.rate_limiter.update(response.headers.get("X-Shopify-Shop-Api-Call-Limit"))
+            if response.status_code == 429:
+                await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                continue
+            response.raise_for_status()
+            return response
+
+    async def _fetch_window(self, client, params):
+        """Pagina uma janela de datas seguindo o cursor do cabeçalho Link"""
+        rows = []
+        url = f"{self.base_url}/orders.json"
+        while url:
+            response = await self._get(client, url, params)
+            rows.extend(order_row(order) for order in response.json().get("orders", []))
+            match = _NEXT_LINK.search(response.headers.get("Link", ""))
+            # As páginas seguintes carregam todos os filtros no page_info
+            url, params = (match.group(1), None) if match else (None, None)
+        return rows
+
+    async def _oldest_order_date(self, client):
+        response = await self._get(client, f"{self.base_url}/orders.json", {
+            "status": "any", "limit": 1, "order": "created_at asc", "fields": "created_at",
+        })
+        orders = response.json().get("orders", [])
+        return pd.Timestamp(orders[0]["created_at"]).to_pydatetime() if orders else None
+
+    async def fetch_orders(self, since=None, until=None, windows=None, date_field="created_at"):
+        """Baixa os pedidos de [since, until] e retorna a lista de linhas no esquema do dashboard.
+
+        `date_field` pode ser "updated_at" para sincronizações incrementais.
+        """
+        headers = {"X-Shopify-Access-Token": self.access_token}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=self.timeout) as client:
+            if since is None:
+                since = await self._oldest_order_date(client)
+                if since is None:
+                    return []
+            until = until or datetime.datetime.now(datetime.timezone.utc)
+            since, until = pd.Timestamp(since), pd.Timestamp(until)
+            if since.tzinfo is None:
+                since = since.tz_localize("UTC")
+            if until.tzinfo is None:
+                until = until.tz_localize("UTC")
+
+            # Janelas com limites em segundos inteiros (a precisão dos timestamps do Shopify);
+            # o limite superior de cada janela é exclusivo para não repetir pedidos
+            windows = windows or self.concurrency * 2
+            bounds = pd.date_range(since, until, periods=windows + 1).floor("s").unique()
+            ranges = [(bounds[i], bounds[i + 1] - pd.Timedelta(seconds=1)) for i in range(len(bounds) - 2)]
+            ranges.append((bounds[-2] if len(bounds) > 1 else since, until))
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(window_start, window_end):
+                params = {
+                    "status": "any",
+                    "limit": PAGE_SIZE,
+                    "fields": ORDER_FIELDS,
+                    f"{date_field}_min": window_start.isoformat(),
+                    f"{date_field}_max": window_end.isoformat(),
+                }
+                async with semaphore:
+                    return await self._fetch_window(client, params)
+
+            results = await asyncio.gather(*[fetch(start, end) for start, end in ranges])
+        return [row for rows in results for row in rows]
+
+
+class ShopifyOrderLookup:
+    """Consulta síncrona de pedidos na REST Admin API por número, e-mail ou nome do cliente
+    (usada pelas ferramentas da crew, uma mensagem por vez)"""
+
+    # Pedidos mais recentes devolvidos por consulta
+    LIMIT = 5
+
+    def __init__(self, shop_url=None, access_token=None, api_version=SHOPIFY_API_VERSION, timeout=10.0):
+        self.base_url = shop_base_url(shop_url, api_version)
+        self.client = httpx.Client(
+            headers={"X-Shopify-Access-Token": access_token or os.getenv("SHOPIFY_ACCESS_TOKEN", "")},
+            timeout=timeout,
+        )
+
+    def _get(self, path, params=None, retries=3):
+        for _ in range(retries):
+            response = self.client.get(f"{self.base_url}/{path}", params=params)
+            if response.status_code == 429:
+                time.sleep(float(response.headers.get("Retry-After", "1")))
+                continue
+            response.raise_for_status()
+            return response.json()
+        response.raise_for_status()
+
+    def _orders(self, **params):
+        params = {"status": "any", "limit": self.LIMIT, **params}
+        return self._get("orders.json", params).get("orders", [])
+
+    def by_number(self, order_number):
+        name = f"#{str(order_number).lstrip('#')}"
+        return self._orders(name=name)
+
+    def by_email(self, email):
+        return self._orders(email=email.strip().lower())
+
+    def by_customer(self, query):
+        """Pedidos dos clientes encontrados pela busca de clientes (nome ou "phone:...")"""
+        customers = self._get("customers/search.json", {"query": query, "limit": self.LIMIT}).get("customers", [])
+        orders = []
+        for customer in customers:
+            orders.extend(self._orders(customer_id=customer["id"]))
+        return sorted(orders, key=lambda order: order.get("created_at") or "", reverse=True)[:self.LIMIT]
+
+    def by_id(self, order_id):
+        return self._get(f"orders/{order_id}.json").get("order")
+
+    def lookup(self, order_number=None, email=None, phone=None, name=None):
+        """Pedidos do identificador mais forte informado (número > e-mail > telefone > nome)"""
+        if order_number:
+            orders = self.by_number(order_number)
+        elif email:
+            orders = self.by_email(email)
+        elif phone:
+            orders = self.by_customer(f"phone:{phone}")
+        elif name:
+            orders = self.by_customer(name)
+        else:
+            orders = []
+        return [order_details(order) for order in orders]
+
+
+def iter_orders_frames(since=None, until=None, mode=None, date_field="created_at", **client_options):
+    """Baixa os pedidos e gera DataFrames do dashboard, um por bloco.
+
+    `mode` (ou SHOPIFY_ORDERS_MODE) escolhe entre a paginação REST concorrente ("rest"),
+    que gera um único bloco, e o backfill histórico por Bulk Operation do GraphQL ("bulk"),
+    que transmite o resultado em blocos.
+    """
+    mode = mode or os.getenv("SHOPIFY_ORDERS_MODE", "rest")
+    if mode == "bulk":
+        unsupported = sorted(set(client_options) & REST_ONLY_OPTIONS)
+        if unsupported:
+            raise ValueError(f"Opções da paginação REST sem efeito no modo bulk: {', '.join(unsupported)}")
+        # Importado aqui porque o módulo de bulk depende deste
+        from .bulk import iter_bulk_orders
+        yield from iter_bulk_orders(since=since, until=until, date_field=date_field, **client_options)
+        return
+
+    client = ShopifyOrdersClient(**client_options)
+    yield orders_to_frame(asyncio.run(client.fetch_orders(since=since, until=until, date_field=date_field)))
+
+
+def fetch_orders_frame(since=None, until=None, mode=None, date_field="created_at", **client_options):
+    """Baixa os pedidos e retorna o DataFrame do dashboard (todos os blocos de iter_orders_frames juntos)"""
+    chunks = list(iter_orders_frames(since=since, until=until, mode=mode, date_field=date_field, **client_options))
+    if not chunks:
+        return orders_to_frame([])
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
@@ -0,0 +1,91 @@
+import asyncio
+import html
+import os
+import re
+
+import httpx
+
+from .orders import _NEXT_LINK, PAGE_SIZE, SHOPIFY_API_VERSION, RateLimiter, shop_base_url
+
+# Campos do produto pedidos à API para montar o catálogo local
+PRODUCT_FIELDS = "id,title,handle,body_html,vendor,product_type,tags,status,options,variants,updated_at"
+
+# Tamanho máximo da descrição guardada no catálogo (a resposta ao cliente usa só um resumo)
+DESCRIPTION_LENGTH = 300
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def storefront_url(shop_url=None):
+    """URL pública da loja para os links de compra (SHOPIFY_STOREFRONT_URL ou o domínio da loja)"""
+    url = (os.getenv("SHOPIFY_STOREFRONT_URL") or shop_url or os.getenv("SHOPIFY_SHOP_URL", "")).rstrip("/")
+    if url and not url.startswith(("http://", "https://")):
+        url = f"https://{url}"
+    return url
+
+
+def product_row(product, storefront=None):
+    """Converte um produto da API no registro do catálogo local"""
+    variants = product.get("variants") or []
+    prices = [float(variant["price"]) for variant in variants if variant.get("price")]
+    available = any(
+        variant.get("inventory_management") is None
+        or variant.get("inventory_policy") == "continue"
+        or (variant.get("inventory_quantity") or 0) > 0
+        for variant in variants
+    )
+    description = " ".join(html.unescape(_TAGS.sub(" ", product.get("body_html") or "")).split())
+    tags = product.get("tags") or ""
+    return {
+        "product_id": str(product["id"]),
+        "title": product.get("title") or "",
+        "handle": product.get("handle") or "",
+        "url": f"{storefront or storefront_url()}/products/{product.get('handle')}",
+        "description": description[:DESCRIPTION_LENGTH],
+        "vendor": product.get("vendor") or "",
+        "product_type": product.get("product_type") or "",
+        "tags": [tag.strip() for tag in tags.split(",") if tag.strip()] if isinstance(tags, str) else list(tags),
+        "options": {
+            option["name"]: option.get("values") or []
+            for option in product.get("options") or []
+            if option.get("name") and option.get("name") != "Title"
+        },
+        "price": min(prices) if prices else None,
+        "max_price": max(prices) if prices else None,
+        "available": available,
+        "status": product.get("status") or "active",
+        "updated_at": product.get("updated_at"),
+    }
+
+
+class ShopifyProductsClient:
+    """Cliente assíncrono da REST Admin API para baixar o catálogo de produtos (paginação por cursor)"""
+
+    def __init__(self, shop_url=None, access_token=None, api_version=SHOPIFY_API_VERSION, timeout=30.0):
+        self.base_url = shop_base_url(shop_url, api_version)
+        self.storefront = storefront_url(shop_url)
+        self.access_token = access_token or os.getenv("SHOPIFY_ACCESS_TOKEN", "")
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter()
+
+    async def fetch_products(self, updated_since=None):
+        """Produtos (todos ou alterados desde `updated_since`) no formato do catálogo local"""
+        headers = {"X-Shopify-Access-Token": self.access_token}
+        params = {"limit": PAGE_SIZE, "fields": PRODUCT_FIELDS}
+        if updated_since is not None:
+            params["updated_at_min"] = updated_since.isoformat()
+        rows = []
+        url = f"{self.base_url}/products.json"
+        async with httpx.AsyncClient(headers=headers, timeout=self.timeout) as client:
+            while url:
+                await self.rate_limiter.acquire()
+                response = await client.get(url, params=params)
+                self.rate_limiter.update(response.headers.get("X-Shopify-Shop-Api-Call-Limit"))
+                if response.status_code == 429:
+                    await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+                    continue
+                response.raise_for_status()
+                rows.extend(product_row(product, self.storefront) for product in response.json().get("products", []))
+                match = _NEXT_LINK.search(response.headers.get("Link", ""))
+                url, params = (match.group(1), None) if match else (None, None)
+        return rows
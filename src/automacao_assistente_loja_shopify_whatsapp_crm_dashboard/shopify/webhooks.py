@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+
+import pandas as pd
+from aiohttp import web
+
+from ..crm.connection import get_redis_client
+from ..crm.stream import DEAD_LETTER_KEY
+from .cache import OrderCache
+from .orders import order_row, orders_to_frame
+
+ORDER_TOPICS = ("orders/create", "orders/updated")
+
+# Fila (Redis Stream) dos pedidos recebidos e ainda não gravados no cache local
+ORDER_QUEUE = "shopify:orders:webhooks"
+QUEUE_MAXLEN = int(os.getenv("SHOPIFY_WEBHOOK_QUEUE_MAXLEN", "1000000"))
+
+# Intervalo máximo (segundos) e tamanho de lote para gravar os pedidos recebidos no cache
+FLUSH_INTERVAL = float(os.getenv("SHOPIFY_WEBHOOK_FLUSH_INTERVAL", "1.0"))
+FLUSH_BATCH_SIZE = int(os.getenv("SHOPIFY_WEBHOOK_FLUSH_BATCH_SIZE", "500"))
+
+logger = logging.getLogger(__name__)
+
+
+def sign_webhook(body, secret):
+    """Assinatura HMAC-SHA256 (base64) que o Shopify envia em X-Shopify-Hmac-Sha256"""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def verify_webhook(body, signature, secret):
+    """Confere a assinatura do webhook em tempo constante"""
+    if not signature or not secret:
+        return False
+    return hmac.compare_digest(sign_webhook(body, secret), signature)
+
+
+class OrderWebhookReceiver:
+    """Recebe webhooks de pedidos e os grava no cache local.
+
+    O Shopify só recebe a resposta depois que o pedido está na fila do Redis: se o
+    processo cair antes da gravação no cache, o pedido continua na fila e é gravado
+    na próxima partida. Os pedidos da fila são gravados em lote (por tamanho ou
+    tempo), de modo que uma rajada de webhooks reescreve cada partição mensal uma
+    única vez, e só saem da fila depois de gravados. O cache (shopify.cache) faz o
+    upsert sob um lock de arquivo compartilhado com a sincronização do dashboard e
+    atualiza a versão "orders".
+    """
+
+    def __init__(self, order_cache=None, redis_client=None, secret=None,
+                 flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH_SIZE):
+        self.redis_client = redis_client or get_redis_client()
+        self.order_cache = order_cache or OrderCache(redis_client=self.redis_client)
+        self.secret = secret or os.getenv("SHOPIFY_API_SECRET", "")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queued = 0
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flusher = None
+
+    def _enqueue(self, row):
+        self.redis_client.xadd(
+            ORDER_QUEUE, {"data": json.dumps(row)}, maxlen=QUEUE_MAXLEN, approximate=True
+        )
+
+    async def handle(self, request):
+        body = await request.read()
+        if not verify_webhook(body, request.headers.get("X-Shopify-Hmac-Sha256"), self.secret):
+            return web.Response(status=401, text="invalid signature")
+        if request.headers.get("X-Shopify-Topic") not in ORDER_TOPICS:
+            return web.Response(status=200, text="ignored")
+
+        try:
+            order = json.loads(body)
+        except json.JSONDecodeError:
+            return web.Response(status=400, text="invalid payload")
+
+        # Confirmado ao Shopify apenas depois de enfileirado; sem Redis, o Shopify reenvia
+        await asyncio.get_running_loop().run_in_executor(None, self._enqueue, order_row(order))
+        self.queued += 1
+        if self.queued >= self.batch_size:
+            self._wakeup.set()
+        return web.Response(status=200, text="ok")
+
+    def _dead_letter(self, rejected):
+        """Move para "<fila>:dead" as entradas [(id, dados, erro)] que nunca poderão ser gravadas"""
+        pipe = self.redis_client.pipeline()
+        for entry_id, data, error in rejected:
+            pipe.xadd(DEAD_LETTER_KEY.format(ORDER_QUEUE), {"data": data, "entry_id": entry_id, "error": error})
+            pipe.xdel(ORDER_QUEUE, entry_id)
+        pipe.execute()
+        logger.error("%d pedidos inválidos movidos para %s", len(rejected), DEAD_LETTER_KEY.format(ORDER_QUEUE))
+
+    def _write_batch(self):
+        """Grava no cache um lote da fila e o remove dela; retorna o número de entradas processadas.
+
+        Entradas inválidas vão para o dead-letter sem bloquear as demais; se a gravação
+        falhar, o lote inteiro fica na fila para a próxima tentativa.
+        """
+        entries = self.redis_client.xrange(ORDER_QUEUE, count=self.batch_size)
+        if not entries:
+            return 0
+        # Entregas repetidas do mesmo pedido no lote ficam só com a versão mais recente
+        frames, rejected = {}, []
+        for entry_id, fields in entries:
+            data = fields.get(b"data") or fields.get("data") or ""
+            try:
+                row = json.loads(data)
+                if not row.get("order_id"):
+                    raise ValueError("pedido sem order_id")
+                frames[row["order_id"]] = orders_to_frame([row])
+            except Exception as e:
+                rejected.append((entry_id, data, f"{type(e).__name__}: {e}"))
+        if rejected:
+            self._dead_letter(rejected)
+        if frames:
+            self.order_cache.upsert(pd.concat(frames.values(), ignore_index=True))
+        rejected_ids = {entry_id for entry_id, _, _ in rejected}
+        accepted = [entry_id for entry_id, _ in entries if entry_id not in rejected_ids]
+        if accepted:
+            self.redis_client.xdel(ORDER_QUEUE, *accepted)
+        return len(entries)
+
+    def _write(self):
+        while self._write_batch() >= self.batch_size:
+            pass
+
+    async def flush(self):
+        """Grava no cache tudo o que está na fila (escrita em disco e no Redis fora do event loop)"""
+        self.queued = 0
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write)
+        except Exception:
+            # Os pedidos continuam na fila e são gravados na próxima tentativa
+            logger.exception("Falha ao gravar os pedidos recebidos no cache")
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        # Pedidos enfileirados durante a última gravação
+        await self.flush()
+
+    async def start(self, app):
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self, app):
+        # O laço termina depois da gravação em andamento e de uma última: nunca há duas ao mesmo tempo
+        self._stopping = True
+        self._wakeup.set()
+        if self._flusher:
+            await self._flusher
+            self._flusher = None
+
+
+def create_app(order_cache=None, redis_client=None, secret=None):
+    """Aplicação aiohttp com o endpoint POST /webhooks/shopify/orders"""
+    receiver = OrderWebhookReceiver(order_cache=order_cache, redis_client=redis_client, secret=secret)
+    app = web.Application()
+    app["receiver"] = receiver
+    app.router.add_post("/webhooks/shopify/orders", receiver.handle)
+    app.on_startup.append(receiver.start)
+    app.on_cleanup.append(receiver.stop)
+    return app
+
+
+def run():
+    """Inicia o receptor de webhooks de pedidos (porta em SHOPIFY_WEBHOOK_PORT)"""
+    app = create_app(redis_client=get_redis_client())
+    web.run_app(app, port=int(os.getenv("SHOPIFY_WEBHOOK_PORT", "8081")))
+
+
+if __name__ == "__main__":
+    run()
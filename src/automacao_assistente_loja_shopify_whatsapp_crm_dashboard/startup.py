@@ -0,0 +1,119 @@
+# Relatório do tempo de inicialização (imports) de cada comando, a partir de `python -X importtime`.
+#
+# Uso:
+#   startup_report                                  # dashboard e run_crew
+#   startup_report streamlit_app --top 15
+#   startup_report --json startup.json              # salva a medição
+#   startup_report --baseline startup.json          # falha se o tempo subir mais que --max-regression
+import argparse
+import json
+import subprocess
+import sys
+
+PACKAGE = "automacao_assistente_loja_shopify_whatsapp_crm_dashboard"
+
+# Módulos importados por cada comando antes de começar a trabalhar
+TARGETS = {
+    "streamlit_app": [f"{PACKAGE}.dashboard.app"],
+    "run_crew": [f"{PACKAGE}.main", f"{PACKAGE}.crew"],
+    "whatsapp_webhook": [f"{PACKAGE}.whatsapp.webhook"],
+    "whatsapp_workers": [f"{PACKAGE}.whatsapp.worker"],
+    "shopify_webhooks": [f"{PACKAGE}.shopify.webhooks"],
+}
+DEFAULT_TARGETS = ("streamlit_app", "run_crew")
+
+
+def parse_importtime(output):
+    """Linhas do `-X importtime` como (módulo, self em µs, acumulado em µs, profundidade)"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure(modules):
+    """Imports de `modules` em um processo novo; levanta CalledProcessError se algum falhar"""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, code, stderr=result.stderr)
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries):
+    """Tempo total e tempo próprio somado por pacote de primeiro nível, em ms"""
+    by_package = {}
+    for name, self_us, _, _ in entries:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us / 1000
+    return sum(self_us for _, self_us, _, _ in entries) / 1000, by_package
+
+
+def profile(target, runs=3):
+    """Mediana de `runs` partidas a frio do comando e o tempo por pacote da execução mediana"""
+    results = sorted((summarize(measure(TARGETS[target])) for _ in range(runs)), key=lambda result: result[0])
+    total, by_package = results[len(results) // 2]
+    return {
+        "total_ms": round(total, 1),
+        "runs_ms": [round(result[0], 1) for result in results],
+        "packages_ms": {package: round(ms, 1) for package, ms in sorted(by_package.items(), key=lambda item: -item[1])},
+    }
+
+
+def print_report(target, report, top):
+    print(f"{target}: {report['total_ms']:.1f} ms (mediana de {report['runs_ms']})")
+    for package, ms in list(report["packages_ms"].items())[:top]:
+        print(f"  {ms:8.1f} ms  {package}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Tempo de import na inicialização de cada comando")
+    parser.add_argument("targets", nargs="*", help=f"comandos medidos ({', '.join(TARGETS)})")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="pacotes exibidos por comando")
+    parser.add_argument("--json", help="salva o relatório neste arquivo")
+    parser.add_argument("--baseline", help="relatório anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="aumento máximo aceito (0.2 = 20%%)")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"comandos desconhecidos: {', '.join(sorted(unknown))}")
+
+    reports = {}
+    for target in args.targets or DEFAULT_TARGETS:
+        try:
+            reports[target] = profile(target, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{target}: falha ao importar\n{e.stderr.strip().splitlines()[-1]}")
+            continue
+        print_report(target, reports[target], args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = []
+        for target, report in reports.items():
+            if target not in baseline:
+                continue
+            before = baseline[target]["total_ms"]
+            change = report["total_ms"] / before - 1 if before else 0
+            print(f"{target}: {before:.1f} ms -> {report['total_ms']:.1f} ms ({change:+.0%})")
+            if change > args.max_regression:
+                regressions.append(target)
+        if regressions:
+            print(f"Regressão no tempo de inicialização: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
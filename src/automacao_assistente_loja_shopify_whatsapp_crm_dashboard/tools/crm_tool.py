@@ -0,0 +1,40 @@
+import json
+from typing import Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from ..crm.connection import get_redis_client
+from ..crm.store import save_interaction
+from ..crm.stream import CRM_BACKEND, append_interaction
+
+
+class CRMLogToolInput(BaseModel):
+    """Input schema for CRMLogTool."""
+    interaction: str = Field(
+        ...,
+        description=(
+            "JSON object describing the interaction. Expected fields: customer, type, "
+            "timestamp (YYYY-MM-DD HH:MM:SS), status, query, classification, shopify_data, response."
+        ),
+    )
+
+
+class CRMLogTool(BaseTool):
+    name: str = "CRM Interaction Logger"
+    description: str = (
+        "Stores a customer interaction in the Redis-based CRM, keeping the date, customer "
+        "and status indexes used by the dashboard up to date."
+    )
+    args_schema: Type[BaseModel] = CRMLogToolInput
+
+    def _run(self, interaction: str) -> str:
+        try:
+            data = json.loads(interaction)
+        except json.JSONDecodeError as e:
+            return f"Invalid interaction JSON: {e}"
+        if CRM_BACKEND == "stream":
+            entry_id = append_interaction(get_redis_client(), data)
+            return f"Interaction appended to the CRM stream as {entry_id}"
+        interaction_id = save_interaction(get_redis_client(), data)
+        return f"Interaction stored as interaction:{interaction_id}"
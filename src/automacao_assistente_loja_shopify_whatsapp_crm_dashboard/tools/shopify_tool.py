@@ -0,0 +1,91 @@
+import functools
+import json
+from typing import Optional, Type
+
+import httpx
+import redis
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from ..crm.connection import get_redis_client
+from ..shopify.catalog import get_catalog
+from ..shopify.order_index import lookup_orders
+from ..shopify.orders import ShopifyOrderLookup, order_details
+
+# Campos do produto devolvidos ao agente (o suficiente para a resposta e o link de compra)
+PRODUCT_RESULT_FIELDS = ("title", "price", "max_price", "available", "options", "description", "url")
+
+
+@functools.lru_cache(maxsize=None)
+def _order_lookup():
+    # Um cliente HTTP por processo, reaproveitando as conexões com a loja
+    return ShopifyOrderLookup()
+
+
+class ShopifyOrderLookupToolInput(BaseModel):
+    """Input schema for ShopifyOrderLookupTool."""
+    order_number: Optional[str] = Field(None, description="Order number, e.g. '#1001' or '1001'.")
+    email: Optional[str] = Field(None, description="Customer email used in the order.")
+    phone: Optional[str] = Field(None, description="Customer phone number (the WhatsApp number).")
+    name: Optional[str] = Field(None, description="Customer full name.")
+
+
+class ShopifyOrderLookupTool(BaseTool):
+    name: str = "Shopify Order Lookup"
+    description: str = (
+        "Finds the customer's orders by order number, email, phone or full name (the strongest "
+        "identifier given is used) and returns the matching orders, most recent first, plus live "
+        "status, tracking codes and items of the requested or most recent order as JSON."
+    )
+    args_schema: Type[BaseModel] = ShopifyOrderLookupToolInput
+
+    def _run(self, order_number: Optional[str] = None, email: Optional[str] = None,
+             phone: Optional[str] = None, name: Optional[str] = None) -> str:
+        if not (order_number or email or phone or name):
+            return "Provide an order number, email, phone or customer name."
+        try:
+            # Resolução local (shopify.order_index); None se o índice ainda não foi montado
+            indexed = lookup_orders(get_redis_client(), order_number=order_number, email=email, phone=phone, name=name)
+        except redis.RedisError:
+            indexed = None
+        try:
+            if indexed is None or (order_number and not indexed):
+                # Sem índice, ou pedido recém-criado ainda não indexado: busca na API
+                orders = _order_lookup().lookup(order_number=order_number, email=email, phone=phone, name=name)
+                if not orders:
+                    return "No orders found for the given details."
+                return json.dumps({"orders": orders, "latest": orders[0]}, ensure_ascii=False)
+            if not indexed:
+                return "No orders found for the given details."
+            # Apenas o pedido a detalhar vai à API, para o status e o rastreio atualizados
+            live = _order_lookup().by_number(indexed[0]["order_number"])
+        except httpx.HTTPError as e:
+            return f"Shopify order lookup failed: {e}"
+        return json.dumps(
+            {"orders": indexed, "latest": order_details(live[0]) if live else indexed[0]}, ensure_ascii=False
+        )
+
+
+class ShopifyProductSearchToolInput(BaseModel):
+    """Input schema for ShopifyProductSearchTool."""
+    query: str = Field(..., description="Product search keywords from the customer's message.")
+    limit: int = Field(5, description="Maximum number of products returned.")
+
+
+class ShopifyProductSearchTool(BaseTool):
+    name: str = "Shopify Product Search"
+    description: str = (
+        "Searches the store's product catalog by keywords (accents and plural/gender variations "
+        "are ignored) and returns name, price, availability, options, short description and the "
+        "purchase link of the best matches as JSON."
+    )
+    args_schema: Type[BaseModel] = ShopifyProductSearchToolInput
+
+    def _run(self, query: str, limit: int = 5) -> str:
+        products = get_catalog().search(query, limit=limit)
+        if not products:
+            return "No products found for the given keywords."
+        return json.dumps(
+            [{field: product.get(field) for field in PRODUCT_RESULT_FIELDS} for product in products],
+            ensure_ascii=False,
+        )
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Type
+
+import redis
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from ..crm.connection import get_redis_client
+from ..whatsapp.sender import WhatsAppSendError, get_sender
+from ..whatsapp.sessions import record_message
+
+# Id da mensagem entregue em cada resposta da crew (chave de entrega da ferramenta), lido pela
+# crew para registrar a interação; workers respondendo ao mesmo telefone não se misturam.
+# Entregas que ninguém consulta (crew completa, resposta que falhou depois do envio) são
+# descartadas das mais antigas para as mais novas além de MAX_DELIVERIES
+MAX_DELIVERIES = int(os.getenv("WHATSAPP_MAX_DELIVERIES", "10000"))
+_deliveries = OrderedDict()
+_deliveries_lock = threading.Lock()
+
+
+def _store_delivery(delivery_key, message_id):
+    with _deliveries_lock:
+        _deliveries[delivery_key] = message_id
+        _deliveries.move_to_end(delivery_key)
+        while len(_deliveries) > MAX_DELIVERIES:
+            _deliveries.popitem(last=False)
+
+
+def pop_delivery(delivery_key):
+    """Id da mensagem entregue com a chave desde a última consulta, ou None"""
+    with _deliveries_lock:
+        return _deliveries.pop(delivery_key, None)
+
+
+class WhatsAppSendToolInput(BaseModel):
+    """Input schema for WhatsAppSendTool."""
+    to: str = Field(..., description="Customer phone number in international format, digits only.")
+    message: str = Field(..., description="Text of the response to send.")
+
+
+class WhatsAppSendTool(BaseTool):
+    name: str = "WhatsApp Message Sender"
+    description: str = (
+        "Sends a text message to the customer through the WhatsApp Cloud API and returns the "
+        "message id once the API accepts it. Retries automatically when rate limited."
+    )
+    args_schema: Type[BaseModel] = WhatsAppSendToolInput
+    # Identifica a resposta em andamento para pop_delivery (o telefone, se vazio)
+    delivery_key: str = ""
+
+    def _run(self, to: str, message: str) -> str:
+        to = "".join(char for char in to if char.isdigit())
+        try:
+            message_id = get_sender().send(to, message)
+        except WhatsAppSendError as e:
+            return f"WhatsApp message not delivered: {e}"
+        _store_delivery(self.delivery_key or to, message_id)
+        try:
+            # A resposta enviada fecha a conversa do cliente (status Resolvido)
+            record_message(
+                get_redis_client(), {"from": to, "timestamp": time.time(), "message_id": message_id}, direction="outbound"
+            )
+        except redis.RedisError:
+            pass
+        return f"Message delivered to {to} (id {message_id})"
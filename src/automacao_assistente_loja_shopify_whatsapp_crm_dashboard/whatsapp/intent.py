@@ -0,0 +1,68 @@
+import re
+
+from ..crm.customers import normalize_name
+
+# Classificador determinístico da intenção da mensagem (pedido x produto), executado antes da
+# crew: resolve os casos comuns em microssegundos e devolve None para os ambíguos, que seguem
+# para a classificação pelo LLM (interpret_customer_query_task)
+
+ORDER_NUMBER = re.compile(r"(?:#\s*|\bpedido\s*(?:n[o.]?\s*|numero\s*)?|\border\s*)(\d{3,})\b")
+EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+NAME = re.compile(r"\b(?:meu nome e|me chamo|aqui e o|aqui e a|sou o|sou a)\s+([a-z]+(?:\s+[a-z]+){0,3})")
+
+# Palavras-chave (já normalizadas: minúsculas, sem acentos); prefixos cobrem as flexões
+ORDER_KEYWORDS = re.compile(
+    r"\b(rastrei\w*|rastrear|tracking|status|codigo de rastr\w*|entreg\w*|envi(?:o|ado|ada|aram|ou)"
+    r"|cheg(?:a|ou|ar|ando|ara)|atras\w*|transportador\w*|correios|nota fiscal|reembols\w*"
+    r"|cancel\w*|devol\w*|troca\w*|meu pedido|minha compra|minha encomenda|encomenda)\b"
+)
+PRODUCT_KEYWORDS = re.compile(
+    r"\b(produto\w*|preco\w*|quanto custa|quanto e|quanto sai|valor d\w+|estoque|disponive\w*"
+    r"|tamanho\w*|cor(?:es)?|modelo\w*|tem (?:o|a|os|as|esse|essa|esses|essas)\b|vende\w*"
+    r"|catalogo|link|promoca\w*|desconto\w*|cupo\w*|frete para|parcel\w*|comprar|quero comprar)\b"
+)
+GREETING = re.compile(
+    r"^(?:oi+|ola|opa|bom dia|boa tarde|boa noite|obrigad[oa]|valeu|ok|blz|beleza|tudo bem|"
+    r"td bem|bom|otimo|perfeito|show|tchau|ate mais)(?:[\s,!.?]+(?:oi+|ola|opa|bom dia|boa tarde|"
+    r"boa noite|obrigad[oa]|valeu|ok|tudo bem|td bem|tchau|ate mais|pessoal|gente))*[\s!.?]*$"
+)
+
+INTENTS = ("order", "product", "both", "other")
+
+
+def classify_message(text):
+    """Intenção e dados extraídos da mensagem, ou None se for ambígua (decisão do LLM).
+
+    Retorna um dict com os campos de QueryClassification: intent, order_number, email,
+    name, keywords e summary.
+    """
+    normalized = normalize_name(text) or ""
+    if not normalized:
+        return None
+
+    order_number = ORDER_NUMBER.search(normalized)
+    email = EMAIL.search(text.lower())
+    name = NAME.search(normalized)
+    order_hits = ORDER_KEYWORDS.findall(normalized)
+    product_hits = PRODUCT_KEYWORDS.findall(normalized)
+
+    if GREETING.match(normalized):
+        intent = "other"
+    elif order_number or email:
+        # Identificador de pedido presente: consulta de pedido, exceto se também pergunta por produtos
+        intent = "both" if len(product_hits) >= 2 else "order"
+    elif order_hits and not product_hits:
+        intent = "order"
+    elif product_hits and not order_hits:
+        intent = "product"
+    else:
+        return None
+
+    return {
+        "intent": intent,
+        "order_number": order_number.group(1) if order_number else None,
+        "email": email.group(0) if email else None,
+        "name": name.group(1).title() if name else None,
+        "keywords": sorted(set(order_hits) | set(product_hits)),
+        "summary": "fast-path",
+    }
@@ -0,0 +1,62 @@
+import os
+
+# Fila de mensagens recebidas (Redis Stream) consumida pelos workers da crew
+INBOUND_QUEUE = "whatsapp:inbound"
+WORKER_GROUP = "crew-workers"
+QUEUE_MAXLEN = int(os.getenv("WHATSAPP_QUEUE_MAXLEN", "1000000"))
+# Log das respostas enviadas aos clientes (Redis Stream com o mesmo limite da fila)
+OUTBOUND_LOG = "whatsapp:outbound"
+
+# A Meta reenvia callbacks sem confirmação; o id da mensagem fica marcado por este tempo
+SEEN_KEY = "whatsapp:seen:{}"
+DEDUP_TTL = int(os.getenv("WHATSAPP_DEDUP_TTL", "86400"))
+
+def extract_messages(payload):
+    """Extrai as mensagens recebidas de um callback do WhatsApp Cloud API.
+
+    Callbacks de status (sent/delivered/read) não geram mensagens.
+    """
+    messages = []
+    for entry in payload.get("entry", []):
+        for change in entry.get("changes", []):
+            value = change.get("value") or {}
+            metadata = value.get("metadata") or {}
+            names = {
+                contact.get("wa_id"): (contact.get("profile") or {}).get("name")
+                for contact in value.get("contacts", [])
+            }
+            for message in value.get("messages", []):
+                messages.append({
+                    "message_id": message.get("id"),
+                    "from": message.get("from"),
+                    "name": names.get(message.get("from")),
+                    "timestamp": message.get("timestamp"),
+                    "type": message.get("type"),
+                    "text": (message.get("text") or {}).get("body", ""),
+                    "phone_number_id": metadata.get("phone_number_id"),
+                })
+    return messages
+
+
+class InboundQueue:
+    """Enfileiramento idempotente das mensagens recebidas (cliente redis.asyncio)"""
+
+    def __init__(self, redis_client, maxlen=QUEUE_MAXLEN, dedup_ttl=DEDUP_TTL):
+        self.redis = redis_client
+        self.maxlen = maxlen
+        self.dedup_ttl = dedup_ttl
+
+    async def enqueue(self, messages):
+        """Enfileira as mensagens ainda não vistas e retorna as que foram adicionadas.
+
+        Marca de vista, fila e conversa do cliente são gravadas em uma única operação
+        atômica (whatsapp.sessions.record_message): sem duplicatas, sem mensagens
+        marcadas como vistas que nunca chegaram à fila ou à conversa.
+        """
+        # Importado aqui porque o módulo de sessões depende deste
+        from .sessions import record_message
+        added = []
+        for message in messages:
+            if await record_message(self.redis, message, dedup_ttl=self.dedup_ttl, maxlen=self.maxlen) is not None:
+                added.append(message)
+        return added
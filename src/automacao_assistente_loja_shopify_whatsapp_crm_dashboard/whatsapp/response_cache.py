@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import redis
+
+from ..crm.customers import normalize_name
+from ..crm.store import DATA_VERSION_KEY
+from .intent import EMAIL, GREETING, ORDER_NUMBER
+
+# Cache das respostas geradas (generate_response_task): perguntas repetidas sobre os mesmos
+# dados do Shopify são respondidas sem as consultas e sem a chamada ao LLM.
+# Chave: intenção + pergunta normalizada + versão dos dados do Shopify usados na resposta.
+# Consultas de pedido ("order"/"both") não são cacheadas: a resposta traz o status e o rastreio
+# ao vivo de um pedido específico, que a versão global dos pedidos não acompanha
+RESPONSE_KEY = "whatsapp:response:{}"
+RESPONSE_LRU = "whatsapp:responses:lru"
+RESPONSE_STATS = "whatsapp:responses:stats"
+RESPONSE_TTL = int(os.getenv("WHATSAPP_RESPONSE_CACHE_TTL", "21600"))
+RESPONSE_MAX_ENTRIES = int(os.getenv("WHATSAPP_RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+
+# Fontes de dados do Shopify consultadas para cada intenção cacheável ("other" não depende de dados)
+SOURCES_BY_INTENT = {
+    "product": ("products",),
+    "other": (),
+}
+
+# Palavras que não mudam a resposta; saudações e cortesias no início/fim da mensagem
+FILLER = re.compile(
+    r"\b(?:oi+|ola|opa|bom dia|boa tarde|boa noite|por favor|pfv|pf|obrigad[oa]|valeu|tudo bem|td bem"
+    r"|gostaria de saber|queria saber|quero saber|me diz|me diga|me fala|voces|vcs|vc|voce)\b"
+)
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Nome do cliente trocado por um marcador antes de gravar: a resposta serve a outros clientes
+NAME_PLACEHOLDER = "{customer_name}"
+
+# Grava a resposta e a posição no LRU; remove as entradas menos usadas acima do limite
+_STORE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local evicted = redis.call('ZRANGE', KEYS[2], 0, excess - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+    redis.call('DEL', unpack(evicted))
+    redis.call('HINCRBY', KEYS[3], 'evictions', #evicted)
+end
+return excess
+"""
+
+
+def normalize_question(text):
+    """Pergunta sem acentos, pontuação, saudações, números de pedido e e-mails"""
+    normalized = normalize_name(text) or ""
+    if GREETING.match(normalized):
+        # Saudação pura: todas as variações ("Oi!", "oii boa tarde") têm a mesma resposta
+        return "saudacao"
+    normalized = EMAIL.sub(" ", ORDER_NUMBER.sub(" ", normalized))
+    normalized = FILLER.sub(" ", PUNCTUATION.sub(" ", normalized))
+    return " ".join(normalized.split())
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class ResponseCache:
+    """Respostas geradas no Redis, com TTL e remoção das menos usadas (LRU) acima de max_entries"""
+
+    def __init__(self, redis_client, ttl=RESPONSE_TTL, max_entries=RESPONSE_MAX_ENTRIES):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._store = redis_client.register_script(_STORE_SCRIPT)
+
+    def key(self, classification, message):
+        """Chave da resposta, ou None se a classificação não permite reaproveitar a resposta"""
+        intent = classification.get("intent") if classification else None
+        if intent not in SOURCES_BY_INTENT:
+            return None
+        question = normalize_question(message)
+        if not question:
+            return None
+
+        parts = [intent, question]
+        sources = SOURCES_BY_INTENT[intent]
+        if sources:
+            try:
+                versions = self.redis_client.mget([DATA_VERSION_KEY.format(source) for source in sources])
+            except redis.RedisError:
+                return None
+            parts.extend(f"{source}={_decode(version) or 0}" for source, version in zip(sources, versions))
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return RESPONSE_KEY.format(digest)
+
+    def get(self, key, customer_name=""):
+        """Resposta em cache para o cliente, ou None. Conta acertos, falhas e o tempo economizado"""
+        try:
+            cached = self.redis_client.get(key)
+            if cached is None:
+                self.redis_client.hincrby(RESPONSE_STATS, "misses", 1)
+                return None
+            entry = json.loads(cached)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(RESPONSE_LRU, {key: time.time()})
+            pipe.hincrby(RESPONSE_STATS, "hits", 1)
+            pipe.hincrbyfloat(RESPONSE_STATS, "saved_ms", entry.get("generate_ms", 0))
+            pipe.execute()
+        except redis.RedisError:
+            # Sem Redis a resposta é gerada normalmente
+            return None
+        return entry["response"].replace(NAME_PLACEHOLDER, customer_name or "")
+
+    def set(self, key, response, customer_name="", generate_ms=0):
+        """Grava a resposta gerada em `generate_ms` milissegundos"""
+        if not response:
+            return
+        if customer_name and len(customer_name) > 2:
+            response = response.replace(customer_name, NAME_PLACEHOLDER)
+            first_name = customer_name.split()[0]
+            if len(first_name) > 2:
+                response = re.sub(rf"\b{re.escape(first_name)}\b", NAME_PLACEHOLDER, response)
+        entry = json.dumps({"response": response, "generate_ms": round(generate_ms, 1)}, ensure_ascii=False)
+        try:
+            self._store(keys=[key, RESPONSE_LRU, RESPONSE_STATS], args=[entry, self.ttl, time.time(), self.max_entries])
+        except redis.RedisError:
+            pass
+
+    def stats(self):
+        """Acertos, falhas, taxa de acerto, tempo economizado (ms) e remoções por LRU"""
+        values = {_decode(field): float(value) for field, value in self.redis_client.hgetall(RESPONSE_STATS).items()}
+        hits, misses = int(values.get("hits", 0)), int(values.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_ms": values.get("saved_ms", 0.0),
+            "evictions": int(values.get("evictions", 0)),
+        }
@@ -0,0 +1,261 @@
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import email.utils
+import os
+import random
+import threading
+import time
+
+import httpx
+import numpy as np
+
+# Envio de mensagens pela WhatsApp Cloud API: um cliente HTTP/2 persistente, envios concorrentes
+# limitados pela vazão do número comercial e de cada destinatário, e novas tentativas em 429/5xx
+GRAPH_API_URL = os.getenv("GRAPH_API_URL", "https://graph.facebook.com")
+GRAPH_API_VERSION = os.getenv("GRAPH_API_VERSION", "v19.0")
+
+# Vazão do número comercial (mensagens/s) e limite por destinatário (rajada, depois 1 a cada 6 s)
+WHATSAPP_MPS = float(os.getenv("WHATSAPP_MPS", "80"))
+PAIR_RATE = float(os.getenv("WHATSAPP_PAIR_RATE", str(1 / 6)))
+PAIR_BURST = int(os.getenv("WHATSAPP_PAIR_BURST", "10"))
+
+# Requisições em voo (multiplexadas na mesma conexão HTTP/2) e novas tentativas
+SEND_CONCURRENCY = int(os.getenv("WHATSAPP_SEND_CONCURRENCY", "32"))
+MAX_RETRIES = int(os.getenv("WHATSAPP_SEND_RETRIES", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Códigos de erro da Graph API que indicam limite de vazão (mesmo quando o status não é 429)
+RATE_LIMIT_CODES = {4, 80007, 130429, 131048, 131056}
+
+# Latências mantidas para os percentis e destinatários com balde próprio em memória
+LATENCY_WINDOW = 10_000
+MAX_PAIR_BUCKETS = 10_000
+
+
+class WhatsAppSendError(Exception):
+    """Mensagem recusada pela Graph API ou não entregue após as novas tentativas"""
+
+
+class TokenBucket:
+    """Balde de fichas com reserva: quem chega primeiro reserva a próxima ficha disponível"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """Reserva uma ficha e retorna quantos segundos esperar até poder usá-la"""
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def retry_after_seconds(value):
+    """Espera pedida no Retry-After (segundos ou data HTTP); None se ausente ou inválida"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def text_payload(to, text):
+    return {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": to,
+        "type": "text",
+        "text": {"preview_url": True, "body": text},
+    }
+
+
+class WhatsAppSender:
+    """Fila de envio assíncrona para a Cloud API.
+
+    Mensagens para o mesmo destinatário saem na ordem em que foram enfileiradas; para
+    destinatários diferentes, são enviadas em paralelo até `concurrency` requisições.
+    """
+
+    def __init__(self, phone_number_id=None, access_token=None, base_url=GRAPH_API_URL,
+                 api_version=GRAPH_API_VERSION, mps=WHATSAPP_MPS, pair_rate=PAIR_RATE, pair_burst=PAIR_BURST,
+                 concurrency=SEND_CONCURRENCY, max_retries=MAX_RETRIES, timeout=15.0):
+        phone_number_id = phone_number_id or os.getenv("WHATSAPP_PHONE_NUMBER_ID", "")
+        self.url = f"{base_url.rstrip('/')}/{api_version}/{phone_number_id}/messages"
+        self.access_token = access_token or os.getenv("GRAPH_API_TOKEN", "")
+        # Rajada de até 1/10 s de vazão: o servidor conta por janela e rajadas maiores geram 429
+        self.bucket = TokenBucket(mps, max(1, int(mps / 10)))
+        self.pair_rate = pair_rate
+        self.pair_burst = pair_burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._pairs = {}
+        self._last_send = {}
+        self._client = None
+        self._semaphore = None
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.counts = collections.Counter()
+
+    def _http(self):
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(
+                http2=True, limits=limits, timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.access_token}"},
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def _pair_bucket(self, to):
+        bucket = self._pairs.get(to)
+        if bucket is None:
+            if len(self._pairs) >= MAX_PAIR_BUCKETS:
+                # Destinatários sem envios recentes voltaram ao balde cheio: podem ser descartados
+                self._pairs = {number: pair for number, pair in self._pairs.items() if not pair.idle()}
+            bucket = self._pairs[to] = TokenBucket(self.pair_rate, self.pair_burst)
+        return bucket
+
+    async def send(self, to, text):
+        """Envia um texto e retorna o id da mensagem (wamid); levanta WhatsAppSendError se falhar"""
+        previous = self._last_send.get(to)
+        task = asyncio.ensure_future(self._deliver(to, text_payload(to, text), previous, time.perf_counter()))
+        self._last_send[to] = task
+        task.add_done_callback(lambda done: self._last_send.get(to) is done and self._last_send.pop(to))
+        return await task
+
+    async def send_many(self, messages):
+        """Envia vários (destinatário, texto); retorna os ids ou as exceções, na mesma ordem"""
+        return await asyncio.gather(*(self.send(to, text) for to, text in messages), return_exceptions=True)
+
+    async def _deliver(self, to, payload, previous, enqueued_at):
+        if previous is not None:
+            # Ordem por destinatário: espera o envio anterior (com sucesso ou não)
+            await asyncio.wait([previous])
+        await self._pair_bucket(to).acquire()
+        try:
+            message_id = await self._post(payload)
+        except WhatsAppSendError:
+            self.counts["failed"] += 1
+            raise
+        self.counts["sent"] += 1
+        self.latencies.append(time.perf_counter() - enqueued_at)
+        return message_id
+
+    async def _post(self, payload):
+        client = self._http()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    response = await client.post(self.url, json=payload)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = {}
+                if not isinstance(body, dict):
+                    body = {}
+                code = (body.get("error") or {}).get("code")
+                if response.is_success:
+                    try:
+                        return body["messages"][0]["id"]
+                    except (KeyError, IndexError, TypeError):
+                        raise WhatsAppSendError(
+                            f"Graph API {response.status_code}: no message id in the response ({response.text})"
+                        ) from None
+                if response.status_code != 429 and response.status_code < 500 and code not in RATE_LIMIT_CODES:
+                    raise WhatsAppSendError(f"Graph API {response.status_code}: {body.get('error') or response.text}")
+                error = f"Graph API {response.status_code} (code {code})"
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            if attempt == self.max_retries:
+                raise WhatsAppSendError(f"{error} after {attempt + 1} attempts")
+            self.counts["retries"] += 1
+            # Backoff exponencial com jitter, ou o tempo pedido pelo servidor
+            delay = retry_after if retry_after is not None else min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    def stats(self):
+        """Enviadas, falhas, novas tentativas e percentis da latência de entrega (ms, da fila até o aceite)"""
+        latencies = np.array(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [0.0, 0.0, 0.0]
+        return {
+            "sent": self.counts["sent"],
+            "failed": self.counts["failed"],
+            "retries": self.counts["retries"],
+            **{f"p{q}_ms": round(float(value), 1) for q, value in zip((50, 95, 99), percentiles)},
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class SenderThread:
+    """WhatsAppSender em um event loop próprio, para envios a partir de código síncrono
+    (as ferramentas da crew rodam nas threads dos workers); a conexão é reaproveitada entre envios"""
+
+    def __init__(self, **sender_options):
+        self.loop = asyncio.new_event_loop()
+        self.sender = WhatsAppSender(**sender_options)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="whatsapp-sender", daemon=True)
+        self.thread.start()
+
+    def send(self, to, text, timeout=120):
+        """Envia e retorna o id da mensagem; levanta WhatsAppSendError se falhar ou passar de `timeout`"""
+        future = asyncio.run_coroutine_threadsafe(self.sender.send(to, text), self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise WhatsAppSendError(f"no response from the Graph API after {timeout} s") from None
+
+    def stats(self):
+        return self.sender.stats()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.sender.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def get_sender():
+    """Envio compartilhado pelo processo (workers da crew)"""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = SenderThread()
+        return _sender
@@ -0,0 +1,302 @@
+import itertools
+import json
+import os
+
+import pandas as pd
+import redis
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript, Script
+
+from ..crm.connection import get_redis_client
+from ..crm.customers import (
+    CUSTOMER_ALIASES,
+    CUSTOMER_FIELD_KEY,
+    CUSTOMER_NEXT_ID,
+    MATCH_CUSTOMER_NAME,
+    RESOLVE_LUA,
+    customer_aliases,
+    rebuild_customer_conversations,
+)
+from ..crm.rollups import ROLLUP_KEY, ROLLUP_TOTAL, rebuild_conversation_rollups
+from ..crm.schemas import typed_conversations
+from ..crm.store import DATA_VERSION_KEY
+from .queue import INBOUND_QUEUE, OUTBOUND_LOG, QUEUE_MAXLEN, SEEN_KEY
+
+# Uma nova conversa começa quando o cliente fica este tempo (segundos) sem trocar mensagens
+SESSION_GAP = int(os.getenv("WHATSAPP_SESSION_GAP", "1800"))
+
+# Hash de cada conversa e ponteiro para a conversa atual de cada cliente
+CONVERSATION_KEY = "conversation:{}"
+CURRENT_SESSION_KEY = "whatsapp:session:{}"
+# Índice das conversas por início (score = timestamp em segundos)
+CONVERSATIONS_BY_TIME = "conversations:by_time"
+
+CONVERSATION_COLUMNS = [
+    "conversation_id", "customer", "customer_phone", "timestamp", "last_timestamp", "message_count", "status",
+]
+
+# Status da conversa conforme quem enviou a última mensagem
+STATUS_BY_DIRECTION = {"inbound": "Pendente", "outbound": "Resolvido"}
+
+# Atualiza a conversa do cliente em O(1): continua a sessão atual ou abre uma nova
+# se o intervalo desde a última mensagem passou de SESSION_GAP.
+# Mensagens fora de ordem dentro da sessão atual só incrementam a contagem.
+# Os contadores da visão geral (conversas e resolvidas por hora/dia do início) são
+# atualizados junto: +1 conversa ao abrir, +-1 resolvida quando o status muda.
+# O telefone é resolvido no índice de clientes, que acumula conversas e mensagens por cliente.
+# Todas as chaves tocadas vêm em KEYS: a conversa atual é lida antes pelo cliente e, se o
+# ponteiro mudou nesse intervalo, o script não altera nada e retorna false (nova tentativa).
+# KEYS: 1 sessão atual, 2 índice por início, 3 versão, 4 conversa atual, 5 conversa nova,
+# 6-7 conversas por dia/hora, 8-9 resolvidas por dia/hora, 10 totais, 11 aliases,
+# 12 próximo id de cliente, 13-15 message_count/conversation_count/name dos clientes, 16 log de saída,
+# 17 marca de mensagem vista, 18 fila de entrada
+_RECORD_LUA = RESOLVE_LUA + """
+local function rollup(start, day_key, hour_key, field, amount)
+    redis.call('HINCRBY', day_key, math.floor(start / 86400), amount)
+    redis.call('HINCRBY', hour_key, math.floor(start / 3600), amount)
+    redis.call('HINCRBY', KEYS[10], field, amount)
+end
+
+local current = redis.call('HMGET', KEYS[1], 'conversation_id', 'last_timestamp')
+if (current[1] or '') ~= ARGV[6] then
+    return false
+end
+if ARGV[12] ~= '' then
+    -- Mensagem recebida pelo webhook: marca como vista e enfileira junto com o registro na conversa;
+    -- uma reentrega já vista não altera nada
+    if not redis.call('SET', KEYS[17], 1, 'NX', 'EX', ARGV[12]) then
+        return ''
+    end
+    redis.call('XADD', KEYS[18], 'MAXLEN', '~', ARGV[11], '*', 'data', ARGV[13])
+end
+local ts = tonumber(ARGV[2])
+local id = current[1]
+local key = KEYS[4]
+local new_session = (not id) or ts - tonumber(current[2]) > tonumber(ARGV[3])
+if new_session then
+    id = ARGV[7]
+    key = KEYS[5]
+    redis.call('HSET', key, 'conversation_id', id, 'customer_phone', ARGV[1],
+               'customer', ARGV[1], 'timestamp', ts, 'last_timestamp', ts, 'message_count', 0)
+    redis.call('ZADD', KEYS[2], ts, id)
+    redis.call('HSET', KEYS[1], 'conversation_id', id, 'last_timestamp', ts)
+    rollup(ts, KEYS[6], KEYS[7], 'conversations', 1)
+end
+redis.call('HINCRBY', key, 'message_count', 1)
+if ts >= tonumber(redis.call('HGET', KEYS[1], 'last_timestamp')) then
+    local previous = redis.call('HGET', key, 'status')
+    redis.call('HSET', KEYS[1], 'last_timestamp', ts)
+    redis.call('HSET', key, 'last_timestamp', ts, 'status', ARGV[4])
+    if previous ~= ARGV[4] and (previous == 'Resolvido' or ARGV[4] == 'Resolvido') then
+        local amount = ARGV[4] == 'Resolvido' and 1 or -1
+        rollup(tonumber(redis.call('HGET', key, 'timestamp')), KEYS[8], KEYS[9], 'resolved', amount)
+    end
+end
+if ARGV[5] ~= '' then
+    redis.call('HSET', key, 'customer', ARGV[5])
+end
+
+local customer_id = resolve(KEYS[11], KEYS[12], ARGV[14], ARGV[9], {ARGV[8]})
+redis.call('HSET', key, 'customer_id', customer_id)
+redis.call('HINCRBY', KEYS[13], customer_id, 1)
+if new_session then
+    redis.call('HINCRBY', KEYS[14], customer_id, 1)
+end
+redis.call('HSETNX', KEYS[15], customer_id, ARGV[5] ~= '' and ARGV[5] or ARGV[1])
+if ARGV[10] ~= '' then
+    redis.call('XADD', KEYS[16], 'MAXLEN', '~', ARGV[11], '*', 'data', ARGV[10])
+end
+redis.call('INCR', KEYS[3])
+return id
+"""
+_RECORD_SCRIPT = Script(None, _RECORD_LUA.encode())
+_ASYNC_RECORD_SCRIPT = AsyncScript(None, _RECORD_LUA.encode())
+
+# Tentativas quando a conversa atual muda entre a leitura do ponteiro e o script
+RECORD_ATTEMPTS = 5
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _record_call(message, direction, gap, current_id, dedup_ttl=None, maxlen=QUEUE_MAXLEN):
+    """KEYS e ARGV do script de registro, dada a conversa atual lida do ponteiro"""
+    phone = message["from"]
+    ts = int(float(message["timestamp"]))
+    new_id = f"w{phone}-{ts}"
+    strong, name_alias = customer_aliases(phone=phone, name=message.get("name"))
+    keys = [
+        CURRENT_SESSION_KEY.format(phone), CONVERSATIONS_BY_TIME, DATA_VERSION_KEY.format("conversations"),
+        CONVERSATION_KEY.format(current_id or new_id), CONVERSATION_KEY.format(new_id),
+        ROLLUP_KEY.format("day", "conversations"), ROLLUP_KEY.format("hour", "conversations"),
+        ROLLUP_KEY.format("day", "resolved"), ROLLUP_KEY.format("hour", "resolved"), ROLLUP_TOTAL,
+        CUSTOMER_ALIASES, CUSTOMER_NEXT_ID, CUSTOMER_FIELD_KEY.format("message_count"),
+        CUSTOMER_FIELD_KEY.format("conversation_count"), CUSTOMER_FIELD_KEY.format("name"), OUTBOUND_LOG,
+        SEEN_KEY.format(message.get("message_id")), INBOUND_QUEUE,
+    ]
+    # As respostas enviadas também vão para o log de saída, fonte do backfill junto com a fila de entrada
+    logged = json.dumps(dict(message, timestamp=ts)) if direction == "outbound" else ""
+    args = [phone, ts, gap, STATUS_BY_DIRECTION[direction], message.get("name") or "", current_id or "", new_id,
+            strong[0], name_alias, logged, maxlen,
+            dedup_ttl or "", json.dumps(message) if dedup_ttl else "", "1" if MATCH_CUSTOMER_NAME else "0"]
+    return keys, args
+
+
+def record_message(redis_client, message, direction="inbound", gap=SESSION_GAP, dedup_ttl=None,
+                   maxlen=QUEUE_MAXLEN):
+    """Registra uma mensagem na conversa do cliente e retorna o id da conversa.
+
+    Funciona com clientes síncronos e redis.asyncio (neste caso, o resultado deve ser aguardado).
+    `message` segue o formato de `extract_messages` (from, timestamp em segundos, name).
+    Com `dedup_ttl`, a mensagem recebida também é marcada como vista (por `dedup_ttl` segundos)
+    e enfileirada em INBOUND_QUEUE na mesma operação; retorna None se ela já tinha sido vista.
+    """
+    options = {"dedup_ttl": dedup_ttl, "maxlen": maxlen}
+    if isinstance(redis_client, aioredis.Redis):
+        return _record_message_async(redis_client, message, direction, gap, options)
+    session_key = CURRENT_SESSION_KEY.format(message["from"])
+    for _ in range(RECORD_ATTEMPTS):
+        current_id = _decode(redis_client.hget(session_key, "conversation_id"))
+        keys, args = _record_call(message, direction, gap, current_id, **options)
+        conversation_id = _RECORD_SCRIPT(keys=keys, args=args, client=redis_client)
+        if conversation_id is not None:
+            return _decode(conversation_id) or None
+    raise redis.exceptions.WatchError(f"Conversa de {message['from']} alterada durante o registro")
+
+
+async def _record_message_async(redis_client, message, direction, gap, options):
+    session_key = CURRENT_SESSION_KEY.format(message["from"])
+    for _ in range(RECORD_ATTEMPTS):
+        current_id = _decode(await redis_client.hget(session_key, "conversation_id"))
+        keys, args = _record_call(message, direction, gap, current_id, **options)
+        conversation_id = await _ASYNC_RECORD_SCRIPT(keys=keys, args=args, client=redis_client)
+        if conversation_id is not None:
+            return _decode(conversation_id) or None
+    raise redis.exceptions.WatchError(f"Conversa de {message['from']} alterada durante o registro")
+
+
+def sessionize(messages, gap=SESSION_GAP):
+    """Agrupa mensagens (com "direction") em conversas por cliente e intervalo de inatividade.
+
+    Usado apenas no backfill; produz os mesmos ids que `record_message`.
+    """
+    # No mesmo segundo, a resposta vem depois da mensagem que ela responde
+    ordered = sorted(messages, key=lambda m: (
+        m["from"], int(float(m["timestamp"])), m.get("direction", "inbound") == "outbound",
+    ))
+    conversations = []
+    current = None
+    for message in ordered:
+        ts = int(float(message["timestamp"]))
+        if current is None or current["customer_phone"] != message["from"] or ts - current["last_timestamp"] > gap:
+            current = {
+                "conversation_id": f"w{message['from']}-{ts}",
+                "customer_phone": message["from"],
+                "customer": message["from"],
+                "timestamp": ts,
+                "last_timestamp": ts,
+                "message_count": 0,
+            }
+            conversations.append(current)
+        current["message_count"] += 1
+        current["last_timestamp"] = ts
+        current["status"] = STATUS_BY_DIRECTION[message.get("direction", "inbound")]
+        if message.get("name"):
+            current["customer"] = message["name"]
+    return conversations
+
+
+def backfill_conversations(redis_client, messages, gap=SESSION_GAP):
+    """Recalcula as conversas a partir das mensagens brutas e retorna quantas foram recalculadas.
+
+    Só as conversas com atividade a partir da mensagem mais antiga recebida são substituídas:
+    as anteriores, cujas mensagens já saíram dos streams pelo MAXLEN, são mantidas.
+    """
+    conversations = sessionize(messages, gap=gap)
+    if not conversations:
+        return 0
+    since = pd.to_datetime(min(conversation["timestamp"] for conversation in conversations), unit="s")
+    existing = load_conversations(redis_client)
+    stale = existing[existing["last_timestamp"] >= since]
+
+    pipe = redis_client.pipeline(transaction=False)
+    for conversation_id, phone in zip(stale["conversation_id"], stale["customer_phone"]):
+        pipe.delete(CONVERSATION_KEY.format(conversation_id), CURRENT_SESSION_KEY.format(phone))
+        pipe.zrem(CONVERSATIONS_BY_TIME, conversation_id)
+    for conversation in conversations:
+        pipe.hset(CONVERSATION_KEY.format(conversation["conversation_id"]), mapping=conversation)
+        pipe.zadd(CONVERSATIONS_BY_TIME, {conversation["conversation_id"]: conversation["timestamp"]})
+        # A última conversa de cada cliente continua recebendo as próximas mensagens
+        pipe.hset(CURRENT_SESSION_KEY.format(conversation["customer_phone"]), mapping={
+            "conversation_id": conversation["conversation_id"],
+            "last_timestamp": conversation["last_timestamp"],
+        })
+    pipe.incr(DATA_VERSION_KEY.format("conversations"))
+    pipe.execute()
+    rebuilt = load_conversations(redis_client)
+    rebuild_conversation_rollups(redis_client, rebuilt)
+    rebuild_customer_conversations(redis_client, rebuilt)
+    return len(conversations)
+
+
+def _iter_stream(redis_client, key, direction, batch_size=1000):
+    min_id = "-"
+    while True:
+        entries = redis_client.xrange(key, min=min_id, count=batch_size)
+        for _, fields in entries:
+            value = fields.get(b"data") or fields.get("data")
+            yield dict(json.loads(value), direction=direction)
+        if len(entries) < batch_size:
+            return
+        min_id = "(" + _decode(entries[-1][0])
+
+
+def iter_queued_messages(redis_client, batch_size=1000):
+    """Mensagens recebidas ainda presentes na fila de entrada"""
+    return _iter_stream(redis_client, INBOUND_QUEUE, "inbound", batch_size)
+
+
+def iter_sent_messages(redis_client, batch_size=1000):
+    """Respostas enviadas ainda presentes no log de saída"""
+    return _iter_stream(redis_client, OUTBOUND_LOG, "outbound", batch_size)
+
+
+def load_conversations(redis_client, start=None, end=None, batch_size=1000):
+    """Carrega as conversas iniciadas no intervalo (segundos ou None) no esquema da página Conversas"""
+    ids = redis_client.zrangebyscore(
+        CONVERSATIONS_BY_TIME, "-inf" if start is None else start, "+inf" if end is None else end
+    )
+    rows = []
+    for i in range(0, len(ids), batch_size):
+        pipe = redis_client.pipeline(transaction=False)
+        for conversation_id in ids[i:i + batch_size]:
+            if isinstance(conversation_id, bytes):
+                conversation_id = conversation_id.decode()
+            pipe.hgetall(CONVERSATION_KEY.format(conversation_id))
+        for values in pipe.execute():
+            if values:
+                rows.append({
+                    (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                    for k, v in values.items()
+                })
+
+    df = pd.DataFrame(rows, columns=CONVERSATION_COLUMNS)
+    df['timestamp'] = pd.to_datetime(pd.to_numeric(df['timestamp']), unit='s')
+    df['last_timestamp'] = pd.to_datetime(pd.to_numeric(df['last_timestamp']), unit='s')
+    return typed_conversations(df)
+
+
+def main():
+    """Backfill das conversas a partir das mensagens recebidas e das respostas enviadas"""
+    client = get_redis_client()
+    try:
+        messages = itertools.chain(iter_queued_messages(client), iter_sent_messages(client))
+        total = backfill_conversations(client, messages)
+    except redis.exceptions.RedisError as e:
+        raise SystemExit(f"Erro ao recalcular as conversas: {e}")
+    print(f"{total} conversas recalculadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import hashlib
+import hmac
+import json
+import os
+
+import redis.asyncio as aioredis
+from aiohttp import web
+
+from ..crm.connection import redis_url_from_env
+from .queue import InboundQueue, extract_messages
+
+
+def verify_signature(body, signature, app_secret):
+    """Confere X-Hub-Signature-256 ("sha256=<hex>") com o segredo do app da Meta"""
+    expected = "sha256=" + hmac.new(app_secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+class WhatsAppWebhook:
+    """Endpoint do webhook do WhatsApp: verificação da Meta e recebimento de mensagens.
+
+    Cada callback só é respondido depois que as mensagens estão na fila do Redis
+    (uma chamada de script por mensagem), para que nenhuma se perca; o
+    processamento pela crew fica com os workers.
+    """
+
+    def __init__(self, queue, verify_token=None, app_secret=None):
+        self.queue = queue
+        self.verify_token = verify_token or os.getenv("WEBHOOK_VERIFY_TOKEN", "")
+        # Opcional: com o segredo do app configurado, callbacks sem assinatura válida são recusados
+        self.app_secret = app_secret if app_secret is not None else os.getenv("WHATSAPP_APP_SECRET", "")
+
+    async def verify(self, request):
+        query = request.query
+        if query.get("hub.mode") == "subscribe" and self.verify_token and query.get("hub.verify_token") == self.verify_token:
+            return web.Response(text=query.get("hub.challenge", ""))
+        return web.Response(status=403, text="forbidden")
+
+    async def receive(self, request):
+        body = await request.read()
+        if self.app_secret and not verify_signature(body, request.headers.get("X-Hub-Signature-256"), self.app_secret):
+            return web.Response(status=401, text="invalid signature")
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            return web.Response(status=400, text="invalid payload")
+
+        messages = extract_messages(payload)
+        # Reentregas já vistas não entram na fila nem contam de novo na conversa
+        await self.queue.enqueue(messages)
+        return web.Response(status=200, text="EVENT_RECEIVED")
+
+
+def create_app(redis_client=None, verify_token=None, app_secret=None):
+    """Aplicação aiohttp com GET/POST /webhooks/whatsapp"""
+    redis_client = redis_client or aioredis.from_url(redis_url_from_env())
+    webhook = WhatsAppWebhook(InboundQueue(redis_client), verify_token=verify_token, app_secret=app_secret)
+    app = web.Application()
+    app.router.add_get("/webhooks/whatsapp", webhook.verify)
+    app.router.add_post("/webhooks/whatsapp", webhook.receive)
+    return app
+
+
+def run():
+    """Inicia o webhook do WhatsApp (porta em WHATSAPP_WEBHOOK_PORT)"""
+    web.run_app(create_app(), port=int(os.getenv("WHATSAPP_WEBHOOK_PORT", "8080")), access_log=None)
+
+
+if __name__ == "__main__":
+    run()
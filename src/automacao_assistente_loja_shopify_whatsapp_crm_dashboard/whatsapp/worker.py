@@ -0,0 +1,62 @@
+import logging
+import os
+import socket
+import threading
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crew import AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.connection import get_redis_client
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.stream import consume_stream
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.queue import INBOUND_QUEUE, WORKER_GROUP
+
+# Tempo sem confirmação após o qual a mensagem de um worker parado é assumida por outro
+CLAIM_IDLE_MS = int(os.getenv("WHATSAPP_CLAIM_IDLE_MS", "300000"))
+# Tentativas de uma mensagem antes de ir para o dead-letter (whatsapp:inbound:dead)
+MAX_DELIVERIES = int(os.getenv("WHATSAPP_MAX_DELIVERIES", "3"))
+
+
+def crew_inputs(message):
+    """Entradas da crew para uma mensagem recebida"""
+    return {
+        'customer_message': message.get("text", ""),
+        'customer_phone': message.get("from", ""),
+        'customer_name': message.get("name") or "",
+        'SHOPIFY_SHOP_URL': os.getenv("SHOPIFY_SHOP_URL", ""),
+        'SHOPIFY_ACCESS_TOKEN': os.getenv("SHOPIFY_ACCESS_TOKEN", ""),
+        'SHOPIFY_API_KEY': os.getenv("SHOPIFY_API_KEY", ""),
+        'SHOPIFY_API_SECRET': os.getenv("SHOPIFY_API_SECRET", ""),
+    }
+
+
+def process_messages(messages):
+    """Executa a crew para cada mensagem do lote (a resposta é registrada na conversa ao ser enviada)"""
+    for message in messages:
+        if message.get("type") != "text":
+            continue
+        # Classificação primeiro; depois só as consultas relevantes ao Shopify, em paralelo
+        AutomacaoAssistenteLojaShopifyWhatsappCRMDashboardCrew().kickoff_reply(inputs=crew_inputs(message))
+
+
+def run_worker(index, stop_event=None):
+    # Uma mensagem por lote: a falha de uma mensagem (crew, LLM, Shopify) não afeta as outras
+    consumer = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    consume_stream(
+        get_redis_client(), INBOUND_QUEUE, WORKER_GROUP, consumer, process_messages,
+        batch_size=1, min_idle_ms=CLAIM_IDLE_MS, stop_event=stop_event, max_deliveries=MAX_DELIVERIES,
+    )
+
+
+def run():
+    """Inicia WHATSAPP_WORKERS workers consumindo a fila de mensagens recebidas"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s %(message)s")
+    workers = [
+        threading.Thread(target=run_worker, args=(i,), daemon=True)
+        for i in range(int(os.getenv("WHATSAPP_WORKERS", "4")))
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    run()
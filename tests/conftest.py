@@ -0,0 +1,8 @@
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def redis_client():
+    """Redis em memória (com suporte a Lua), limpo a cada teste"""
+    return fakeredis.FakeRedis()
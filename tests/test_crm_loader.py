@@ -0,0 +1,80 @@
+import pandas as pd
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.loader import IncrementalCRMLoader
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.store import (
+    CHANGES_INDEX,
+    DATA_VERSION_KEY,
+    changed_since,
+    save_interaction,
+    save_interactions,
+)
+
+
+def interaction(interaction_id, status="Pendente", timestamp="2024-03-05 10:00:00"):
+    return {
+        "interaction_id": interaction_id,
+        "customer": "Maria Silva",
+        "customer_phone": "5511999990000",
+        "type": "whatsapp",
+        "status": status,
+        "timestamp": timestamp,
+    }
+
+
+def version(redis_client):
+    return int(redis_client.get(DATA_VERSION_KEY.format("crm")))
+
+
+def test_changes_share_the_sequence_of_the_write(redis_client):
+    save_interactions(redis_client, [interaction("a"), interaction("b"), interaction("c")])
+    save_interaction(redis_client, interaction("a", status="Resolvido"))
+
+    # Cada escrita reserva a próxima sequência e a registra junto no log de alterações
+    assert version(redis_client) == 4
+    assert redis_client.zcard(CHANGES_INDEX) == 3
+    assert changed_since(redis_client, 0) == [("b", 2), ("c", 3), ("a", 4)]
+    assert changed_since(redis_client, 3) == [("a", 4)]
+    assert changed_since(redis_client, 4) == []
+
+
+def test_incremental_loader_picks_up_new_writes(redis_client):
+    loader = IncrementalCRMLoader()
+    save_interactions(redis_client, [interaction("a"), interaction("b")])
+    assert sorted(loader.load(redis_client)["interaction_id"]) == ["a", "b"]
+
+    save_interaction(redis_client, interaction("c", timestamp="2024-03-06 09:00:00"))
+    save_interaction(redis_client, interaction("a", status="Resolvido"))
+    frame = loader.load(redis_client, version=version(redis_client))
+
+    assert sorted(frame["interaction_id"]) == ["a", "b", "c"]
+    statuses = dict(zip(frame["interaction_id"], frame["status"].astype(str)))
+    assert statuses == {"a": "Resolvido", "b": "Pendente", "c": "Pendente"}
+
+
+def test_incremental_loader_drops_writes_that_leave_the_filter(redis_client):
+    loader = IncrementalCRMLoader()
+    save_interactions(redis_client, [interaction("a"), interaction("b")])
+    assert sorted(loader.load(redis_client, statuses=["Pendente"])["interaction_id"]) == ["a", "b"]
+
+    save_interaction(redis_client, interaction("a", status="Resolvido"))
+    frame = loader.load(redis_client, statuses=["Pendente"], version=version(redis_client))
+    assert frame["interaction_id"].tolist() == ["b"]
+
+
+def test_incremental_loader_accepts_timestamps_with_time_zone(redis_client):
+    loader = IncrementalCRMLoader()
+    save_interaction(redis_client, interaction("a"))
+    loader.load(redis_client, start="2024-03-01", end="2024-03-31")
+
+    save_interaction(redis_client, interaction("b", timestamp="2024-03-06T10:00:00Z"))
+    save_interaction(redis_client, interaction("c", timestamp="2024-03-06T10:00:00-03:00"))
+    frame = loader.load(redis_client, start="2024-03-01", end="2024-03-31", version=version(redis_client))
+
+    timestamps = dict(zip(frame["interaction_id"], frame["timestamp"]))
+    assert timestamps == {
+        "a": pd.Timestamp("2024-03-05 10:00:00"),
+        "b": pd.Timestamp("2024-03-06 10:00:00"),
+        "c": pd.Timestamp("2024-03-06 13:00:00"),
+    }
+    # Rerun sem escritas novas: o DataFrame guardado continua utilizável
+    assert len(loader.load(redis_client, start="2024-03-01", end="2024-03-31", version=version(redis_client))) == 3
@@ -0,0 +1,21 @@
+import json
+
+from app import TemporaryStorage
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.loader import load_interactions
+
+
+def test_load_interactions_from_temporary_storage():
+    storage = TemporaryStorage()
+    for interaction_id, status, timestamp in [
+        ("i1", "Resolvido", "2023-06-01 09:30:00"),
+        ("i2", "Pendente", "2023-06-02 14:00:00"),
+        ("i3", "Pendente", "2023-06-05 10:30:00"),
+    ]:
+        storage.set(f"interaction:{interaction_id}", json.dumps({
+            "interaction_id": interaction_id, "customer": "Ana Costa", "status": status, "timestamp": timestamp,
+        }))
+
+    assert sorted(load_interactions(storage)["interaction_id"]) == ["i1", "i2", "i3"]
+    frame = load_interactions(storage, start="2023-06-02", end="2023-06-04", statuses=["Pendente"])
+    assert frame["interaction_id"].tolist() == ["i2"]
@@ -0,0 +1,60 @@
+import threading
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.log_writer import InteractionLogWriter
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.stream import STREAM_KEY, StreamCRMLoader
+
+
+def writer(redis_client, **options):
+    return InteractionLogWriter(redis_client, backend="stream", batch_size=10, flush_interval=0.05, **options)
+
+
+def flush(log_writer, timeout=5.0):
+    """flush() em outra thread; retorna False se ele não terminou no tempo"""
+    thread = threading.Thread(target=log_writer.flush, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_writes_queued_interactions_in_batches(redis_client):
+    log_writer = writer(redis_client)
+    for index in range(25):
+        log_writer.log({"interaction_id": str(index), "customer": "Maria Silva", "status": "Pendente"})
+
+    assert flush(log_writer)
+    assert log_writer.written == 25
+    assert sorted(StreamCRMLoader().load(redis_client)["interaction_id"], key=int) == [str(i) for i in range(25)]
+    log_writer.close()
+
+
+def test_poisoned_interaction_is_dropped_and_the_rest_written(redis_client):
+    log_writer = writer(redis_client)
+    log_writer.log({"interaction_id": "a", "status": "Pendente"})
+    # Não serializável em JSON: falha fora do Redis
+    log_writer.log({"interaction_id": "b", "status": "Pendente", "response": object()})
+    log_writer.log({"interaction_id": "c", "status": "Pendente"})
+
+    assert flush(log_writer)
+    assert (log_writer.written, log_writer.failed) == (2, 1)
+    assert sorted(StreamCRMLoader().load(redis_client)["interaction_id"]) == ["a", "c"]
+
+    # A thread continua gravando depois da falha
+    log_writer.log({"interaction_id": "d", "status": "Pendente"})
+    assert flush(log_writer)
+    assert redis_client.xlen(STREAM_KEY) == 3
+    log_writer.close()
+
+
+def test_flush_returns_after_a_failing_write(redis_client):
+    log_writer = writer(redis_client)
+
+    def failing_write(client, interactions):
+        raise ValueError("falha inesperada")
+
+    log_writer.write = failing_write
+    log_writer.log({"interaction_id": "a", "status": "Pendente"})
+
+    assert flush(log_writer)
+    assert log_writer.failed == 1
+    assert log_writer._thread.is_alive()
+    log_writer.close()
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.order_index import (
+    index_orders,
+    lookup_orders,
+    order_index_ready,
+    rebuild_order_index,
+)
+
+
+def orders(*rows):
+    return pd.DataFrame(
+        [
+            {
+                "order_id": order_id,
+                "customer": customer,
+                "value": 100.0,
+                "date": pd.Timestamp(date),
+                "status": "Pago",
+                "customer_id": None,
+                "email": email,
+                "phone": phone,
+            }
+            for order_id, customer, email, phone, date in rows
+        ]
+    )
+
+
+ORDERS = orders(
+    ("1001", "Maria da Silva", "maria@example.com", "+55 11 99999-0000", "2024-03-01"),
+    ("1002", "Maria da Silva", "maria@example.com", None, "2024-03-05"),
+    ("1003", "João Silva", "joao@example.com", "5521988880000", "2024-03-03"),
+)
+
+
+def numbers(summaries):
+    return [summary["order_number"] for summary in summaries]
+
+
+def test_lookup_before_the_index_is_built(redis_client):
+    index_orders(redis_client, ORDERS)
+    assert not order_index_ready(redis_client)
+    assert lookup_orders(redis_client, order_number="1001") is None
+
+
+def test_lookup_by_each_identifier(redis_client):
+    rebuild_order_index(redis_client, ORDERS)
+    assert order_index_ready(redis_client)
+
+    assert numbers(lookup_orders(redis_client, order_number="#1003")) == ["#1003"]
+    assert numbers(lookup_orders(redis_client, email="MARIA@example.com")) == ["#1002", "#1001"]
+    assert numbers(lookup_orders(redis_client, phone="5511999990000")) == ["#1001"]
+    # Palavras do nome sem acentos e sem partículas, em interseção
+    assert numbers(lookup_orders(redis_client, name="joão silva")) == ["#1003"]
+    assert numbers(lookup_orders(redis_client, name="Silva")) == ["#1002", "#1003", "#1001"]
+    assert numbers(lookup_orders(redis_client, email="maria@example.com", limit=1)) == ["#1002"]
+    assert lookup_orders(redis_client, order_number="9999") == []
+    assert lookup_orders(redis_client, email="outra@example.com") == []
+
+
+def test_changed_identifiers_are_removed_from_the_index(redis_client):
+    rebuild_order_index(redis_client, ORDERS)
+    index_orders(redis_client, orders(
+        ("1001", "Maria Souza", "maria.souza@example.com", None, "2024-03-01"),
+    ))
+
+    assert numbers(lookup_orders(redis_client, email="maria@example.com")) == ["#1002"]
+    assert lookup_orders(redis_client, phone="5511999990000") == []
+    assert numbers(lookup_orders(redis_client, email="maria.souza@example.com")) == ["#1001"]
+    assert numbers(lookup_orders(redis_client, name="maria souza")) == ["#1001"]
+    assert lookup_orders(redis_client, order_number="1001")[0]["customer"] == "Maria Souza"
@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+
+import fakeredis
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.customers import (
+    CUSTOMER_FIELD_KEY,
+    rebuild_customer_conversations,
+)
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.queue import (
+    INBOUND_QUEUE,
+    OUTBOUND_LOG,
+    InboundQueue,
+)
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.whatsapp.sessions import (
+    backfill_conversations,
+    iter_queued_messages,
+    iter_sent_messages,
+    load_conversations,
+    record_message,
+    sessionize,
+)
+
+PHONE = "5511999990000"
+GAP = 1800
+
+
+def receive(redis_client, timestamp, name="Maria"):
+    """Mensagem recebida como o webhook a registra: na fila de entrada e na conversa"""
+    message = {"from": PHONE, "timestamp": str(timestamp), "name": name}
+    redis_client.xadd(INBOUND_QUEUE, {"data": json.dumps(message)})
+    return record_message(redis_client, message, gap=GAP)
+
+
+def reply(redis_client, timestamp):
+    return record_message(redis_client, {"from": PHONE, "timestamp": timestamp}, direction="outbound", gap=GAP)
+
+
+def conversations(redis_client):
+    frame = load_conversations(redis_client)
+    return {
+        row["conversation_id"]: (row["message_count"], str(row["status"]))
+        for row in frame.to_dict("records")
+    }
+
+
+def test_record_message_opens_a_new_conversation_after_the_gap(redis_client):
+    assert receive(redis_client, 1000) == f"w{PHONE}-1000"
+    assert reply(redis_client, 1010) == f"w{PHONE}-1000"
+    assert receive(redis_client, 1010 + GAP + 1) == f"w{PHONE}-{1010 + GAP + 1}"
+
+    assert conversations(redis_client) == {
+        f"w{PHONE}-1000": (2, "Resolvido"),
+        f"w{PHONE}-{1010 + GAP + 1}": (1, "Pendente"),
+    }
+    assert redis_client.hgetall("rollup:total") == {b"conversations": b"2", b"resolved": b"1"}
+    # A resposta enviada fica no log de saída, usado pelo backfill
+    assert redis_client.xlen(OUTBOUND_LOG) == 1
+
+
+def test_record_message_with_async_client():
+    redis_client = fakeredis.FakeAsyncRedis()
+    conversation_id = asyncio.run(record_message(redis_client, {"from": PHONE, "timestamp": 1000}))
+    assert conversation_id == f"w{PHONE}-1000"
+
+
+def test_sessionize_matches_record_message():
+    messages = [
+        {"from": PHONE, "timestamp": 1000, "direction": "inbound"},
+        {"from": PHONE, "timestamp": 1000, "direction": "outbound"},
+        {"from": PHONE, "timestamp": 5000, "direction": "inbound"},
+        {"from": "5521988880000", "timestamp": 1200, "direction": "inbound"},
+    ]
+    result = {
+        conversation["conversation_id"]: (conversation["message_count"], conversation["status"])
+        for conversation in sessionize(messages, gap=GAP)
+    }
+    assert result == {
+        f"w{PHONE}-1000": (2, "Resolvido"),
+        f"w{PHONE}-5000": (1, "Pendente"),
+        "w5521988880000-1200": (1, "Pendente"),
+    }
+
+
+def test_backfill_replays_received_and_sent_messages(redis_client):
+    receive(redis_client, 1000)
+    reply(redis_client, 1010)
+    receive(redis_client, 5000)
+    live = conversations(redis_client)
+    live_rollups = redis_client.hgetall("rollup:total")
+
+    messages = itertools.chain(iter_queued_messages(redis_client), iter_sent_messages(redis_client))
+    assert backfill_conversations(redis_client, messages, gap=GAP) == 2
+
+    assert conversations(redis_client) == live
+    assert redis_client.hgetall("rollup:total") == live_rollups
+    # A conversa atual do cliente continua recebendo mensagens
+    assert receive(redis_client, 5100) == f"w{PHONE}-5000"
+
+
+def test_backfill_keeps_conversations_older_than_the_streams(redis_client):
+    # Conversa antiga cujas mensagens já saíram dos streams pelo MAXLEN
+    record_message(redis_client, {"from": PHONE, "timestamp": 100}, gap=GAP)
+    reply(redis_client, 110)
+    redis_client.delete(OUTBOUND_LOG)
+    receive(redis_client, 9000)
+
+    messages = itertools.chain(iter_queued_messages(redis_client), iter_sent_messages(redis_client))
+    assert backfill_conversations(redis_client, messages, gap=GAP) == 1
+    assert conversations(redis_client) == {
+        f"w{PHONE}-100": (2, "Resolvido"),
+        f"w{PHONE}-9000": (1, "Pendente"),
+    }
+
+
+def test_enqueue_records_the_conversation_with_the_dedup_mark():
+    server = fakeredis.FakeServer()
+    redis_client = fakeredis.FakeAsyncRedis(server=server)
+    queue = InboundQueue(redis_client, dedup_ttl=60)
+    message = {"from": PHONE, "timestamp": "1000", "name": "Maria", "message_id": "wamid.1"}
+
+    assert asyncio.run(queue.enqueue([message])) == [message]
+    # Reentrega do mesmo id: não enfileira nem conta de novo na conversa
+    assert asyncio.run(queue.enqueue([dict(message, timestamp="1010")])) == []
+
+    assert asyncio.run(redis_client.xlen(INBOUND_QUEUE)) == 1
+    assert conversations(fakeredis.FakeRedis(server=server)) == {f"w{PHONE}-1000": (1, "Pendente")}
+
+
+def test_record_message_does_not_merge_customers_with_the_same_name(redis_client):
+    record_message(redis_client, {"from": PHONE, "timestamp": 1000, "name": "Maria"}, gap=GAP)
+    record_message(redis_client, {"from": "5511888880000", "timestamp": 1000, "name": "Maria"}, gap=GAP)
+    assert len(redis_client.hgetall(CUSTOMER_FIELD_KEY.format("message_count"))) == 2
+
+    rebuild_customer_conversations(redis_client, load_conversations(redis_client))
+    assert len(redis_client.hgetall(CUSTOMER_FIELD_KEY.format("message_count"))) == 2
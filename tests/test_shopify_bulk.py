@@ -0,0 +1,17 @@
+import pytest
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.bulk import orders_search
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.orders import iter_orders_frames
+
+
+def test_orders_search_limits_the_date_field():
+    assert orders_search() == ""
+    assert orders_search(since="2024-03-01T00:00:00Z") == '(query: "created_at:>=2024-03-01T00:00:00+00:00")'
+    assert orders_search(since="2024-03-01", until="2024-03-31", date_field="updated_at") == (
+        '(query: "updated_at:>=2024-03-01T00:00:00 AND updated_at:<=2024-03-31T00:00:00")'
+    )
+
+
+def test_bulk_mode_rejects_rest_only_options():
+    with pytest.raises(ValueError, match="concurrency"):
+        next(iter_orders_frames(mode="bulk", concurrency=8))
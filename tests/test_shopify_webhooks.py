@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.cache import OrderCache
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.shopify.webhooks import (
+    ORDER_QUEUE,
+    create_app,
+    sign_webhook,
+    verify_webhook,
+)
+
+SECRET = "segredo"
+
+ORDER = {
+    "id": 450789469,
+    "order_number": 1001,
+    "email": "maria@example.com",
+    "total_price": "199.90",
+    "created_at": "2024-03-05T10:00:00-03:00",
+    "fulfillment_status": None,
+    "cancelled_at": None,
+    "customer": {"id": 207119551, "first_name": "Maria", "last_name": "Silva", "email": "maria@example.com"},
+}
+
+
+def post_orders(app, *requests):
+    """Envia os webhooks e encerra a aplicação (gravando o que estiver na fila); retorna os status"""
+    async def run():
+        async with TestClient(TestServer(app)) as client:
+            statuses = []
+            for body, headers in requests:
+                response = await client.post("/webhooks/shopify/orders", data=body, headers=headers)
+                statuses.append(response.status)
+            return statuses
+    return asyncio.run(run())
+
+
+def signed(order, topic="orders/create", secret=SECRET):
+    body = json.dumps(order).encode()
+    return body, {
+        "X-Shopify-Hmac-Sha256": sign_webhook(body, secret),
+        "X-Shopify-Topic": topic,
+        "Content-Type": "application/json",
+    }
+
+
+def test_verify_webhook_rejects_tampered_body():
+    body = json.dumps(ORDER).encode()
+    signature = sign_webhook(body, SECRET)
+    assert verify_webhook(body, signature, SECRET)
+    assert not verify_webhook(body + b" ", signature, SECRET)
+    assert not verify_webhook(body, signature, "outro")
+    assert not verify_webhook(body, None, SECRET)
+
+
+def test_signed_order_is_written_to_cache(tmp_path, redis_client):
+    cache = OrderCache(root=str(tmp_path), redis_client=redis_client)
+    app = create_app(order_cache=cache, redis_client=redis_client, secret=SECRET)
+
+    updated = dict(ORDER, fulfillment_status="fulfilled")
+    statuses = post_orders(app, signed(ORDER), signed(updated, topic="orders/updated"))
+
+    assert statuses == [200, 200]
+    orders = cache.load()
+    assert orders["order_id"].tolist() == ["1001"]
+    assert orders["status"].tolist() == ["Enviado"]
+    assert orders["value"].tolist() == [199.9]
+    # Gravados e retirados da fila; a versão dos pedidos invalida os caches
+    assert redis_client.xlen(ORDER_QUEUE) == 0
+    assert int(redis_client.get("dashboard:version:orders")) >= 1
+
+
+def test_invalid_signature_is_rejected(tmp_path, redis_client):
+    cache = OrderCache(root=str(tmp_path), redis_client=redis_client)
+    app = create_app(order_cache=cache, redis_client=redis_client, secret=SECRET)
+
+    body, headers = signed(ORDER, secret="outro")
+    assert post_orders(app, (body, headers)) == [401]
+    assert redis_client.xlen(ORDER_QUEUE) == 0
+    assert cache.load().empty
+
+
+def test_queued_order_survives_failed_write(tmp_path, redis_client):
+    class FailingCache(OrderCache):
+        def upsert(self, orders):
+            raise OSError("disco cheio")
+
+    app = create_app(order_cache=FailingCache(root=str(tmp_path)), redis_client=redis_client, secret=SECRET)
+    assert post_orders(app, signed(ORDER)) == [200]
+    # Confirmado ao Shopify, mas ainda na fila para a próxima gravação
+    assert redis_client.xlen(ORDER_QUEUE) == 1
+
+    cache = OrderCache(root=str(tmp_path), redis_client=redis_client)
+    post_orders(create_app(order_cache=cache, redis_client=redis_client, secret=SECRET))
+    assert cache.load()["order_id"].tolist() == ["1001"]
+    assert redis_client.xlen(ORDER_QUEUE) == 0
+
+
+def test_malformed_queue_entries_go_to_dead_letter(tmp_path, redis_client):
+    redis_client.xadd(ORDER_QUEUE, {"data": "{nao e json"})
+    redis_client.xadd(ORDER_QUEUE, {"data": json.dumps({"customer": "Sem número"})})
+    redis_client.xadd(ORDER_QUEUE, {"data": json.dumps({"order_id": "1002", "date": "ontem"})})
+    cache = OrderCache(root=str(tmp_path), redis_client=redis_client)
+    app = create_app(order_cache=cache, redis_client=redis_client, secret=SECRET)
+
+    # Os pedidos válidos seguem sendo gravados, mesmo atrás das entradas inválidas
+    assert post_orders(app, signed(ORDER)) == [200]
+    assert cache.load()["order_id"].tolist() == ["1001"]
+    assert redis_client.xlen(ORDER_QUEUE) == 0
+    dead = redis_client.xrange(ORDER_QUEUE + ":dead")
+    assert [fields[b"data"] for _, fields in dead][0] == b"{nao e json"
+    assert len(dead) == 3
+    assert dead[1][1][b"error"] == "ValueError: pedido sem order_id".encode()
@@ -0,0 +1,87 @@
+import json
+import threading
+
+import pandas as pd
+
+from automacao_assistente_loja_shopify_whatsapp_crm_dashboard.crm.stream import (
+    DEAD_LETTER_KEY,
+    StreamCRMLoader,
+    append_interaction,
+    consume_stream,
+)
+
+STREAM = "whatsapp:inbound"
+GROUP = "crew-workers"
+
+
+def interaction(interaction_id, timestamp, status="Pendente"):
+    return {"interaction_id": interaction_id, "customer": "Maria Silva", "status": status, "timestamp": timestamp}
+
+
+def test_stream_loader_accepts_timestamps_with_time_zone(redis_client):
+    loader = StreamCRMLoader()
+    append_interaction(redis_client, interaction("a", "2024-03-05 10:00:00"))
+    assert loader.load(redis_client, start="2024-03-01", statuses=["Pendente"])["interaction_id"].tolist() == ["a"]
+
+    append_interaction(redis_client, interaction("b", "2024-03-06T10:00:00Z"))
+    append_interaction(redis_client, interaction("c", "2024-02-20T10:00:00-03:00"))
+    frame = loader.load(redis_client, start="2024-03-01", statuses=["Pendente"])
+
+    # "c" é anterior ao início da janela; as datas com fuso ficam em UTC sem fuso
+    assert dict(zip(frame["interaction_id"], frame["timestamp"])) == {
+        "a": pd.Timestamp("2024-03-05 10:00:00"),
+        "b": pd.Timestamp("2024-03-06 10:00:00"),
+    }
+
+
+def consume(redis_client, handler, stop_event, **options):
+    consume_stream(
+        redis_client, STREAM, GROUP, "worker-1", handler,
+        batch_size=1, block_ms=10, min_idle_ms=0, stop_event=stop_event, **options,
+    )
+
+
+def test_failing_message_goes_to_dead_letter_and_others_are_processed(redis_client):
+    redis_client.xadd(STREAM, {"data": json.dumps({"n": 1})})
+    redis_client.xadd(STREAM, {"data": json.dumps({"n": 2})})
+    stop_event = threading.Event()
+    attempts, processed = [], []
+
+    def handler(items):
+        for item in items:
+            if item["n"] == 1:
+                attempts.append(item)
+                raise ValueError("mensagem inválida")
+            processed.append(item["n"])
+            stop_event.set()
+
+    consume(redis_client, handler, stop_event, max_deliveries=3)
+
+    # Três entregas da mensagem com erro, sem derrubar o consumidor; depois, o dead-letter
+    assert len(attempts) == 3
+    assert processed == [2]
+    dead = redis_client.xrange(DEAD_LETTER_KEY.format(STREAM))
+    assert len(dead) == 1
+    fields = dead[0][1]
+    assert json.loads(fields[b"data"]) == {"n": 1}
+    assert fields[b"error"] == b"ValueError: mensagem inv\xc3\xa1lida"
+    assert redis_client.xpending(STREAM, GROUP)["pending"] == 0
+
+
+def test_failed_batch_stays_pending_until_the_limit(redis_client):
+    redis_client.xadd(STREAM, {"data": json.dumps({"n": 1})})
+    stop_event = threading.Event()
+    calls = []
+
+    def handler(items):
+        calls.append(items)
+        if len(calls) == 2:
+            stop_event.set()
+        raise RuntimeError("LLM indisponível")
+
+    consume(redis_client, handler, stop_event, max_deliveries=5)
+
+    # Abaixo do limite a entrada continua pendente para uma nova entrega
+    assert len(calls) == 2
+    assert redis_client.xpending(STREAM, GROUP)["pending"] == 1
+    assert redis_client.xlen(DEAD_LETTER_KEY.format(STREAM)) == 0